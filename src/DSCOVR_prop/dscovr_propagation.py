@@ -1,9 +1,16 @@
 import numpy as np
 from netCDF4 import Dataset
 import pandas as pd
-import datetime as dtm
-from datetime import timedelta
 from icecream import ic
+import os
+import sys
+try:
+    import timestamp_utils as tsu
+except ImportError:
+    # Run from src/DSCOVR_prop (python dscovr_propagation.py, data_comparison.py):
+    # timestamp_utils lives in src
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import timestamp_utils as tsu
 from hapiclient import hapi
 import matplotlib.pyplot as plt
 import json
@@ -32,8 +39,8 @@ def get_params_to_propagate(config, spacecraft):
 def process_ace_timedata(data):
     time_data = data['Time']
     # 64 sec cadence for SW and 16 sec for mag/pos
-    time_data = [dtm.datetime.strptime(t.decode('utf-8'), '%Y-%m-%dT%H:%M:%S.%fZ') for t in time_data]
-    return time_data
+    return tsu.to_datetime_objects(
+        tsu.iso8601_to_datetime64(np.asarray(time_data, dtype=str))).tolist()
 
 
 def propagate_parameters(config_path=None):
@@ -57,7 +64,7 @@ def propagate_parameters(config_path=None):
         pos_data = Dataset(files['pos_file'])
 
         def unix_ms_to_datetime(unix_ms):
-            return np.array([dtm.datetime(1970, 1, 1) + timedelta(milliseconds=x) for x in unix_ms])
+            return tsu.to_datetime_objects(tsu.unix_ms_to_datetime64(unix_ms))
 
         mag_time = unix_ms_to_datetime(np.array(mag_data.variables['time'][:]))
         sw_time = unix_ms_to_datetime(np.array(sw_data.variables['time'][:]))
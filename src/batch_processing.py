@@ -0,0 +1,190 @@
+import os
+import glob
+import json
+import logging
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SPACECRAFT_KEYS = ('g17', 'g18', 'gk2a')
+
+
+def discover_daily_files(template, start_date, end_date):
+    """
+    Find the daily data file of each day in a date range.
+
+    The template is a strftime pattern that may also contain glob wildcards,
+    e.g. 'data/%Y/%m/dn_magn-l2-avg1m_g17_d%Y%m%d_v*.nc'. When several
+    files match a day (e.g. data versions), the last one in sorted order is
+    used, so the choice is deterministic.
+
+    :param template:   strftime/glob path template.
+    :param start_date: First day (str 'YYYY-MM-DD', date or datetime).
+    :param end_date:   Last day, inclusive.
+    :return: dict of datetime.date -> file path, or None if no file matched
+    """
+    days = pd.date_range(pd.to_datetime(start_date).normalize(),
+                         pd.to_datetime(end_date).normalize(), freq='D')
+    files = {}
+    for day in days:
+        matches = sorted(glob.glob(day.strftime(template)))
+        files[day.date()] = matches[-1] if matches else None
+    return files
+
+
+def day_output_paths(output_dir, day, plot=True, output_nc=False):
+    """
+    Deterministic per-day output file names.
+
+    :param output_dir: Output directory.
+    :param day:        datetime.date of the processed day.
+    :param plot:       Include the 'inclination' and 'bgse' figure paths.
+    :param output_nc:  Include the 'netcdf' product path.
+    :return: dict of output kind -> path
+    """
+    day_str = day.strftime('%Y%m%d')
+    outputs = {}
+    if plot:
+        outputs['inclination'] = os.path.join(
+            output_dir, f'mag_inclination_{day_str}.png')
+        outputs['bgse'] = os.path.join(output_dir, f'b_gse_{day_str}.png')
+    if output_nc:
+        outputs['netcdf'] = os.path.join(output_dir, f'vdh_{day_str}.nc')
+    return outputs
+
+
+def _init_worker(plot):
+    if plot:
+        # Workers never show figures, and must not need a display
+        import matplotlib
+        matplotlib.use('Agg')
+
+
+def process_day(day, day_files, output_dir, options):
+    """
+    Process one day in a worker: load, transform and plot to files.
+
+    :param day:        datetime.date being processed.
+    :param day_files:  dict of spacecraft key ('g17', 'g18', 'gk2a') -> path.
+    :param output_dir: Output directory for the per-day files.
+    :param options:    Extra keyword arguments for
+    main.process_spacecraft_data (degrees, transform backend, plot, ...).
+    output_nc=True writes the day's NetCDF product to output_dir.
+    :return: dict with the day's status ('ok' or 'failed'), outputs and error
+    """
+    options = dict(options)
+    plot = options.pop('plot', True)
+    outputs = day_output_paths(output_dir, day, plot=plot,
+                               output_nc=options.pop('output_nc', False))
+
+    from main import process_spacecraft_data
+
+    result = {'date': day.isoformat(), 'files': day_files,
+              'outputs': outputs, 'status': 'ok', 'error': None}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            process_spacecraft_data(
+                g17_file=day_files.get('g17'), g18_file=day_files.get('g18'),
+                gk2a_file=day_files.get('gk2a'),
+                save_path=outputs.get('inclination'),
+                bgse_save_path=outputs.get('bgse'), plot=plot,
+                output_nc=outputs.get('netcdf'), **options)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f'{type(e).__name__}: {e}'
+        result['traceback'] = traceback.format_exc()
+    return result
+
+
+def run_batch(start_date, end_date, templates, output_dir, workers=None,
+              **options):
+    """
+    Process every day in a date range, fanned out over a process pool.
+
+    Each worker imports the heavy dependencies once and then processes many
+    days, instead of starting a new Python process per day.
+
+    :param start_date: First day (str 'YYYY-MM-DD', date or datetime).
+    :param end_date:   Last day, inclusive.
+    :param templates:  dict of spacecraft key ('g17', 'g18', 'gk2a') ->
+    strftime/glob file template, see :func:`discover_daily_files`.
+    :param output_dir: Directory for the per-day outputs and the summary.
+    :param workers:    Number of worker processes (default None, meaning
+    os.cpu_count()). 1 processes the days in this process, with its
+    matplotlib backend; the workers plot with Agg.
+    :param options:    Passed on to main.process_spacecraft_data, e.g.
+    g17_deg, transform_backend, knot_cadence, plot. output_nc=True writes
+    a vdh_YYYYMMDD.nc product per day.
+    :return: Summary dict, also written to output_dir as
+    batch_summary_<start>_<end>.json
+    """
+    unknown = set(templates) - set(SPACECRAFT_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown spacecraft in templates: {sorted(unknown)}")
+    if not templates:
+        raise ValueError("At least one spacecraft file template is required")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    found = {key: discover_daily_files(template, start_date, end_date)
+             for key, template in templates.items()}
+    days = sorted(next(iter(found.values())))
+    if not days:
+        raise ValueError("end_date is before start_date")
+
+    jobs, results = [], {}
+    for day in days:
+        day_files = {key: found[key][day] for key in templates
+                     if found[key][day]}
+        if day_files:
+            jobs.append((day, day_files))
+        else:
+            results[day] = {'date': day.isoformat(), 'files': {},
+                            'outputs': {}, 'status': 'missing',
+                            'error': 'No input files found'}
+
+    if workers == 1:
+        for day, day_files in jobs:
+            results[day] = process_day(day, day_files, output_dir, options)
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(options.get('plot', True),)) \
+                as executor:
+            futures = {day: executor.submit(process_day, day, day_files,
+                                            output_dir, options)
+                       for day, day_files in jobs}
+            for day, future in futures.items():
+                results[day] = future.result()
+
+    for day in days:
+        if results[day]['status'] == 'failed':
+            logger.warning(f"{day}: {results[day]['error']}")
+
+    summary = {
+        'start_date': days[0].isoformat(),
+        'end_date': days[-1].isoformat(),
+        'templates': templates,
+        'n_days': len(days),
+        'n_ok': sum(r['status'] == 'ok' for r in results.values()),
+        'n_failed': sum(r['status'] == 'failed' for r in results.values()),
+        'n_missing': sum(r['status'] == 'missing' for r in results.values()),
+        'days': [results[day] for day in days],
+    }
+
+    summary_path = os.path.join(
+        output_dir, f"batch_summary_{days[0].strftime('%Y%m%d')}_"
+                    f"{days[-1].strftime('%Y%m%d')}.json")
+    with open(summary_path, 'w') as file:
+        json.dump(summary, file, indent=2)
+    summary['summary_path'] = summary_path
+
+    logger.info(f"Processed {summary['n_days']} days: {summary['n_ok']} ok, "
+                f"{summary['n_failed']} failed, {summary['n_missing']} "
+                f"missing. Summary: {summary_path}")
+    return summary
@@ -0,0 +1,29 @@
+import os
+import functools
+
+# Default CDF library location, used when CDF_LIB is not already set
+CDF_BASE_DIR = "C:/Scripts/cdf3.9.0"
+
+
+def configure_cdf_env():
+    """
+    Point spacepy's pycdf at the CDF library, unless CDF_LIB is already set.
+    Must run before spacepy is imported; cheap to call more than once.
+    """
+    if "CDF_LIB" not in os.environ:
+        os.environ["CDF_BASE"] = CDF_BASE_DIR
+        os.environ["CDF_BIN"] = CDF_BASE_DIR + "/bin"
+        os.environ["CDF_LIB"] = CDF_BASE_DIR + "/lib"
+
+
+@functools.lru_cache(maxsize=None)
+def get_cdas():
+    """
+    Shared CdasWs client, created (and cdasws imported) on first use so
+    that importing a module does not pull in the web-service client.
+
+    :return: cdasws.CdasWs instance
+    """
+    configure_cdf_env()
+    from cdasws import CdasWs
+    return CdasWs()
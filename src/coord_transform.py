@@ -1,15 +1,40 @@
 import numpy as np
-import os
-from cdasws import CdasWs
-
-cdas = CdasWs()
-if not "CDF_LIB" in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
-import spacepy.coordinates as spc
-import spacepy.time as spt
+import functools
+from cdaweb import configure_cdf_env
+
+# Bump whenever a change alters transform results, so cached results
+# (see vdh_cache) computed by older code are not reused
+TRANSFORM_VERSION = 1
+
+''' IGRF Constants: from
+https://www.ngdc.noaa.gov/IAGA/vmod/igrf12coeffs.txt'''
+IGRF12_DIP_EPOCHS = np.array(
+    [1900, 1905, 1910, 1915, 1920, 1925, 1930, 1935, 1940, 1945, 1950,
+     1955, 1960, 1965, 1970, 1975, 1980, 1985, 1990, 1995, 2000, 2005,
+     2010, 2015, 2020])
+IGRF12_G01 = np.array(
+    [-31543, -31464, -31354, -31212, -31060, -30926, -30805, -30715,
+     -30654, -30594, -30554, -30500, -30421, -30334, -30220, -30100,
+     -29992, -29873, -29775, -29692, -29619.4, -29554.63, -29496.57,
+     -29441.46, -29404.8])
+IGRF12_G11 = np.array(
+    [-2298, -2298, -2297, -2306, -2317, -2318, -2316, -2306, -2292, -2285,
+     -2250, -2215, -2169, -2119, -2068, -2013, -1956, -1905, -1848, -1784,
+     -1728.2, -1669.05, -1586.42, -1501.77, -1450.9])
+IGRF12_H11 = np.array(
+    [5922, 5909, 5898, 5875, 5845, 5817, 5808, 5812, 5821, 5810, 5815,
+     5820, 5791, 5776, 5737, 5675, 5604, 5500, 5406, 5306, 5186.1, 5077.99,
+     4944.26, 4795.99, 4652.5])
+
+assert len(IGRF12_DIP_EPOCHS) == len(IGRF12_G01) == len(IGRF12_G11) == len(
+    IGRF12_H11), "Coefficient arrays must all have same length"
+
+# Largest number of memoized dipole poles kept by
+# dipole_12_mag_lat_lon_array (one per resolution bin, e.g. per day).
+DIPOLE_CACHE_SIZE = 65536
+
+# Samples per chunk in inclination_from_gse (bounds the Nx3 temporaries)
+INCLINATION_CHUNK_SIZE = 262144
 
 
 def calculate_magnetic_inclination_angle_GSE(bx, by, bz):
@@ -20,9 +45,92 @@ def calculate_magnetic_inclination_angle_VDH(bV, bD, bH):
     return np.arctan2(bH, np.sqrt(bV ** 2 + bD ** 2))
 
 
-def gse_to_vdh(gse_data, time):
+def inclination_from_gse(b_gse, time, chunk_size=INCLINATION_CHUNK_SIZE,
+                         dipole_resolution=None, backend='spacepy',
+                         knot_cadence=None):
+    """
+    Magnetic inclination angle straight from GSE data, without building the
+    full VDH array.
+
+    theta = atan2(H, sqrt(V^2 + D^2)) only needs the H component, and
+    V^2 + D^2 = |B|^2 - H^2 since the rotations preserve the magnitude, so
+    only the H row of each RHENP to VDH matrix is computed. The data are
+    processed in chunks of chunk_size samples, so the temporaries stay
+    bounded for multi-year inputs.
+
+    :param b_gse:      Nx3 Numpy array of GSE cartesian coordinates.
+    :param time:       Pandas DatetimeIndex or datetime64 array (length N).
+    :param chunk_size: Number of samples per chunk.
+    :param dipole_resolution: See :func:`gse_to_vdh`.
+    :param backend:    See :func:`gse_to_vdh`.
+    :param knot_cadence: See :func:`gse_to_vdh`.
+    :return: Numpy array (length N) of inclination angles in radians, same
+    as :func:`calculate_magnetic_inclination_angle_VDH`.
+    """
+    b_gse = np.asarray(b_gse, dtype=float)
+    times = np.asarray(time, dtype='datetime64[ns]').ravel()
+    n_points = len(times)
+    assert (np.shape(b_gse) == (n_points, 3))
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+
+    theta = np.empty(n_points)
+    for start in range(0, n_points, chunk_size):
+        stop = min(start + chunk_size, n_points)
+        b_chunk = b_gse[start:stop]
+        t_chunk = times[start:stop]
+
+        if knot_cadence is not None:
+            geo_coords, _, geo_long = gse_to_geo_coarse(
+                b_chunk, t_chunk, knot_cadence=knot_cadence, backend=backend)
+        else:
+            geo_coords, _, geo_long = gse_to_geo(b_chunk, t_chunk,
+                                                 backend=backend)
+        rhenp = geo_to_rhenp_batched(geo_long, geo_coords)
+
+        b_h = np.einsum('ni,ni->n', _vdh_h_rows(
+            t_chunk, geo_long, dipole_resolution=dipole_resolution), rhenp)
+        b_horizontal = np.sqrt(np.maximum(
+            np.einsum('ni,ni->n', b_chunk, b_chunk) - b_h ** 2, 0.0))
+
+        theta[start:stop] = np.arctan2(b_h, b_horizontal)
+
+    return theta
+
+
+def gse_to_vdh(gse_data, time, batched=True, dipole_resolution=None,
+               backend='spacepy', knot_cadence=None):
+    """
+    Convert GSE cartesian data to VDH.
+
+    :param gse_data: Nx3 Numpy array of GSE cartesian coordinates.
+    :param time:     Pandas DatetimeIndex (length N) of the samples.
+    :param batched:  If True (default), build all rotation matrices as one
+    Nx3x3 array and apply them with a single einsum. If False, use the
+    per-sample reference loops.
+    :param dipole_resolution: Batched engine only. Numpy datetime64 unit at
+    which the IGRF dipole pole is memoized, e.g. 'D' for one pole per day
+    (default None, exact per-sample poles).
+    :param backend:  GSE to GEO backend, 'spacepy' (default) or 'native'.
+    See :func:`gse_to_geo`.
+    :param knot_cadence: If given (seconds or Numpy timedelta64), the GSE to
+    GEO rotation is only computed at knots of this cadence and interpolated
+    for every sample. See :func:`gse_to_geo_coarse`.
+    :return:         Numpy array of VDH cartesian coordinates with dimension
+    Nx3 (input units).
+    """
     # Convert GSE to GEO
-    geo_coords, geo_lat, geo_long = gse_to_geo(gse_data, time)
+    if knot_cadence is not None:
+        geo_coords, geo_lat, geo_long = gse_to_geo_coarse(
+            gse_data, time, knot_cadence=knot_cadence, backend=backend)
+    else:
+        geo_coords, geo_lat, geo_long = gse_to_geo(gse_data, time,
+                                                   backend=backend)
+
+    if batched:
+        rhenp_coords = geo_to_rhenp_batched(geo_long, geo_coords)
+        return rhenp_to_vdh_batched(time, geo_lat, geo_long, rhenp_coords,
+                                    dipole_resolution=dipole_resolution)
 
     # Convert GEO to RHENP
     rhenp_coords = geo_to_rhenp(geo_long, geo_coords)
@@ -33,9 +141,27 @@ def gse_to_vdh(gse_data, time):
     return vdh_coords
 
 
+def gse_to_geo(b_gse_stacked, time, backend='spacepy'):
+    """
+    Convert GSE cartesian data to GEO cartesian and GEO latitude/longitude.
+
+    :param b_gse_stacked: Nx3 Numpy array of GSE cartesian coordinates.
+    :param time:          Pandas DatetimeIndex or datetime64 array (length N)
+    of the samples.
+    :param backend:       'spacepy' (default) converts through a spacepy
+    Coords object. 'native' uses :func:`gse_to_geo_native`, which is orders
+    of magnitude faster and agrees with spacepy to ~0.03 degrees.
+    :return: (geo_coords, geo_latitude, geo_longitude). geo_coords is a
+    spacepy Coords object for the spacepy backend and an Nx3 Numpy array for
+    the native backend; latitude and longitude are in degrees.
+    """
+    if backend == 'native':
+        return gse_to_geo_native(b_gse_stacked, time)
+    if backend != 'spacepy':
+        raise ValueError(f"Unknown GSE to GEO backend: {backend}")
 
-def gse_to_geo(b_gse_stacked, time):
-    time = time.to_pydatetime()
+    spc, spt = _spacepy_coords()
+    time = np.asarray(time, dtype='datetime64[us]').astype(object)
 
     # Need to create ticks from spacepy.time for unit conversion:
     tickz = spt.Ticktock(time, 'UTC')
@@ -56,7 +182,266 @@ def gse_to_geo(b_gse_stacked, time):
     return geo_coords, geo_latitude, geo_longitude
 
 
+def _spacepy_coords():
+    """ spacepy.coordinates and spacepy.time, imported on first use since
+    spacepy is slow to import and the native backend does not need it. """
+    configure_cdf_env()
+    import spacepy.coordinates as spc
+    import spacepy.time as spt
+    return spc, spt
+
+
+def gse_to_geo_native(b_gse_stacked, time):
+    """
+    GSE to GEO conversion computed directly with numpy, bypassing spacepy.
+
+    The rotation matrices are built from the time array following Hapgood
+    (1992), doi:10.1016/0032-0633(92)90012-D, and the GEO latitude and
+    longitude are derived from the cartesian result in the same pass.
+
+    :param b_gse_stacked: Nx3 Numpy array of GSE cartesian coordinates.
+    :param time:          Pandas DatetimeIndex or datetime64 array (length N).
+    :return: (geo_coords, geo_latitude, geo_longitude) with geo_coords an Nx3
+    Numpy array and latitude/longitude in degrees (longitude in [-180, 180]).
+    """
+    b_gse = np.asarray(b_gse_stacked, dtype=float)
+    mats = gse_to_geo_matrices(time)
+
+    geo_coords = np.einsum('nij,nj->ni', mats, b_gse)
+    geo_latitude, geo_longitude = cartesian_to_lat_lon(geo_coords)
+
+    return geo_coords, geo_latitude, geo_longitude
+
+
+def gse_to_geo_matrices(time):
+    """
+    Rotation matrices from GSE to GEO, Hapgood (1992):
+
+        T1 = <theta, Z>                  (GEI to GEO, theta = GMST)
+        T2 = <lambda_sun, Z> * <eps, X>  (GEI to GSE)
+        GSE to GEO = T1 * transpose(T2)
+
+    :param time: Pandas DatetimeIndex or datetime64 array (length N).
+    :return: 3D Numpy array of shape Nx3x3 representing each rotation matrix
+    """
+    times = np.asarray(time, dtype='datetime64[ns]').ravel()
+
+    # Modified Julian Date, split into the day (0h UT) and the UT hours
+    mjd = (times - np.datetime64('1858-11-17', 'ns')) / np.timedelta64(1, 'D')
+    mjd_0h = np.floor(mjd)
+    ut_hours = (mjd - mjd_0h) * 24.0
+
+    # Julian centuries from J2000.0 to 0h UT of the day
+    t0 = (mjd_0h - 51544.5) / 36525.0
+
+    gmst = 100.461 + 36000.770 * t0 + 15.04107 * ut_hours
+    obliquity = 23.439 - 0.013 * t0
+    mean_anomaly = np.radians(357.528 + 35999.050 * t0 + 0.04107 * ut_hours)
+    mean_longitude = 280.460 + 36000.772 * t0 + 0.04107 * ut_hours
+    sun_longitude = mean_longitude + \
+        (1.915 - 0.0048 * t0) * np.sin(mean_anomaly) + \
+        0.020 * np.sin(2.0 * mean_anomaly)
+
+    gei_to_geo = hapgood_matrices(np.mod(gmst, 360.0), 2)
+    gei_to_gse = np.matmul(hapgood_matrices(np.mod(sun_longitude, 360.0), 2),
+                           hapgood_matrices(obliquity, 0))
+
+    return np.matmul(gei_to_geo, np.swapaxes(gei_to_gse, 1, 2))
+
+
+def gse_to_geo_coarse(b_gse_stacked, time, knot_cadence=60,
+                      backend='native', return_error=False):
+    """
+    GSE to GEO conversion with the rotation computed only at coarse knots.
+
+    The GSE to GEO rotation changes slowly and smoothly (mainly the Earth's
+    rotation about the GEO Z axis), so it is computed exactly at knot times
+    of the given cadence and interpolated between knots with quaternion
+    slerp for each sample. This makes high-rate data (e.g. 10 Hz, 864,000
+    samples/day) practical with either backend.
+
+    :param b_gse_stacked: Nx3 Numpy array of GSE cartesian coordinates.
+    :param time:          Pandas DatetimeIndex or datetime64 array (length N).
+    :param knot_cadence:  Knot spacing, seconds or Numpy timedelta64
+    (default 60 s).
+    :param backend:       Backend used at the knots, 'native' (default) or
+    'spacepy'.
+    :param return_error:  If True, also return the max angular error [deg]
+    of the interpolated rotation against the exact path, evaluated at the
+    midpoints between knots where the interpolation error peaks.
+    :return: (geo_coords, geo_latitude, geo_longitude), plus the max angular
+    error if return_error is True. geo_coords is an Nx3 Numpy array.
+    """
+    times = np.asarray(time, dtype='datetime64[ns]').ravel()
+    knot_times = _knot_times(times, knot_cadence)
+    knot_mats = _gse_to_geo_matrices_backend(knot_times, backend)
+
+    mats = interpolate_rotation_matrices(knot_times, knot_mats, times)
+
+    geo_coords = np.einsum('nij,nj->ni', mats,
+                           np.asarray(b_gse_stacked, dtype=float))
+    geo_latitude, geo_longitude = cartesian_to_lat_lon(geo_coords)
+
+    if not return_error:
+        return geo_coords, geo_latitude, geo_longitude
+
+    midpoints = knot_times[:-1] + (knot_times[1:] - knot_times[:-1]) // 2
+    max_error = np.max(rotation_angle_between(
+        interpolate_rotation_matrices(knot_times, knot_mats, midpoints),
+        _gse_to_geo_matrices_backend(midpoints, backend)))
+
+    return geo_coords, geo_latitude, geo_longitude, max_error
+
+
+def interpolate_rotation_matrices(knot_times, knot_mats, times):
+    """
+    Interpolate rotation matrices between knots with quaternion slerp.
+
+    :param knot_times: Sorted datetime64 array of knot times (at least 2).
+    :param knot_mats:  Nknotsx3x3 rotation matrices at the knots.
+    :param times:      datetime64 array of times within the knot range.
+    :return: 3D Numpy array of shape Nx3x3 of interpolated rotations
+    """
+    knot_ns = np.asarray(knot_times, dtype='datetime64[ns]').astype(np.int64)
+    times_ns = np.asarray(times, dtype='datetime64[ns]').astype(np.int64)
+
+    i_knot = np.clip(np.searchsorted(knot_ns, times_ns, side='right') - 1,
+                     0, len(knot_ns) - 2)
+    frac = (times_ns - knot_ns[i_knot]) / (knot_ns[i_knot + 1] -
+                                           knot_ns[i_knot])
+
+    quats = _rotation_matrices_to_quaternions(knot_mats)
+    interp = _slerp(quats[i_knot], quats[i_knot + 1], frac)
+
+    return _quaternions_to_rotation_matrices(interp)
+
+
+def rotation_angle_between(mats_a, mats_b):
+    """
+    Angle [deg] of the rotation taking each matrix of mats_a to mats_b.
+
+    Uses ||A - B||_F = 2 sqrt(2) sin(angle / 2), which stays accurate for
+    the tiny angles of interest here (unlike the arccos of the trace).
+    """
+    frobenius = np.linalg.norm(np.asarray(mats_a) - np.asarray(mats_b),
+                               axis=(1, 2))
+    return np.degrees(2.0 * np.arcsin(np.clip(
+        frobenius / (2.0 * np.sqrt(2.0)), 0.0, 1.0)))
+
+
+def _knot_times(times, knot_cadence):
+    """ Knot times of the given cadence covering [times.min(), times.max()]. """
+    if isinstance(knot_cadence, np.timedelta64):
+        cadence_ns = knot_cadence.astype('timedelta64[ns]').astype(np.int64)
+    else:
+        cadence_ns = int(round(float(knot_cadence) * 1e9))
+    if cadence_ns <= 0:
+        raise ValueError("knot_cadence must be positive")
+
+    times_ns = times.astype(np.int64)
+    first = times_ns.min() - times_ns.min() % cadence_ns
+    last = times_ns.max()
+    n_knots = max(int(-(-(last - first) // cadence_ns)) + 1, 2)
+
+    return (first + cadence_ns * np.arange(n_knots)).astype('datetime64[ns]')
+
+
+def _gse_to_geo_matrices_backend(times, backend):
+    """ Exact GSE to GEO rotation matrices from the chosen backend. """
+    if backend == 'native':
+        return gse_to_geo_matrices(times)
+    if backend != 'spacepy':
+        raise ValueError(f"Unknown GSE to GEO backend: {backend}")
+
+    spc, spt = _spacepy_coords()
+
+    # The matrix columns are the GEO images of the GSE basis vectors
+    n_times = len(times)
+    basis = np.tile(np.eye(3), (n_times, 1))
+    tickz = spt.Ticktock(np.repeat(times.astype('datetime64[us]').astype(
+        object), 3), 'UTC')
+    geo = spc.Coords(basis, 'GSE', 'car', ticks=tickz).convert('GEO', 'car')
+
+    return np.swapaxes(geo.data.reshape(n_times, 3, 3), 1, 2)
+
+
+def _rotation_matrices_to_quaternions(mats):
+    """ Nx3x3 rotation matrices to Nx4 unit quaternions (w, x, y, z). """
+    m = np.asarray(mats, dtype=float)
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+
+    # Shepperd's method: pick the best conditioned of the four candidates
+    candidates = np.column_stack((trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]))
+    choice = np.argmax(candidates, axis=1)
+    quats = np.empty((len(m), 4))
+
+    w = choice == 0
+    s = 2.0 * np.sqrt(1.0 + trace[w])
+    quats[w] = np.column_stack((0.25 * s,
+                                (m[w, 2, 1] - m[w, 1, 2]) / s,
+                                (m[w, 0, 2] - m[w, 2, 0]) / s,
+                                (m[w, 1, 0] - m[w, 0, 1]) / s))
+
+    for axis in range(3):
+        sel = choice == axis + 1
+        j, k = (axis + 1) % 3, (axis + 2) % 3
+        s = 2.0 * np.sqrt(1.0 + m[sel, axis, axis] - m[sel, j, j] -
+                          m[sel, k, k])
+        quats[sel, 0] = (m[sel, k, j] - m[sel, j, k]) / s
+        quats[sel, 1 + axis] = 0.25 * s
+        quats[sel, 1 + j] = (m[sel, j, axis] + m[sel, axis, j]) / s
+        quats[sel, 1 + k] = (m[sel, k, axis] + m[sel, axis, k]) / s
+
+    return quats
+
+
+def _quaternions_to_rotation_matrices(quats):
+    """ Nx4 unit quaternions (w, x, y, z) to Nx3x3 rotation matrices. """
+    w, x, y, z = quats[:, 0], quats[:, 1], quats[:, 2], quats[:, 3]
+    return np.stack((
+        np.column_stack((1 - 2 * (y * y + z * z), 2 * (x * y - z * w),
+                         2 * (x * z + y * w))),
+        np.column_stack((2 * (x * y + z * w), 1 - 2 * (x * x + z * z),
+                         2 * (y * z - x * w))),
+        np.column_stack((2 * (x * z - y * w), 2 * (y * z + x * w),
+                         1 - 2 * (x * x + y * y)))), axis=1)
+
+
+def _slerp(q0, q1, frac):
+    """ Row-wise spherical linear interpolation of unit quaternions. """
+    dot = np.sum(q0 * q1, axis=1)
+
+    # q and -q are the same rotation, take the short way round
+    q1 = np.where((dot < 0)[:, np.newaxis], -q1, q1)
+    dot = np.abs(dot)
+
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    small = sin_theta < 1e-12
+    safe_sin = np.where(small, 1.0, sin_theta)
+
+    w0 = np.where(small, 1.0 - frac, np.sin((1.0 - frac) * theta) / safe_sin)
+    w1 = np.where(small, frac, np.sin(frac * theta) / safe_sin)
+
+    quats = w0[:, np.newaxis] * q0 + w1[:, np.newaxis] * q1
+    return quats / np.linalg.norm(quats, axis=1)[:, np.newaxis]
+
+
+def cartesian_to_lat_lon(cart_coords):
+    """
+    Latitude and longitude (degrees) of Nx3 cartesian vectors, matching the
+    spacepy 'sph' convention (longitude in [-180, 180]).
+    """
+    x, y, z = cart_coords[:, 0], cart_coords[:, 1], cart_coords[:, 2]
+    latitude = np.degrees(np.arctan2(z, np.sqrt(x ** 2 + y ** 2)))
+    longitude = np.degrees(np.arctan2(y, x))
+    return latitude, longitude
+
+
 def geo_to_rhenp(geo_long, geo_coords, backward=False):
+    if not isinstance(geo_coords, np.ndarray):
+        geo_coords = geo_coords.data
+
     n_points = len(geo_long)
     result = np.empty((n_points, 3))
 
@@ -66,13 +451,35 @@ def geo_to_rhenp(geo_long, geo_coords, backward=False):
         if backward:
             mat = np.transpose(mat)
 
-        geo_cart_coords = geo_coords.data[i,
+        geo_cart_coords = geo_coords[i,
                           :]  # Extract coordinates for a single time point
         result[i, :] = np.dot(geo_cart_coords, mat)
 
     return result
 
 
+def geo_to_rhenp_batched(geo_long, geo_coords, backward=False):
+    """ Vectorized :func:`geo_to_rhenp`.
+
+    :param geo_long:   Geocentric longitude. [Numpy array of floats.]
+    :param geo_coords: GEO cartesian coordinates, either a spacepy Coords
+    object or an Nx3 Numpy array.
+    :param backward:   If True, apply the transposed (RHENP to GEO) rotation.
+    :return:           Numpy array of RHENP cartesian coordinates with
+    dimension Nx3.
+    """
+    if not isinstance(geo_coords, np.ndarray):
+        geo_coords = geo_coords.data
+    geo_cart_coords = np.asarray(geo_coords, dtype=float)
+    mats = hapgood_matrices(geo_long, 2)
+
+    if backward:
+        mats = np.swapaxes(mats, 1, 2)
+
+    # Row vector times matrix, same as np.dot(geo_cart_coords[i], mats[i])
+    return np.einsum('ni,nij->nj', geo_cart_coords, mats)
+
+
 def hapgood_matrix(theta, axis):
     """ Implementation of ATBD for GOES-R MAG Alternate Coordinate Systems.
 
@@ -115,6 +522,31 @@ def hapgood_matrix(theta, axis):
     return mat
 
 
+def hapgood_matrices(theta, axis):
+    """ Vectorized :func:`hapgood_matrix` for an array of angles.
+
+    :param theta: 1D array of degrees to rotate
+    :param axis: axis to rotate: 0, 1 or 2
+    :return: Numpy array of Hapgood matrices with dimension Nx3x3
+    """
+    assert np.isscalar(axis)
+
+    theta = np.radians(np.asarray(theta, dtype=float).ravel())
+    sin_theta = np.sin(theta)
+    cos_theta = np.cos(theta)
+
+    t1, t2 = (1, 2) if axis == 0 else (0, 2) if axis == 1 else (0, 1)
+
+    mats = np.zeros((theta.size, 3, 3))
+    mats[:, axis, axis] = 1.0
+    mats[:, t1, t1] = cos_theta
+    mats[:, t2, t2] = cos_theta
+    mats[:, t1, t2] = sin_theta
+    mats[:, t2, t1] = -sin_theta
+
+    return mats
+
+
 def rhenp_to_vdh(dt, geo_lat, geo_lon, rhenp, mats=None):
     """ The magnetic VDH coordinate definition and transformation algorithm
         follows that given by McPherron (1973) for the ATS-1.
@@ -145,7 +577,7 @@ def rhenp_to_vdh(dt, geo_lat, geo_lon, rhenp, mats=None):
     assert (np.shape(geo_lat) == (n_points,))
     assert (np.shape(geo_lon) == (n_points,))
 
-    output = np.full((n_points, 3), np.nan, dtype=np.float)
+    output = np.full((n_points, 3), np.nan, dtype=float)
 
     mats = rhenp_to_vdh_mats(dt, geo_lat, geo_lon)
 
@@ -206,6 +638,79 @@ def rhenp_to_vdh_mats(dt, geo_lat, geo_lon):
     return mats
 
 
+def rhenp_to_vdh_batched(dt, geo_lat, geo_lon, rhenp, mats=None,
+                         dipole_resolution=None):
+    """ Vectorized :func:`rhenp_to_vdh`. All rotation matrices are built as
+    one Nx3x3 array and applied with a single einsum.
+
+    :param dt:      Numpy array or Pandas DatetimeIndex of date-times.
+    :param geo_lat: Geocentric latitude. [Numpy array of floats.]
+    :param geo_lon: Geocentric longitude. [Numpy array of floats.]
+    :param rhenp:   Right-handed ENP (intermediate coordinate system).
+    :param mats:    Rotation matrices from :func:`rhenp_to_vdh_mats_batched`
+    (optional, default None, meaning they will be computed)
+    :param dipole_resolution: Numpy datetime64 unit at which the dipole pole
+    is memoized, e.g. 'D' (optional, default None, meaning exact per-sample
+    poles). See :func:`dipole_12_mag_lat_lon_array`.
+    :return:        Numpy array of VDH cartesian coordinates with dimension
+    Nx3 (input units).
+    """
+    n_points = len(dt)
+    assert (np.shape(rhenp) == (n_points, 3))
+    assert (np.shape(geo_lat) == (n_points,))
+    assert (np.shape(geo_lon) == (n_points,))
+
+    if mats is None:
+        mats = rhenp_to_vdh_mats_batched(dt, geo_lat, geo_lon,
+                                         dipole_resolution=dipole_resolution)
+
+    return np.einsum('nij,nj->ni', mats, np.asarray(rhenp, dtype=float))
+
+
+def rhenp_to_vdh_mats_batched(dt, geo_lat, geo_lon, dipole_resolution=None):
+    """ Vectorized :func:`rhenp_to_vdh_mats`.
+
+    :param dt:      Numpy array or Pandas DatetimeIndex of date-times.
+    :param geo_lat: Geocentric latitude. [Numpy array of floats.]
+    :param geo_lon: Geocentric longitude. [Numpy array of floats.]
+    :param dipole_resolution: Numpy datetime64 unit at which the dipole pole
+    is memoized (optional, default None, meaning exact per-sample poles).
+    :return: 3D Numpy array of shape Nx3x3 representing each rotation matrix
+    """
+    geo_lat = np.asarray(geo_lat, dtype=float)
+
+    lat = np.radians(geo_lat)
+    Rg = np.column_stack((np.cos(lat), np.zeros_like(lat), np.sin(lat)))
+
+    H = _vdh_h_rows(dt, geo_lon, dipole_resolution=dipole_resolution)
+
+    Q = np.sqrt((H[:, 1] * Rg[:, 2] - Rg[:, 1] * H[:, 2]) ** 2 + (
+            H[:, 2] * Rg[:, 0] - Rg[:, 2] * H[:, 0]) ** 2 + (
+                        H[:, 0] * Rg[:, 1] - Rg[:, 0] * H[:, 1]) ** 2)
+
+    D = np.cross(H, Rg) / Q[:, np.newaxis]
+
+    V = np.cross(D, H)
+
+    return np.stack((V, D, H), axis=1)
+
+
+def _vdh_h_rows(dt, geo_lon, dipole_resolution=None):
+    """ H rows (dipole axis in RHENP) of the RHENP to VDH matrices, Nx3. """
+    geo_lon = np.asarray(geo_lon, dtype=float)
+
+    dip_lat, dip_lon = dipole_12_mag_lat_lon_array(
+        dt, resolution=dipole_resolution)
+    dip_lat = np.radians(dip_lat)
+    dip_lon = np.radians(dip_lon)
+
+    u = np.column_stack((np.cos(dip_lat) * np.cos(dip_lon),
+                         np.cos(dip_lat) * np.sin(dip_lon),
+                         np.sin(dip_lat)))
+
+    return np.einsum('nij,nj->ni', hapgood_matrices(geo_lon, 2), u)
+
+
 def dipole_12_mag_lat_lon(dt):
     """
     Calculates the IGRF12 Dipole latitude and longitude in Geocentric
@@ -220,28 +725,10 @@ def dipole_12_mag_lat_lon(dt):
 
     assert len(np.shape([dt])) == 1, "Expected a scalar time value"
 
-    ''' IGRF Constants: from 
-    https://www.ngdc.noaa.gov/IAGA/vmod/igrf12coeffs.txt'''
-    dip_epochs = np.array(
-        [1900, 1905, 1910, 1915, 1920, 1925, 1930, 1935, 1940, 1945, 1950,
-         1955, 1960, 1965, 1970, 1975, 1980, 1985, 1990, 1995, 2000, 2005,
-         2010, 2015, 2020])
-    g01 = np.array(
-        [-31543, -31464, -31354, -31212, -31060, -30926, -30805, -30715,
-         -30654, -30594, -30554, -30500, -30421, -30334, -30220, -30100,
-         -29992, -29873, -29775, -29692, -29619.4, -29554.63, -29496.57,
-         -29441.46, -29404.8])
-    g11 = np.array(
-        [-2298, -2298, -2297, -2306, -2317, -2318, -2316, -2306, -2292, -2285,
-         -2250, -2215, -2169, -2119, -2068, -2013, -1956, -1905, -1848, -1784,
-         -1728.2, -1669.05, -1586.42, -1501.77, -1450.9])
-    h11 = np.array(
-        [5922, 5909, 5898, 5875, 5845, 5817, 5808, 5812, 5821, 5810, 5815,
-         5820, 5791, 5776, 5737, 5675, 5604, 5500, 5406, 5306, 5186.1, 5077.99,
-         4944.26, 4795.99, 4652.5])
-
-    assert len(dip_epochs) == len(g01) == len(g11) == len(
-        h11), "Coefficient arrays must all have same length"
+    dip_epochs = IGRF12_DIP_EPOCHS
+    g01 = IGRF12_G01
+    g11 = IGRF12_G11
+    h11 = IGRF12_H11
 
     ''' Interpolate IGRF coefficients linearly '''
     # Nearest IGRF epoch <= Date
@@ -272,6 +759,79 @@ def dipole_12_mag_lat_lon(dt):
     return [dip_lat, dip_lon]
 
 
+def dipole_12_mag_lat_lon_array(dt, resolution=None):
+    """
+    Vectorized :func:`dipole_12_mag_lat_lon` for an array of times.
+
+    The dipole pole moves by tiny fractions of a degree per day, so with a
+    resolution the pole is evaluated once per resolution bin (at the start
+    of the bin) and memoized across calls. A month of minute data with
+    resolution='D' needs ~30 pole evaluations instead of 43,200.
+
+    :param dt: Numpy datetime64 array, Pandas DatetimeIndex or sequence of
+    Datetime objects.
+    :param resolution: Numpy datetime64 unit of the memoization bins, e.g.
+    'D' (day), 'h' (hour) or 'm' (minute). Default None evaluates the exact
+    pole of every sample without caching.
+    :return: ( dipole_lat, dipole_lon )    # degrees, Numpy arrays
+    """
+    times = np.asarray(dt, dtype='datetime64[ns]').ravel()
+
+    if resolution is None:
+        return _dipole_12_mag_lat_lon_dt64(times)
+
+    bins, inverse = np.unique(times.astype(f'datetime64[{resolution}]'),
+                              return_inverse=True)
+    poles = np.array([_cached_dipole_12_mag_lat_lon(int(b), resolution)
+                      for b in bins.astype(np.int64)], dtype=float)
+    poles = poles.reshape(-1, 2)
+
+    return poles[inverse, 0], poles[inverse, 1]
+
+
+@functools.lru_cache(maxsize=DIPOLE_CACHE_SIZE)
+def _cached_dipole_12_mag_lat_lon(bin_start, resolution):
+    """ Dipole pole at the start of one resolution bin (memoized). """
+    time = np.array([bin_start], dtype=f'datetime64[{resolution}]')
+    dip_lat, dip_lon = _dipole_12_mag_lat_lon_dt64(time)
+    return dip_lat[0], dip_lon[0]
+
+
+def clear_dipole_cache():
+    """ Drop all poles memoized by :func:`dipole_12_mag_lat_lon_array`. """
+    _cached_dipole_12_mag_lat_lon.cache_clear()
+
+
+def _dipole_12_mag_lat_lon_dt64(times):
+    """ Array version of the IGRF12 dipole pole for datetime64 times. """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    years = times.astype('datetime64[Y]').astype(np.int64) + 1970
+
+    # Nearest IGRF epoch <= Date
+    i_epoch = np.searchsorted(IGRF12_DIP_EPOCHS, years, side='right') - 1
+    assert np.all(i_epoch >= 0), "Dates before the first IGRF epoch"
+    i_epoch_next = np.minimum(i_epoch + 1, len(IGRF12_DIP_EPOCHS) - 1)
+
+    frac_year = year_fraction_array(times)
+    g01 = IGRF12_G01[i_epoch] + frac_year * (
+            IGRF12_G01[i_epoch_next] - IGRF12_G01[i_epoch])
+    g11 = IGRF12_G11[i_epoch] + frac_year * (
+            IGRF12_G11[i_epoch_next] - IGRF12_G11[i_epoch])
+    h11 = IGRF12_H11[i_epoch] + frac_year * (
+            IGRF12_H11[i_epoch_next] - IGRF12_H11[i_epoch])
+
+    dip_lon = np.degrees(np.arctan2(h11, g11) + np.pi)
+
+    rad_dip_lon = np.radians(dip_lon)
+    dip_lat = np.degrees(
+        np.pi / 2 - np.arctan(
+            (g11 * np.cos(rad_dip_lon) + h11 * np.sin(rad_dip_lon)) / g01
+        )
+    )
+
+    return dip_lat, dip_lon
+
+
 def year_fraction(dt):
     '''
     Converts Datetime to Year fraction [0,1).
@@ -293,3 +853,20 @@ def year_fraction(dt):
 
     return year_frac
 
+
+def year_fraction_array(dt):
+    '''
+    Vectorized :func:`year_fraction` using datetime64 arithmetic.
+
+    :param dt: Numpy datetime64 array (or anything convertible to one).
+    :return: Numpy array of year fractions [0,1).
+    '''
+    times = np.asarray(dt, dtype='datetime64[ns]')
+    year_start = times.astype('datetime64[Y]')
+    days_in_year = ((year_start + 1).astype('datetime64[D]') -
+                    year_start.astype('datetime64[D]')).astype(float)
+
+    day_of_year = (times - year_start.astype('datetime64[ns]')) / \
+        np.timedelta64(1, 'D')
+
+    return day_of_year / days_in_year
@@ -2,17 +2,14 @@ import pickle
 import numpy as np
 import pandas as pd
 import os
-from cdasws import CdasWs
 import re
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 import kp_data_processing as kp
+import timestamp_utils as tsu
 
-cdas = CdasWs()
-if "CDF_LIB" not in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
+# Date embedded in pickle file names, e.g. sosmag_modout_OMNI2022-08-04.pickle
+FILENAME_DATE_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
 
 def load_and_trim_data(pickle_dir, start_date, end_date):
     """
@@ -46,6 +43,9 @@ def load_and_trim_data(pickle_dir, start_date, end_date):
         'time_min', 'sat_gse', 'tsXX_gse', 'tsXX-sat', where 'XX' is a
         placeholder for the model identifier (e.g., '89' or '04').
 
+        pickle_dir may also be a model_store directory (see
+        model_store.convert_pickle_archive), which is read directly.
+
     Example:
         To load and filter data from a directory 'data_dir' for the date
         range from 'start_date'
@@ -56,6 +56,12 @@ def load_and_trim_data(pickle_dir, start_date, end_date):
         time_list, data_list, model_list, subtr_list = load_and_trim_data(
         'data_dir', start_date, end_date)
     """
+    import model_store
+    if model_store.is_store(pickle_dir):
+        rows = model_store.read_range(pickle_dir, start_date, end_date)
+        return (list(pd.to_datetime(rows['time'])), list(rows['sat_gse']),
+                list(rows['model']), list(rows['subtr']))
+
     time_list = []
     data_list = []
     model_list = []
@@ -91,8 +97,9 @@ def load_and_trim_data(pickle_dir, start_date, end_date):
             model_list.extend(filtered_model)
             subtr_list.extend(filtered_subtr)
 
-    # Sort all lists based on the time_list
-    sorted_indices = sorted(range(len(time_list)), key=lambda i: time_list[i])
+    # Sort all lists based on the time_list (stable argsort of int64 times)
+    sorted_indices = np.argsort(pd.DatetimeIndex(time_list).asi8,
+                                kind='stable')
     time_list = [time_list[i] for i in sorted_indices]
     data_list = [data_list[i] for i in sorted_indices]
     model_list = [model_list[i] for i in sorted_indices]
@@ -101,6 +108,180 @@ def load_and_trim_data(pickle_dir, start_date, end_date):
     return time_list, data_list, model_list, subtr_list
 
 
+def date_from_filename(filename):
+    """
+    Date embedded in a file name as YYYY-MM-DD (the last one, if several).
+
+    :param filename: File name, e.g. 'sosmag_modout_OMNI2022-08-04.pickle'.
+    :return: datetime.date, or None if the name holds no valid date
+    """
+    for match in reversed(FILENAME_DATE_PATTERN.findall(
+            os.path.basename(filename))):
+        try:
+            return datetime.date(*map(int, match))
+        except ValueError:
+            continue
+    return None
+
+
+def select_pickle_files(pickle_dir, start_date, end_date, pad_days=0):
+    """
+    Pickle files of a directory whose file name date can hold data in
+    [start_date, end_date]. Files without a date in their name are kept,
+    since they can't be pruned.
+
+    :param pickle_dir: Directory with the pickle files.
+    :param start_date: Start of the date range (inclusive).
+    :param end_date:   End of the date range (inclusive).
+    :param pad_days:   Extra days kept on both sides, for files holding
+    samples beyond their own date (default 0).
+    :return: Sorted list of file paths
+    """
+    first = pd.Timestamp(start_date).date() - datetime.timedelta(pad_days)
+    last = pd.Timestamp(end_date).date() + datetime.timedelta(pad_days)
+
+    selected = []
+    for filename in sorted(os.listdir(pickle_dir)):
+        if not filename.endswith('.pickle'):
+            continue
+        file_date = date_from_filename(filename)
+        if file_date is None or first <= file_date <= last:
+            selected.append(os.path.join(pickle_dir, filename))
+    return selected
+
+
+def load_pickle_arrays(file_path, start=None, end=None):
+    """
+    One model subtraction pickle file as numpy arrays, optionally trimmed
+    to [start, end]. Also the process pool worker of load_and_trim_arrays.
+
+    :param file_path: Path to the pickle file to load.
+    :param start:     Optional start time (datetime64[ns], inclusive).
+    :param end:       Optional end time (datetime64[ns], inclusive).
+    :return: Tuple of arrays (time [datetime64[ns]], sat_gse, model,
+    subtr), in the file's order.
+    """
+    time, model_gse, sat_gse, subtr_data = \
+        load_model_subtr_gse_from_pickle_file(file_path)
+
+    time = pd.to_datetime(time).to_numpy(dtype='datetime64[ns]')
+    keep = np.ones(len(time), dtype=bool)
+    if start is not None:
+        keep &= time >= start
+    if end is not None:
+        keep &= time <= end
+
+    return (time[keep], np.asarray(sat_gse, dtype=float)[keep],
+            np.asarray(model_gse, dtype=float)[keep],
+            np.asarray(subtr_data, dtype=float)[keep])
+
+
+def merge_sorted_series(parts, drop_duplicates=False):
+    """
+    Merge per-file series that are each sorted by time into one sorted
+    series.
+
+    When the parts don't overlap (consecutive daily files), ordering them by
+    their first timestamp and concatenating is enough. Otherwise a stable
+    argsort of the int64 times is used; numpy's stable sort is a timsort
+    that merges the pre-sorted runs rather than sorting from scratch.
+
+    :param parts:           Sequence of tuples (time [datetime64], column,
+    ...) with the same number of columns; unsorted parts are sorted first.
+    :param drop_duplicates: Keep only the first sample of each repeated
+    timestamp, e.g. the midnight sample present in two daily files. The
+    sample of the part that starts first is kept (default False).
+    :return: Tuple of contiguous arrays (time, column, ...)
+    """
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return None
+
+    sorted_parts = []
+    for index, part in enumerate(parts):
+        time = np.asarray(part[0], dtype='datetime64[ns]')
+        if np.any(time[1:] < time[:-1]):
+            order = np.argsort(time, kind='stable')
+            part = [time[order]] + [np.asarray(column)[order]
+                                    for column in part[1:]]
+        sorted_parts.append((time[0], index, part))
+    # Parts starting at the same time keep the caller's order
+    sorted_parts.sort(key=lambda item: (item[0], item[1]))
+    parts = [part for _, _, part in sorted_parts]
+
+    columns = [np.concatenate([np.asarray(part[i]) for part in parts])
+               for i in range(len(parts[0]))]
+    time = columns[0].astype('datetime64[ns]')
+    columns[0] = time
+
+    if np.any(time[1:] < time[:-1]):
+        order = np.argsort(time.view(np.int64), kind='stable')
+        columns = [column[order] for column in columns]
+        time = columns[0]
+
+    if drop_duplicates:
+        keep = np.ones(len(time), dtype=bool)
+        keep[1:] = time[1:] != time[:-1]
+        if not keep.all():
+            columns = [column[keep] for column in columns]
+
+    return tuple(np.ascontiguousarray(column) for column in columns)
+
+
+def load_and_trim_arrays(pickle_dir, start_date, end_date, workers=None,
+                         pad_days=0, drop_duplicates=False):
+    """
+    Array version of load_and_trim_data that only opens the files whose
+    name date falls in the date range, and unpickles them concurrently.
+
+    Args:
+        pickle_dir (str): The directory containing pickle files with the
+        data, or a model_store directory.
+        start_date (datetime): Start of the date range (inclusive).
+        end_date (datetime): End of the date range (inclusive).
+        workers (int, optional): Worker processes for unpickling (default
+        None, meaning os.cpu_count()). 1 loads in this process.
+        pad_days (int, optional): Extra days of files to open on both sides
+        of the range, for files holding samples beyond their own date
+        (default 0).
+        drop_duplicates (bool, optional): Keep only the first sample of
+        each repeated timestamp, e.g. at day boundaries (default False).
+
+    Returns:
+        tuple: Contiguous numpy arrays sorted by time: (time [datetime64],
+        data (sat_gse), model, subtr), same order as load_and_trim_data.
+    """
+    import model_store
+    if model_store.is_store(pickle_dir):
+        rows = model_store.read_range(pickle_dir, start_date, end_date)
+        # Copy out of the memory-mapped partitions
+        parts = [tuple(np.array(rows[key])
+                       for key in ('time', 'sat_gse', 'model', 'subtr'))]
+    else:
+        parts = _load_pickle_parts(pickle_dir, start_date, end_date,
+                                   workers, pad_days)
+
+    merged = merge_sorted_series(parts, drop_duplicates=drop_duplicates)
+    if merged is None:
+        return (np.array([], dtype='datetime64[ns]'), np.empty((0, 3)),
+                np.empty((0, 3)), np.empty((0, 3)))
+    return merged
+
+
+def _load_pickle_parts(pickle_dir, start_date, end_date, workers, pad_days):
+    """ Date-pruned, concurrently loaded parts of load_and_trim_arrays. """
+    start = np.datetime64(pd.Timestamp(start_date), 'ns')
+    end = np.datetime64(pd.Timestamp(end_date), 'ns')
+    files = select_pickle_files(pickle_dir, start_date, end_date,
+                                pad_days=pad_days)
+
+    if workers == 1 or len(files) <= 1:
+        return [load_pickle_arrays(path, start, end) for path in files]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(load_pickle_arrays, files,
+                                 [start] * len(files), [end] * len(files)))
+
+
 def load_subtr_data(file_path):
     """
     Load subtraction data from a pickle file.
@@ -214,8 +395,9 @@ def stack_from_data(sc_data):
     :param sc_data: array
     :return: Stacked np array
     """
-    bx, by, bz = sc_data[:, 0], sc_data[:, 1], sc_data[:, 2]
-    b_gse_stacked = np.column_stack((bx, by, bz))
+    # One read of the whole (N, 3) variable instead of one per column; the
+    # fill values are kept (unmasked) for fix_nan_for_goes
+    b_gse_stacked = np.array(np.ma.getdata(sc_data[:, :3]))
     return b_gse_stacked
 
 
@@ -259,6 +441,126 @@ def stack_gk2a_data(sc_data):
     return gk2a_bgse_stacked
 
 
+def _read_unmasked(variable, index):
+    """ Plain ndarray read of a netCDF4 variable, without masking fill
+    values; the variable's own auto-mask setting is restored. """
+    auto_mask = variable.mask
+    variable.set_auto_mask(False)
+    try:
+        return variable[index]
+    finally:
+        variable.set_auto_mask(auto_mask)
+
+
+def time_window_indices(time_variable, start=None, end=None):
+    """
+    Row range [first, stop) of a sorted time variable with
+    start <= time <= end, found by bisection so only a few elements of the
+    variable are read.
+
+    :param time_variable: Sorted 1D netCDF4 variable or array, in the
+    variable's own units.
+    :param start:         Start of the window in the same units (inclusive),
+    or None for the first row.
+    :param end:           End of the window (inclusive), or None.
+    :return: (first, stop) row indices
+    """
+    def searchsorted(value, side):
+        low, high = 0, len(time_variable)
+        while low < high:
+            middle = (low + high) // 2
+            sample = time_variable[middle]
+            if sample < value or (side == 'right' and sample == value):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    first = 0 if start is None else searchsorted(start, 'left')
+    stop = len(time_variable) if end is None else searchsorted(end, 'right')
+    return first, max(first, stop)
+
+
+# Variables that also get the fix_nan_for_goes (< -9998) screen, as
+# process_goes_dataset applies it to the field; other variables (e.g.
+# positions in km) only lose their _FillValue and out-of-range values
+GOES_FILL_HEURISTIC_VARIABLES = ('b_gse',)
+
+
+def _invalid_values(variable, values):
+    """ Mask of the _FillValue and values outside valid_min/valid_max or
+    valid_range of a netCDF4 variable (CF conventions). """
+    invalid = np.zeros(values.shape, dtype=bool)
+    fill_value = getattr(variable, '_FillValue', None)
+    if fill_value is not None:
+        invalid |= values == fill_value
+    valid_min = getattr(variable, 'valid_min', None)
+    valid_max = getattr(variable, 'valid_max', None)
+    valid_range = getattr(variable, 'valid_range', None)
+    if valid_range is not None:
+        valid_min, valid_max = valid_range[0], valid_range[1]
+    if valid_min is not None:
+        invalid |= values < valid_min
+    if valid_max is not None:
+        invalid |= values > valid_max
+    return invalid
+
+
+def read_goes_window(dataset, start=None, end=None, variables=('b_gse',),
+                     time_name='time', raw=False):
+    """
+    Read the samples of a GOES/SOSMAG L2 NetCDF file in a time window.
+
+    The window is located with a binary search on the time variable and each
+    variable is read with a single hyperslab read of just those rows, so a
+    sub-day window of an aggregated multi-month file never loads the whole
+    file. The arrays are returned as read (no column stacking or copies).
+
+    :param dataset:   Path of the NetCDF file, or an open netCDF4.Dataset.
+    :param start:     Start of the window (inclusive), anything pd.Timestamp
+    accepts, or None for the start of the file.
+    :param end:       End of the window (inclusive), or None.
+    :param variables: Names of the variables to read (default ('b_gse',)).
+    :param time_name: Name of the time variable (default 'time', seconds
+    since J2000 for GOES L2).
+    :param raw:       Return the stored values, fill values included. By
+    default the _FillValue and values outside valid_min/valid_max or
+    valid_range of float variables are replaced with NaN (and values below
+    -9998 of GOES_FILL_HEURISTIC_VARIABLES, as process_goes_dataset).
+    :return: (time, data). time is a datetime64[ns] array of the window and
+    data a dict of variable name -> numpy array
+    """
+    import netCDF4 as nc
+    if not isinstance(dataset, nc.Dataset):
+        with nc.Dataset(dataset) as opened:
+            return read_goes_window(opened, start, end, variables=variables,
+                                    time_name=time_name, raw=raw)
+
+    time_variable = dataset[time_name]
+    step, epoch = tsu.parse_time_units(time_variable.units)
+
+    def to_units(value):
+        if value is None:
+            return None
+        return (np.datetime64(pd.Timestamp(value), 'ns') - epoch) / step
+
+    first, stop = time_window_indices(time_variable, to_units(start),
+                                      to_units(end))
+    time = tsu.cf_to_datetime64(
+        _read_unmasked(time_variable, slice(first, stop)), time_variable.units)
+
+    data = {}
+    for name in variables:
+        variable = dataset[name]
+        values = _read_unmasked(variable, slice(first, stop))
+        if not raw and values.dtype.kind == 'f':
+            values[_invalid_values(variable, values)] = np.nan
+            if name in GOES_FILL_HEURISTIC_VARIABLES:
+                fix_nan_for_goes(values)
+        data[name] = values
+    return time, data
+
+
 def goes_epoch_to_datetime(timestamp):
     """
     Converts goes epoch time from .cda into pandas datetime timestamp
@@ -266,6 +568,4 @@ def goes_epoch_to_datetime(timestamp):
     :param timestamp: from .cda file
     :return: pandas datetime timestamp
     """
-    epoch = pd.to_datetime('2000-01-01 12:00:00')
-    time_datetime = epoch + pd.to_timedelta(timestamp, unit='s')
-    return time_datetime
+    return tsu.j2000_to_timestamp(timestamp)
@@ -7,8 +7,9 @@ matplotlib.rcParams.update({'font.size': 10})
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib import gridspec
-from datetime import datetime, timedelta
+from datetime import timedelta
 from utils import format_units, mkticks
+import timestamp_utils as tsu
 
 datafile = 'C:/Users/sarah.auriemma/Desktop/Data_new/gk2a/pd/gk2a_ksem_pd_e_1m_le1_20240510.nc'
 # datafile = 'C:/Users/sarah.auriemma/Desktop/Data_new/gk2a
@@ -45,8 +46,8 @@ ic(ksem_variables)
 ic(gk2a_ksem_pd_e_1m_dataset['E2_QEF'][:])
 times = gk2a_ksem_pd_e_1m_dataset['Time_Tag']
 # ic(times)
-epoch = datetime(2000, 1, 1, 12, 0)  # Epoch is January 1, 2000, at 12:00 PM
-dt = np.array([epoch + timedelta(seconds=int(t)) for t in times])
+# Whole seconds since J2000 (January 1, 2000, at 12:00 PM)
+dt = tsu.j2000_to_posix(np.trunc(times[:]))
 date_str = dt[0].strftime("%Y/%m/%d")
 
 start_date, end_date = min(dt), max(dt)
@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+"""
+Count, mean, std, min, max and quantiles of time series in calendar bins.
+
+grouped_stats bins the data for several resolutions at once (e.g. hourly,
+daily and monthly) without building DataFrames. Times are converted to int64
+nanoseconds and sorted once, so every bin is a contiguous run of samples and
+the moments are np.add/np.fmin/np.fmax.reduceat reductions over run
+boundaries. The finest resolution is computed from the samples; coarser
+resolutions whose bins are unions of finer bins are combined from the finer
+bins' count, mean and sum of squared deviations (Chan et al.) instead of
+passing over the samples again. Quantiles need the samples: they are
+sorted by value once per component, then by bin and value rank (an int64
+sort) for each resolution.
+
+Bins are the fixed-width epoch-aligned bins pandas' resample uses ('10min',
+'H', 'D', ...) or calendar months ('M'/'MS'), labelled by their start time.
+The output covers every bin from the first to the last sample, with count 0
+and NaN statistics for bins without valid samples, like resample().
+"""
+
+STATS = ('count', 'mean', 'std', 'min', 'max')
+DEFAULT_FREQS = ('H', 'D', 'M')
+MONTH = 'month'
+
+
+def _bin_width(freq):
+    """ Bin width in ns for fixed-width frequencies, MONTH for months. """
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return offset.nanos
+    if isinstance(offset, (pd.offsets.MonthBegin, pd.offsets.MonthEnd)) and \
+            offset.n == 1:
+        return MONTH
+    raise ValueError(f"Unsupported frequency {freq!r}: use a fixed width "
+                     f"such as '10min', 'H', 'D', or 'M' for months")
+
+
+def _bin_codes(ns, width):
+    """ Bin number of int64 ns times (epoch-aligned, floor). """
+    if width == MONTH:
+        return ns.view('datetime64[ns]').astype('datetime64[M]').astype(
+            np.int64)
+    return ns // width
+
+
+def _bin_starts(first, last, width):
+    codes = np.arange(first, last + 1)
+    if width == MONTH:
+        return codes.astype('datetime64[M]').astype('datetime64[ns]')
+    return (codes * width).view('datetime64[ns]')
+
+
+def quantile_key(q):
+    """ Result key of quantile q, e.g. 0.95 -> 'q0.95'. """
+    return f'q{q:g}'
+
+
+def _moments(values, valid, starts):
+    """ Count, mean, sum of squared deviations, min and max of the runs
+    values[starts[i]:starts[i + 1]], per column. """
+    count = np.add.reduceat(valid, starts, axis=0).astype(np.int64)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.add.reduceat(filled, starts, axis=0) / count
+    deviation = np.where(valid, values - np.repeat(
+        mean, np.diff(np.append(starts, len(values))), axis=0), 0.0)
+    m2 = np.add.reduceat(deviation ** 2, starts, axis=0)
+    masked = np.where(valid, values, np.nan)
+    minimum = np.fmin.reduceat(masked, starts, axis=0)
+    maximum = np.fmax.reduceat(masked, starts, axis=0)
+    return count, mean, m2, minimum, maximum
+
+
+def _combine(moments, starts):
+    """ Moments of the groups moments[starts[i]:starts[i + 1]]. """
+    count, mean, m2, minimum, maximum = moments
+    total = np.add.reduceat(count, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted = np.where(count > 0, mean * count, 0.0)
+        combined_mean = np.add.reduceat(weighted, starts, axis=0) / total
+        lengths = np.diff(np.append(starts, len(count)))
+        spread = np.where(count > 0, count * (
+            mean - np.repeat(combined_mean, lengths, axis=0)) ** 2, 0.0)
+    combined_m2 = np.add.reduceat(m2 + spread, starts, axis=0)
+    return (total, combined_mean, combined_m2,
+            np.fmin.reduceat(minimum, starts, axis=0),
+            np.fmax.reduceat(maximum, starts, axis=0))
+
+
+def _value_orders(values, valid):
+    """ Per column, the sample order by value with invalid samples last. """
+    return [np.argsort(np.where(valid[:, column], values[:, column], np.inf),
+                       kind='stable') for column in range(values.shape[1])]
+
+
+def _quantiles(values, valid, value_orders, codes, starts, quantiles):
+    """ Linear-interpolation quantiles (as np.quantile) per run of equal
+    codes starting at starts, per column. Sorting the int64 key bin * N +
+    value rank puts every bin's samples in value order. Returns an array
+    (len(quantiles), n_runs, n_cols). """
+    n_samples = len(values)
+    result = np.full((len(quantiles), len(starts), values.shape[1]), np.nan)
+    bins = (codes - codes[0]) * n_samples
+    for column, by_value in enumerate(value_orders):
+        rank = np.empty(n_samples, dtype=np.int64)
+        rank[by_value] = np.arange(n_samples)
+        keys = np.sort(bins + rank)
+        ordered = values[by_value[keys % n_samples], column]
+        count = np.add.reduceat(valid[:, column], starts)
+        has_data = count > 0
+        for i, q in enumerate(quantiles):
+            position = q * (count - 1)
+            below = np.floor(position).astype(np.int64)
+            above = np.minimum(below + 1, count - 1)
+            fraction = position - below
+            low = ordered[np.where(has_data, starts + below, 0)]
+            high = ordered[np.where(has_data, starts + above, 0)]
+            result[i, :, column] = np.where(
+                has_data, low + (high - low) * fraction, np.nan)
+    return result
+
+
+def grouped_stats(times, values, freqs=DEFAULT_FREQS, mask=None,
+                  quantiles=(), ddof=1):
+    """
+    Statistics of values in time bins for one or more resolutions.
+
+    :param times:  Sample times (datetime objects or datetime64), any order.
+    :param values: Array (N) or (N, components), e.g. the (N, 3) model
+    subtraction. NaN values are skipped.
+    :param freqs:  Bin frequencies (default hourly, daily and monthly).
+    :param mask:   Optional boolean array (N), True for samples to leave out
+    (e.g. the Kp mask). Masked samples still define the range of bins.
+    :param quantiles: Quantiles in [0, 1] to compute, e.g. (0.5, 0.95).
+    :param ddof:   Delta degrees of freedom of the std (default 1, as
+    pandas). Bins with count <= ddof have a NaN std.
+    :return: dict of freq -> dict with 'time' (bin starts, datetime64[ns]),
+    'count', 'mean', 'std', 'min', 'max' and quantile_key(q) for each
+    quantile, each of shape (bins) or (bins, components)
+    """
+    ns = pd.DatetimeIndex(times).to_numpy(dtype='datetime64[ns]').view(
+        np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) != len(ns):
+        raise ValueError(f"{len(ns)} times but {len(values)} values")
+    one_d = values.ndim == 1
+    values = values[:, None] if one_d else values.reshape(len(values), -1)
+    valid = ~np.isnan(values)
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != ns.shape:
+            raise ValueError(f"mask has shape {mask.shape}, expected "
+                             f"{ns.shape}")
+        valid &= ~mask[:, None]
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError(f"Quantiles must be in [0, 1], got {quantiles}")
+
+    if np.any(ns[1:] < ns[:-1]):
+        order = np.argsort(ns, kind='stable')
+        ns, values, valid = ns[order], values[order], valid[order]
+
+    widths = {freq: _bin_width(freq) for freq in freqs}
+    # Finest first: months are wider than any fixed width up to 28 days
+    by_width = sorted(freqs, key=lambda f: 28 * 86400 * 10 ** 9
+                      if widths[f] == MONTH else widths[f])
+
+    value_orders = _value_orders(values, valid) if quantiles else None
+    results = {}
+    finer = None
+    for freq in by_width:
+        width = widths[freq]
+        result = {}
+        if not len(ns):
+            result['time'] = np.array([], dtype='datetime64[ns]')
+            for key in STATS + tuple(quantile_key(q) for q in quantiles):
+                result[key] = np.empty((0,) + values.shape[1:],
+                                       dtype=np.int64 if key == 'count'
+                                       else np.float64)
+            results[freq] = result
+            continue
+
+        codes = _bin_codes(ns, width)
+        run_starts = np.flatnonzero(np.diff(codes, prepend=codes[0] - 1))
+        run_codes = codes[run_starts]
+        nested = False
+        if finer is not None:
+            # Each finer bin must fall inside one bin of this resolution
+            finer_first, finer_last, finer_moments = finer
+            nested = np.array_equal(_bin_codes(finer_first, width),
+                                    _bin_codes(finer_last, width))
+        if nested:
+            group_codes = _bin_codes(finer_first, width)
+            group_starts = np.flatnonzero(
+                np.diff(group_codes, prepend=group_codes[0] - 1))
+            moments = _combine(finer_moments, group_starts)
+        else:
+            moments = _moments(values, valid, run_starts)
+        run_ends = np.append(run_starts[1:], len(ns)) - 1
+        finer = (ns[run_starts], ns[run_ends], moments)
+
+        count, mean, m2, minimum, maximum = moments
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(count > ddof, np.sqrt(m2 / (count - ddof)), np.nan)
+        per_run = {'count': count, 'mean': mean, 'std': std, 'min': minimum,
+                   'max': maximum}
+        if quantiles:
+            for q, column in zip(quantiles, _quantiles(
+                    values, valid, value_orders, codes, run_starts,
+                    quantiles)):
+                per_run[quantile_key(q)] = column
+
+        # Scatter the runs onto every bin between the first and last sample
+        n_bins = run_codes[-1] - run_codes[0] + 1
+        bins = run_codes - run_codes[0]
+        result['time'] = _bin_starts(run_codes[0], run_codes[-1], width)
+        for key, column in per_run.items():
+            fill = 0 if key == 'count' else np.nan
+            dense = np.full((n_bins,) + column.shape[1:], fill,
+                            dtype=column.dtype)
+            dense[bins] = column
+            result[key] = dense
+        results[freq] = result
+
+    if one_d:
+        for result in results.values():
+            for key, column in result.items():
+                if key != 'time':
+                    result[key] = column[:, 0]
+    return {freq: results[freq] for freq in freqs}
+
+
+def to_frame(result):
+    """ DataFrame (indexed by bin start) of one resolution of grouped_stats
+    output; component statistics get columns like ('std', 0). """
+    index = pd.DatetimeIndex(result['time'], name='time')
+    columns = {}
+    for key, column in result.items():
+        if key == 'time':
+            continue
+        if column.ndim == 1:
+            columns[key] = column
+        else:
+            for component in range(column.shape[1]):
+                columns[(key, component)] = column[:, component]
+    return pd.DataFrame(columns, index=index)
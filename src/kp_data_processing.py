@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import pickle
 
+import grouped_stats
+
 
 def readKpData(csv_file):
     """
@@ -121,6 +123,69 @@ def createkpMask(dfkp, datetime_list, max_kp=2):
     return kp_mask
 
 
+def create_kp_mask_array(dfkp, datetimes, max_kp=2,
+                         window=np.timedelta64(180, 'm')):
+    """
+    Array version of createkpMask: mask the data in the window following
+    each Kp value greater than max_kp.
+
+    Both time axes are converted to datetime64, the start and end of every
+    window are located with searchsorted, and the mask is built from a
+    cumulative sum of +1/-1 window edges, so the cost is O((N + M) log N)
+    instead of O(N * M). Windows are defined in time rather than as a number
+    of samples, so Kp timestamps missing from the data grid (or gaps in the
+    data) still mask the data that falls inside their window. On a gap-free
+    1-minute grid the result equals createkpMask.
+
+    Args:
+        dfkp (pd.DataFrame): DataFrame with 'Time' and 'Kp' columns.
+        datetimes (list or array-like): Datetime values of the data.
+        max_kp (float): Maximum Kp value for filtering (default: 2).
+        window: Length of the masked window after each Kp timestamp, as
+            anything pd.Timedelta accepts (default: 180 minutes, the Kp
+            cadence).
+
+    Returns:
+        np.ndarray: Boolean mask, True where Kp is over max_kp.
+    """
+    times = pd.DatetimeIndex(datetimes).to_numpy(dtype='datetime64[ns]')
+    window = pd.Timedelta(window).to_timedelta64()
+
+    # searchsorted needs sorted times; undo the sort at the end if needed
+    order = None
+    if np.any(times[1:] < times[:-1]):
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+
+    over = dfkp['Kp'].to_numpy() > max_kp
+    kp_times = pd.DatetimeIndex(dfkp['Time']).to_numpy(
+        dtype='datetime64[ns]')[over]
+
+    starts = np.searchsorted(times, kp_times, side='left')
+    stops = np.searchsorted(times, kp_times + window, side='left')
+
+    n_times = len(times)
+    edges = np.bincount(starts, minlength=n_times + 1) - \
+        np.bincount(stops, minlength=n_times + 1)
+    mask = np.cumsum(edges[:n_times]) > 0
+
+    if order is not None:
+        unsorted = np.empty_like(mask)
+        unsorted[order] = mask
+        mask = unsorted
+    return mask
+
+
+def _stddev_series(datetime_list, subtr_list, kp_mask, freq):
+    """ pd.Series of the std of subtr_list in freq bins, as
+    resample(freq).std() of the Kp-masked data. """
+    stats = grouped_stats.grouped_stats(datetime_list, subtr_list,
+                                        freqs=(freq,), mask=kp_mask)[freq]
+    return pd.Series(stats['std'], name='subtraction',
+                     index=pd.DatetimeIndex(stats['time'], freq=freq,
+                                            name='datetime'))
+
+
 def calc_hourly_stddev(datetime_list, subtr_list, kp_mask=None):
     """
     Calculate hourly standard deviation of subtraction data with an optional
@@ -131,24 +196,13 @@ def calc_hourly_stddev(datetime_list, subtr_list, kp_mask=None):
         subtr_list (list): List of subtraction data.
         kp_mask (list, optional): List of boolean values indicating Kp
         values over threshold.
-                                  If provided, only data points where
-                                  kp_mask is True will be used.
+                                  If provided, data points where kp_mask
+                                  is True are left out.
 
     Returns:
         pd.Series: Hourly standard deviation of subtraction data.
     """
-    # Create a pandas DataFrame with datetime as the index
-    df = pd.DataFrame({'datetime': datetime_list, 'subtraction': subtr_list})
-    df.set_index('datetime', inplace=True)
-
-    # Apply the Kp mask if provided
-    if kp_mask is not None:
-        df['subtraction'] = df['subtraction'].mask(kp_mask)
-
-    # Resample the data to hourly frequency and calculate standard deviation
-    hourly_std_dev = df['subtraction'].resample('H').std()
-
-    return hourly_std_dev
+    return _stddev_series(datetime_list, subtr_list, kp_mask, 'H')
 
 
 def calc_daily_stddev(datetime_list, subtr_list, kp_mask=None):
@@ -161,24 +215,13 @@ def calc_daily_stddev(datetime_list, subtr_list, kp_mask=None):
         subtr_list (list): List of subtraction data.
         kp_mask (list, optional): List of boolean values indicating Kp
         values over threshold.
-                                  If provided, only data points where
-                                  kp_mask is True will be used.
+                                  If provided, data points where kp_mask
+                                  is True are left out.
 
     Returns:
         pd.Series: daily standard deviation of subtraction data.
     """
-    # Create a pandas DataFrame with datetime as the index
-    df = pd.DataFrame({'datetime': datetime_list, 'subtraction': subtr_list})
-    df.set_index('datetime', inplace=True)
-
-    # Apply the Kp mask if provided
-    if kp_mask is not None:
-        df['subtraction'] = df['subtraction'].mask(kp_mask)
-
-    # Resample the data to hourly frequency and calculate standard deviation
-    daily_std_dev = df['subtraction'].resample('D').std()
-
-    return daily_std_dev
+    return _stddev_series(datetime_list, subtr_list, kp_mask, 'D')
 
 
 def mean_std_dev(stddev):
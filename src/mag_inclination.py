@@ -7,20 +7,10 @@ import netCDF4 as nc
 import pandas as pd
 import datetime as dtm
 import os
-from cdasws import CdasWs
-from cdasws.datarepresentation import DataRepresentation
 from utils import find_data_errors, fix_data_error_with_nan
-from cdasws.datarepresentation import DataRepresentation as dr
-
-cdas = CdasWs()
-if not "CDF_LIB" in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
-from spacepy import pycdf
-import spacepy.coordinates as spc
-import spacepy.time as spt
+import timestamp_utils as tsu
+from cdaweb import configure_cdf_env
+import omni_store
 
 
 def load_pickle_file(file_path):
@@ -57,6 +47,10 @@ def stack_from_data(sc_data):
 
 
 def gse_to_geo(b_gse_stacked, time):
+    configure_cdf_env()
+    import spacepy.coordinates as spc
+    import spacepy.time as spt
+
     time = time.to_pydatetime()
 
     # Need to create ticks from spacepy.time for unit conversion:
@@ -167,7 +161,7 @@ def rhenp_to_vdh(dt, geo_lat, geo_lon, rhenp, mats=None):
     assert (np.shape(geo_lat) == (n_points,))
     assert (np.shape(geo_lon) == (n_points,))
 
-    output = np.full((n_points, 3), np.nan, dtype=np.float)
+    output = np.full((n_points, 3), np.nan, dtype=float)
 
     mats = rhenp_to_vdh_mats(dt, geo_lat, geo_lon)
 
@@ -328,9 +322,7 @@ def goes_epoch_to_datetime(timestamp):
     :param timestamp: from .cda file
     :return: pandas datetime timestamp
     """
-    epoch = pd.to_datetime('2000-01-01 12:00:00')
-    time_datetime = epoch + pd.to_timedelta(timestamp, unit='s')
-    return time_datetime
+    return tsu.j2000_to_timestamp(timestamp)
 
 
 def plot_magnetic_inclination_over_time(goes_time, goes_data, gk2a_data,
@@ -457,16 +449,20 @@ def plot_BGSE_fromdata_ontop(timedataset, date_str, spacecraft_data_dict):
     # get symh data via cdasWs omni dataset
     ic(date_str)
     ic(type(date_str))
-    data = cdas.get_data('OMNI_HRO_1MIN', 'SYM_H', f'{date_str}T00:00:00Z',
-                         f'{date_str}T23:59:00Z',
-                         dataRepresentation=dr.XARRAY)[1]
-    if data:
-        ic(data)
-        sym_h = data.SYM_H.values
-    else:
+    try:
+        sym_h = omni_store.get_data('SYM_H', f'{date_str}T00:00:00Z',
+                                    f'{date_str}T23:59:00Z',
+                                    fill_nan=True)['SYM_H']
+    except LookupError as error:
+        # Offline and not in the local OMNI store
+        ic(error)
+        sym_h = None
+    if sym_h is None or np.isnan(sym_h).all():
         ic('No data')
         sym_h = np.full(len(timedataset), np.nan)
         ic(sym_h)
+    else:
+        ic(sym_h)
 
     # Plot the SYM-H data on the last subplot
     axs[-1].plot(timedataset, sym_h, label='SYM-H', linewidth=1)
@@ -517,69 +513,70 @@ def plot_BGSE_fromdata_ontopBZONLY(timedataset, date_str, spacecraft_data_dict):
 
 
 ##################################
-g16_dataset = nc.Dataset(
-    'C:/Users/sarah.auriemma/Desktop/Data_new/g16/mag_1m/2024_05/dn_magn-l2-avg1m_g16_d20240510_v2-0-2.nc')
-gk2a_dataset = nc.Dataset('C:/Users/sarah.auriemma/Desktop/Data_new/gk2a/getsosmag/SOSMAG_20240510_b_gse.nc')
-goes18_dataset = nc.Dataset(
-    'C:/Users/sarah.auriemma/Desktop/Data_new/g18/mag_1m/2024_05/dn_magn-l2-avg1m_g18_d20240510_v2-0-2.nc')
-# goes17coloc_dataset = nc.Dataset(
-#     'C:/Users/sarah.auriemma/Desktop/Data_new/g17/mag_1m/2023_02/dn_magn-l2'
-#     '-avg1m_g17_d20230226_v2-0-2.nc')
-# gk2a_dataset = nc.Dataset('Z:/Data/GK2A/SOSMAG_20230226_b_gse.nc')
-
-
-goes_time_fromnc = goes_epoch_to_datetime(goes18_dataset['time'][:])
-
-goes18_bgse_stacked = stack_from_data(goes18_dataset['b_gse'])
-goes18_bgse_stacked = fix_nan_for_goes(goes18_bgse_stacked)
-
-# goes17_bgse_stacked = stack_from_data(goes17coloc_dataset['b_gse'])
-# goes17_bgse_stacked = fix_nan_for_goes(goes17_bgse_stacked)
-
-goes16_bgse_stacked = stack_from_data(g16_dataset['b_gse'])
-goes16_bgse_stacked = fix_nan_for_goes(goes16_bgse_stacked)
-
-gk2a_bgse_stacked = np.column_stack((gk2a_dataset['b_xgse'][:],
-                                     gk2a_dataset['b_ygse'][:],
-                                     gk2a_dataset['b_zgse'][:]))
-date_str = dtm.datetime.strftime(goes_time_fromnc[0], '%Y-%m-%d')
-
-# plot_BGSE_fromdata(goes17_bgse_stacked, 'goes17')
-# plot_BGSE_fromdata(goes18_bgse_stacked, 'goes18')
-
-
-# GOES17, red
-# GOES18, orange
-# SOSMAG, blue
-# G16, green
-
-spacecraft_data = {
-    # 'G17': goes17_bgse_stacked,
-    'G16': goes16_bgse_stacked,
-    'GK2A': gk2a_bgse_stacked,
-    'G18': goes18_bgse_stacked
-}
-plot_BGSE_fromdata_ontopBZONLY(timedataset=goes_time_fromnc, date_str=date_str,
-                               spacecraft_data_dict=spacecraft_data)
-plot_BGSE_fromdata_ontop(timedataset=goes_time_fromnc, date_str=date_str,
-                         spacecraft_data_dict=spacecraft_data)
-
-# goes17_VDH = gse_to_vdh(goes17_bgse_stacked, goes_time_fromnc)
-goes18_VDH = gse_to_vdh(goes18_bgse_stacked, goes_time_fromnc)
-gk2a_VDH = gse_to_vdh(gk2a_bgse_stacked, goes_time_fromnc)
-goes16_VDH = gse_to_vdh(goes16_bgse_stacked, goes_time_fromnc)
-
-VDH_Datasets = {
-    # 'G17': goes17_VDH,
-    'G18': goes18_VDH,
-    'G16': goes16_VDH,
-    'GK2A': gk2a_VDH
-}
-
-plot_magnetic_inclination_over_time_3sc(goes_time_fromnc, date_str,
-                                        VDH_Datasets)
-
-# save_pickle_path = f'C:/Users/sarah.auriemma/Desktop/Data_new/VDH_{
-# date_str}.pickle'
-# with open(save_pickle_path, 'wb') as f:
-#     pickle.dump(VDH_Datasets, f)
+if __name__ == '__main__':
+    g16_dataset = nc.Dataset(
+        'C:/Users/sarah.auriemma/Desktop/Data_new/g16/mag_1m/2024_05/dn_magn-l2-avg1m_g16_d20240510_v2-0-2.nc')
+    gk2a_dataset = nc.Dataset('C:/Users/sarah.auriemma/Desktop/Data_new/gk2a/getsosmag/SOSMAG_20240510_b_gse.nc')
+    goes18_dataset = nc.Dataset(
+        'C:/Users/sarah.auriemma/Desktop/Data_new/g18/mag_1m/2024_05/dn_magn-l2-avg1m_g18_d20240510_v2-0-2.nc')
+    # goes17coloc_dataset = nc.Dataset(
+    #     'C:/Users/sarah.auriemma/Desktop/Data_new/g17/mag_1m/2023_02/dn_magn-l2'
+    #     '-avg1m_g17_d20230226_v2-0-2.nc')
+    # gk2a_dataset = nc.Dataset('Z:/Data/GK2A/SOSMAG_20230226_b_gse.nc')
+
+
+    goes_time_fromnc = goes_epoch_to_datetime(goes18_dataset['time'][:])
+
+    goes18_bgse_stacked = stack_from_data(goes18_dataset['b_gse'])
+    goes18_bgse_stacked = fix_nan_for_goes(goes18_bgse_stacked)
+
+    # goes17_bgse_stacked = stack_from_data(goes17coloc_dataset['b_gse'])
+    # goes17_bgse_stacked = fix_nan_for_goes(goes17_bgse_stacked)
+
+    goes16_bgse_stacked = stack_from_data(g16_dataset['b_gse'])
+    goes16_bgse_stacked = fix_nan_for_goes(goes16_bgse_stacked)
+
+    gk2a_bgse_stacked = np.column_stack((gk2a_dataset['b_xgse'][:],
+                                         gk2a_dataset['b_ygse'][:],
+                                         gk2a_dataset['b_zgse'][:]))
+    date_str = dtm.datetime.strftime(goes_time_fromnc[0], '%Y-%m-%d')
+
+    # plot_BGSE_fromdata(goes17_bgse_stacked, 'goes17')
+    # plot_BGSE_fromdata(goes18_bgse_stacked, 'goes18')
+
+
+    # GOES17, red
+    # GOES18, orange
+    # SOSMAG, blue
+    # G16, green
+
+    spacecraft_data = {
+        # 'G17': goes17_bgse_stacked,
+        'G16': goes16_bgse_stacked,
+        'GK2A': gk2a_bgse_stacked,
+        'G18': goes18_bgse_stacked
+    }
+    plot_BGSE_fromdata_ontopBZONLY(timedataset=goes_time_fromnc, date_str=date_str,
+                                   spacecraft_data_dict=spacecraft_data)
+    plot_BGSE_fromdata_ontop(timedataset=goes_time_fromnc, date_str=date_str,
+                             spacecraft_data_dict=spacecraft_data)
+
+    # goes17_VDH = gse_to_vdh(goes17_bgse_stacked, goes_time_fromnc)
+    goes18_VDH = gse_to_vdh(goes18_bgse_stacked, goes_time_fromnc)
+    gk2a_VDH = gse_to_vdh(gk2a_bgse_stacked, goes_time_fromnc)
+    goes16_VDH = gse_to_vdh(goes16_bgse_stacked, goes_time_fromnc)
+
+    VDH_Datasets = {
+        # 'G17': goes17_VDH,
+        'G18': goes18_VDH,
+        'G16': goes16_VDH,
+        'GK2A': gk2a_VDH
+    }
+
+    plot_magnetic_inclination_over_time_3sc(goes_time_fromnc, date_str,
+                                            VDH_Datasets)
+
+    # save_pickle_path = f'C:/Users/sarah.auriemma/Desktop/Data_new/VDH_{
+    # date_str}.pickle'
+    # with open(save_pickle_path, 'wb') as f:
+    #     pickle.dump(VDH_Datasets, f)
@@ -1,27 +1,39 @@
 import json
 import logging
 import datetime
-from netCDF4 import num2date
 import netCDF4 as nc
 import numpy as np
 from datetime import datetime
 from icecream import ic
 import os
-from cdasws import CdasWs
-from plotting.mploc_plotting import make_mpause_plots
-from DSCOVR_prop.dscovr_propagation import propagate_parameters
-
-if not "CDF_LIB" in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
-
-cdas = CdasWs()
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import data_loader
+import omni_store
+import timestamp_utils as tsu
+import utils
 
 """Constants"""
 TIME_UNITS = "seconds since 2000-01-01 12:00:00"
 GEOSTAT_re = 6.6  # geostationary orbit - Re
+# Solar wind drivers onto the satellite time axis: interpolation method
+# (utils.RESAMPLE_METHODS) and largest data gap to bridge; config keys
+# 'sw_resample_method' and 'sw_max_gap' override these
+SW_RESAMPLE_METHOD = 'linear'
+SW_MAX_GAP = '5min'
+SATELLITE_KEYS = ('g16', 'g17', 'g18')
+# Hyperslabs read from the magnetometer and MPS-LO files (see read_nc_data).
+# Of the moment cubes only energy range 0 and the density, T_parallel and
+# T_perp moments are used (extract_moment_data)
+NC_READ_SPEC = {
+    'time': np.s_[:],
+    'b_gsm': np.s_[:],
+    'b_epn': np.s_[:],
+    'EleMoments': np.s_[:, 0:1, 0:3],
+    'IonMoments': np.s_[:, 0:1, 0:3],
+}
+# What calculate_flags needs: b_gsm is only plotted
+FLAG_READ_SPEC = {name: index for name, index in NC_READ_SPEC.items() if name != 'b_gsm'}
 """/Constants"""
 
 logging.basicConfig(level=logging.INFO)
@@ -38,17 +50,11 @@ def convert_to_datetime(time_array, units):
                    e.g., "seconds since 2000-01-01 12:00:00".
 
     Returns:
-    - np.ndarray: An array of datetime.datetime objects.
+    - list: datetime.datetime objects, truncated to whole seconds.
     """
-    # Convert numeric time values to datetime objects
-    cftime_array = num2date(time_array, units)
-
-    # Convert cftime.datetime objects to standard datetime.datetime objects
-    datetime_array = [
-        datetime(cf.year, cf.month, cf.day, cf.hour, cf.minute, cf.second) for
-        cf in cftime_array]
-
-    return datetime_array
+    # Whole seconds, as before with num2date and the cftime fields
+    times = tsu.cf_to_datetime64(time_array, units)
+    return times.astype('datetime64[s]').tolist()
 
 
 def get_omni_values(start_datetime, end_datetime):
@@ -62,22 +68,11 @@ def get_omni_values(start_datetime, end_datetime):
     Returns:
         dict: A dictionary containing arrays for BZ_GSM, Pressure, and Speed.
     """
-    # Formatting the start and end times to string
-    start_time_str = start_datetime.strftime('%Y-%m-%dT%H:%M:00Z')
-    end_time_str = end_datetime.strftime('%Y-%m-%dT%H:%M:00Z')
-
-    cdas = CdasWs()
-
-    # ic(cdas.get_variable_names('OMNI_HRO_1MIN'))
-
-    # Fetch data from the OMNI dataset
-    data = cdas.get_data(
-        'OMNI_HRO_1MIN',
-        ['BZ_GSM', 'flow_speed', 'proton_density'],
-        start_time_str,
-        end_time_str)
-
-    response_metadata, actual_data = data
+    # Served from the local OMNI store; only spans not fetched before go
+    # to CDAWeb
+    actual_data = omni_store.get_data(
+        ['BZ_GSM', 'flow_speed', 'proton_density'], start_datetime,
+        end_datetime)
 
     if 'BZ_GSM' in actual_data:
         actual_data['BZ_GSM'] = np.where(actual_data['BZ_GSM'] >= 9999, np.nan, actual_data['BZ_GSM'])
@@ -128,35 +123,44 @@ def load_config(config_path):
     return config
 
 
-def read_nc_data(filepath):
-    with nc.Dataset(filepath, 'r') as dataset:
-        # Check available variables in the file
-        available_vars = dataset.variables.keys()
-        # ic(available_vars)
-        data = {}
-
-
-        # Check if it's a magnetic field file
-        if 'b_gsm' in available_vars:
-            data['b_gsm'] = dataset.variables['b_gsm'][:]
-            data['time'] = dataset.variables['time'][:]
-            data['orbit_llr_geo'] = dataset.variables['orbit_llr_geo'][:]
-            # logger.info(f"Magnetic field data (b_gsm) read from {filepath}")
-
-        if 'b_epn' in available_vars:
-            data['b_epn'] = dataset.variables['b_epn'][:]
-            # logger.info(f"Magnetic field data (b_epn) read from {filepath}")
+def read_nc_data(filepath, spec=None, start=None, end=None):
+    """
+    Read the variables of a GOES magnetometer or MPS-LO NetCDF file given by a read spec.
 
-        # Check if it's a particle moments file
-        if 'EleMoments' in available_vars:
-            data['EleMoments'] = dataset.variables['EleMoments'][:]
-            # logger.info(f"Electron moments data (EleMoments) read from {filepath}")
+    Parameters:
+        filepath (str): NetCDF file path.
+        spec (dict): Variable name -> index (np.s_[...], time first) of the hyperslab to read;
+                     variables the file doesn't have are skipped. Default NC_READ_SPEC.
+        start, end: Optional time window (inclusive, anything pd.Timestamp accepts). The rows
+                    are located by bisection on the file's 'time' variable and replace the
+                    time index of every variable with a time dimension.
 
-        if 'IonMoments' in available_vars:
-            data['IonMoments'] = dataset.variables['IonMoments'][:]
-            # ic(dataset.variables['IonMoments'])
+    Returns:
+        dict: Variable name -> (masked) array of the hyperslab.
+    """
+    spec = NC_READ_SPEC if spec is None else spec
+    with nc.Dataset(filepath, 'r') as dataset:
+        window = None
+        if start is not None or end is not None:
+            if 'time' not in dataset.variables:
+                raise ValueError(f"{filepath} has no time variable for a time window")
+            time_variable = dataset.variables['time']
+            step, epoch = tsu.parse_time_units(time_variable.units)
+            first, stop = data_loader.time_window_indices(
+                time_variable, *[None if value is None else
+                                 (np.datetime64(pd.Timestamp(value), 'ns') - epoch) / step
+                                 for value in (start, end)])
+            window = (time_variable.dimensions[0], slice(first, stop))
 
-            # logger.info(f"Ion moments data (IonMoments) read from {filepath}")
+        data = {}
+        for name, index in spec.items():
+            if name not in dataset.variables:
+                continue
+            variable = dataset.variables[name]
+            index = index if isinstance(index, tuple) else (index,)
+            if window is not None and variable.dimensions[:1] == (window[0],):
+                index = (window[1],) + index[1:]
+            data[name] = variable[index]
 
     return data
 
@@ -268,13 +272,28 @@ def run_shue(sw_bz, sw_pdyn):
     return shue_r0, shue_alpha
 
 
-def process_satellite(config, satellite_key):
+def process_satellite(config, satellite_key, spec=None, start=None, end=None):
+    """
+    Read and process the magnetometer and MPS-LO files of a satellite.
+
+    Parameters:
+        config (dict): Configuration with '<satellite_key>_magn_file' and '_mpsl_file'.
+        satellite_key (str): e.g. 'g16'.
+        spec (dict): Variables to read, see read_nc_data (default NC_READ_SPEC;
+                     FLAG_READ_SPEC for flags without plots).
+        start, end: Optional time window, see read_nc_data.
+
+    Returns:
+        dict: datetime_values, field and ratio arrays; empty if the window has no samples.
+    """
     results = {}
-    magn_data = read_nc_data(config[f'{satellite_key}_magn_file'])
-    mpsl_data = read_nc_data(config[f'{satellite_key}_mpsl_file'])
+    magn_data = read_nc_data(config[f'{satellite_key}_magn_file'], spec, start, end)
+    mpsl_data = read_nc_data(config[f'{satellite_key}_mpsl_file'], spec, start, end)
 
     # Convert time array to datetime
     datetime_values = convert_to_datetime(magn_data['time'], units=TIME_UNITS)
+    if not datetime_values:
+        return results
     results['start_datetime'] = datetime_values[0]
     results['end_datetime'] = datetime_values[-1]
 
@@ -301,6 +320,29 @@ def process_satellite(config, satellite_key):
     return results
 
 
+def align_drivers(sw_data, sw_dyn_p, datetime_values, method=SW_RESAMPLE_METHOD,
+                  max_gap=SW_MAX_GAP):
+    """
+    Resample the solar wind drivers of the Shue model onto a satellite's time axis.
+
+    Parameters:
+        sw_data (dict): OMNI or DSCOVR-propagated solar wind data with 'Epoch' and 'BZ_GSM'.
+        sw_dyn_p (np.ndarray): Solar wind dynamic pressure on the 'Epoch' grid.
+        datetime_values (list): Satellite sample times.
+        method (str): 'nearest', 'linear' or 'previous' (hold last value), see
+                      utils.resample_to_times.
+        max_gap: Largest driver data gap to bridge (timedelta-like, or seconds);
+                 samples farther from valid driver data are NaN.
+
+    Returns:
+        tuple: (sw_bz, sw_pdyn) arrays with one value per satellite sample.
+    """
+    drivers = utils.resample_to_times(
+        sw_data['Epoch'], np.column_stack((sw_data['BZ_GSM'], sw_dyn_p)),
+        datetime_values, method=method, max_gap=max_gap)
+    return drivers[:, 0], drivers[:, 1]
+
+
 def calculate_flags(shue_r0, ion_ratios, electron_ratios, b_epn):
     """
     Calculate various flags based on provided conditions.
@@ -358,48 +400,141 @@ def rename_propagated_data_keys(propagated_data):
     return renamed_data
 
 
-def main(config_path):
-    config = load_config(config_path)
-    results = {}
-    satellite_keys = ['g16', 'g17', 'g18']  # List of possible satellites
-
-    # Process available satellite data
-    for key in satellite_keys:
-        if f'{key}_magn_file' in config:
-            results[key] = process_satellite(config, key)
-            if not results[key]:
-                logger.warning(f"No data available for {key.upper()}.")
-
-    # Determine the common datetime range for OMNI data fetch
-    all_dates = [res['datetime_values'] for res in results.values() if res]
-    if not all_dates:
-        logger.error("No satellite data available.")
-        return
+def read_time_range(magn_file, start=None, end=None):
+    """
+    First and last sample time of a magnetometer file, reading only those two time values.
+
+    Parameters:
+        start, end: Optional time window, see read_nc_data.
 
-    start_datetime = max([dates[0] for dates in all_dates])
-    end_datetime = min([dates[-1] for dates in all_dates])
+    Returns:
+        tuple: (start_datetime, end_datetime), as process_satellite's 'start_datetime' and
+        'end_datetime'; None if the window has no samples.
+    """
+    with nc.Dataset(magn_file, 'r') as dataset:
+        time = dataset.variables['time']
+        first, stop = 0, len(time)
+        if start is not None or end is not None:
+            step, epoch = tsu.parse_time_units(time.units)
+            first, stop = data_loader.time_window_indices(
+                time, *[None if value is None else
+                        (np.datetime64(pd.Timestamp(value), 'ns') - epoch) / step
+                        for value in (start, end)])
+        if first == stop:
+            return None
+        first_last = np.array([time[first], time[stop - 1]])
+    start_datetime, end_datetime = convert_to_datetime(first_last, units=TIME_UNITS)
+    return start_datetime, end_datetime
+
+
+def get_solar_wind_data(config, config_path, start_datetime, end_datetime):
+    """
+    Solar wind drivers from the DSCOVR propagation or OMNI, as selected by the config.
 
+    Returns:
+        tuple: (sw_data, sw_data_via)
+    """
     if config.get('use_dscovr_propagation', False):
         ic('Getting SW data via DSCOVR Propagation')
+        from DSCOVR_prop.dscovr_propagation import propagate_parameters
         propagated_data = propagate_parameters(config_path=config_path)
-        sw_data = rename_propagated_data_keys(propagated_data)
-        sw_data_via = 'DSCOVR'
+        return rename_propagated_data_keys(propagated_data), 'DSCOVR'
+
+    print("Getting SW data via OMNI")
+    # Fetch OMNI data using the determined datetime range
+    return get_omni_values(start_datetime, end_datetime), 'OMNI_HRO'
+
+
+def load_inputs(config, config_path, satellite_keys=SATELLITE_KEYS):
+    """
+    Process the configured satellites and get the solar wind drivers.
+
+    With config 'workers' other than 1 (default None, meaning one process per CPU) the
+    satellites are processed in a process pool while the solar wind data is fetched or
+    propagated; the results are the same as with 'workers': 1, which runs everything in
+    sequence.
+
+    The optional config 'goes_time_window' ({"start": ..., "end": ...}) limits the GOES
+    data read from the files to that window, e.g. of aggregated multi-month files.
+
+    Returns:
+        tuple: (results, sw_data, sw_data_via), results maps satellite key to the
+        process_satellite dict; (results, None, None) without satellite data.
+    """
+    keys = [key for key in satellite_keys if f'{key}_magn_file' in config]
+    workers = config.get('workers')
+    window = config.get('goes_time_window', {})
+    start, end = window.get('start'), window.get('end')
+    if workers == 1 or not keys:
+        results = {key: process_satellite(config, key, start=start, end=end) for key in keys}
+        time_ranges = [(res['datetime_values'][0], res['datetime_values'][-1])
+                       for res in results.values() if res]
+        executor = None
     else:
-        print("Getting SW data via OMNI")
-        # Fetch OMNI data using the determined datetime range
-        sw_data = get_omni_values(start_datetime, end_datetime)
-        sw_data_via = 'OMNI_HRO'
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = {key: executor.submit(process_satellite, config, key, start=start, end=end)
+                   for key in keys}
+        # The OMNI range only needs the first and last times of each file
+        time_ranges = [read_time_range(config[f'{key}_magn_file'], start, end) for key in keys]
+        time_ranges = [time_range for time_range in time_ranges if time_range]
+
+    try:
+        if not time_ranges:
+            logger.error("No satellite data available.")
+            return {}, None, None
+        # Common datetime range for the OMNI data fetch
+        start_datetime = max(first for first, _ in time_ranges)
+        end_datetime = min(last for _, last in time_ranges)
+        sw_data, sw_data_via = get_solar_wind_data(config, config_path, start_datetime, end_datetime)
+        if executor is not None:
+            results = {key: future.result() for key, future in futures.items()}
+    except BaseException:
+        if executor is not None:
+            # Don't start satellites still queued (shutdown has no cancel_futures before 3.9)
+            for future in futures.values():
+                future.cancel()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for key, res in results.items():
+        if not res:
+            logger.warning(f"No data available for {key.upper()}.")
+    return results, sw_data, sw_data_via
+
+
+def main(config_path):
+    config = load_config(config_path)
+    results, sw_data, sw_data_via = load_inputs(config, config_path)
+    if sw_data is None:
+        return
 
     sw_dyn_p = calculate_solar_wind_dynamic_pressure(sw_data)
-    shue_r0, shue_alpha = run_shue(sw_data['BZ_GSM'], sw_dyn_p)
-    ic(np.nanmin(shue_r0))
+    method = config.get('sw_resample_method', SW_RESAMPLE_METHOD)
+    max_gap = config.get('sw_max_gap', SW_MAX_GAP)
+
+    # Shue r0 on each satellite's time axis; satellites on the same time
+    # axis (e.g. the 1-minute averages) share one alignment
+    shue_r0_by_timeline = {}
+    for res in results.values():
+        if res:
+            timeline = tuple(res['datetime_values'])
+            if timeline not in shue_r0_by_timeline:
+                sw_bz, sw_pdyn = align_drivers(sw_data, sw_dyn_p, res['datetime_values'], method, max_gap)
+                shue_r0_by_timeline[timeline] = run_shue(sw_bz, sw_pdyn)[0]
+            res['shue_r0'] = shue_r0_by_timeline[timeline]
+    ic(min(np.nanmin(shue_r0) for shue_r0 in shue_r0_by_timeline.values()))
+
+    # Plotting pulls in matplotlib, so import only when we get here
+    from plotting.mploc_plotting import make_mpause_plots
 
     # Calculate flags and plot results for each satellite
     for key, res in results.items():
         if res:
             satellite_name = f"GOES-{key[1:].upper()}"  # Construct the satellite name dynamically
-            flags = calculate_flags(shue_r0, res['ion_ratios'], res['electron_ratios'], res['b_epn'])
-            make_mpause_plots(res, flags, sw_data, shue_r0, sw_dyn_p, satellite_name, sw_data_via)
+            flags = calculate_flags(res['shue_r0'], res['ion_ratios'], res['electron_ratios'], res['b_epn'])
+            make_mpause_plots(res, flags, sw_data, res['shue_r0'], sw_dyn_p, satellite_name, sw_data_via)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,10 @@
-from data_loader import *
-from plotting.plotter import *
-from utils import *
+from data_loader import process_goes_dataset, get_date_str_from_goesTime, \
+    stack_gk2a_data, goes_epoch_to_datetime
+from coord_transform import inclination_from_gse, gse_to_vdh, \
+    calculate_magnetic_inclination_angle_VDH
+from vdh_product import write_vdh_netcdf
+import vdh_cache
+from utils import calculate_time_difference, find_noon_and_midnight_time
 import netCDF4 as nc
 import argparse
 
@@ -19,17 +23,73 @@ import argparse
 # TODO: add option to wget data
 # TODO: plot sc orbit locations
 
+
+def transform_spacecraft(b_gse_stacked, time, transform_backend='spacepy',
+                         knot_cadence=None, with_vdh=False, source_files=None,
+                         cache_dir=None):
+    """
+    Inclination angle (and optionally VDH data) of one spacecraft.
+
+    :param b_gse_stacked: Nx3 GSE B field.
+    :param time: Pandas DatetimeIndex of the samples.
+    :param transform_backend: GSE to GEO backend, see gse_to_vdh.
+    :param knot_cadence: Knot spacing of the GSE to GEO rotation, see
+    gse_to_vdh (optional).
+    :param with_vdh: If True, also return the full Nx3 VDH array, otherwise
+    only the fused inclination kernel is run and None is returned for it.
+    :param source_files: Input file(s) the data and time axis were read from,
+    used as the cache key (optional).
+    :param cache_dir: vdh_cache directory; results are reused from and
+    stored to it when given together with source_files (optional).
+    :return: (inclination [rad], VDH data or None)
+    """
+    use_cache = cache_dir is not None and source_files
+    if use_cache:
+        options = {'transform_backend': transform_backend,
+                   'knot_cadence': knot_cadence}
+        cached = vdh_cache.load(source_files, options, cache_dir=cache_dir)
+        if cached is not None and (not with_vdh or 'b_vdh' in cached):
+            return cached['inclination'], cached.get('b_vdh')
+
+    if not with_vdh:
+        theta = inclination_from_gse(b_gse_stacked, time,
+                                     backend=transform_backend,
+                                     knot_cadence=knot_cadence)
+        vdh = None
+    else:
+        vdh = gse_to_vdh(b_gse_stacked, time, backend=transform_backend,
+                         knot_cadence=knot_cadence)
+        theta = calculate_magnetic_inclination_angle_VDH(vdh[:, 0], vdh[:, 1],
+                                                         vdh[:, 2])
+
+    if use_cache:
+        arrays = {'inclination': theta}
+        if vdh is not None:
+            arrays['b_vdh'] = vdh
+        vdh_cache.store(source_files, arrays, options, cache_dir=cache_dir)
+
+    return theta, vdh
+
+
 # def process_spacecraft_data(g17_file, g18_file, gk2a_file, g17_deg,
 # g18_deg, gk2a_deg, save_path):
 def process_spacecraft_data(g17_file=None, g18_file=None, gk2a_file=None,
                             g17_deg=None, g18_deg=None, gk2a_deg=None,
-                            save_path=None):
+                            save_path=None, transform_backend='spacepy',
+                            knot_cadence=None, bgse_save_path=None,
+                            plot=True, output_nc=None, cache_dir=None):
     # For multiple s/c, one day is typical, unless use aggregate_nc_file to
     # look at multiple days at a time.
-    # Plots mag inclination angle
+    # Plots mag inclination angle, and/or writes GSE, VDH and inclination to
+    # the NetCDF file output_nc
     noonmidnighttimes_dict = {}
     goes_time_fromnc = None
     goes17_bgse_stacked = goes18_bgse_stacked = gk2a_bgse_stacked = None
+    goes17_theta = goes18_theta = gk2a_theta = None
+    transform_kwargs = {'transform_backend': transform_backend,
+                        'knot_cadence': knot_cadence,
+                        'with_vdh': bool(output_nc), 'cache_dir': cache_dir}
+    nc_data = {}
 
     if g17_file:
         goes17coloc_dataset = nc.Dataset(g17_file)
@@ -37,7 +97,11 @@ def process_spacecraft_data(g17_file=None, g18_file=None, gk2a_file=None,
             goes17coloc_dataset['b_gse'])
         goes_time_fromnc = goes_epoch_to_datetime(
             goes17coloc_dataset['time'][:])
-        goes17_VDH = gse_to_vdh(goes17_bgse_stacked, goes_time_fromnc)
+        goes17_theta, goes17_VDH = transform_spacecraft(
+            goes17_bgse_stacked, goes_time_fromnc, source_files=[g17_file],
+            **transform_kwargs)
+        nc_data['g17'] = {'b_gse': goes17_bgse_stacked, 'b_vdh': goes17_VDH,
+                          'inclination': goes17_theta}
 
     if g18_file:
         goes18coloc_dataset = nc.Dataset(g18_file)
@@ -45,12 +109,29 @@ def process_spacecraft_data(g17_file=None, g18_file=None, gk2a_file=None,
             goes18coloc_dataset['b_gse'])
         goes_time_fromnc = goes_epoch_to_datetime(
             goes18coloc_dataset['time'][:])
-        goes18_VDH = gse_to_vdh(goes18_bgse_stacked, goes_time_fromnc)
+        goes18_theta, goes18_VDH = transform_spacecraft(
+            goes18_bgse_stacked, goes_time_fromnc, source_files=[g18_file],
+            **transform_kwargs)
+        nc_data['g18'] = {'b_gse': goes18_bgse_stacked, 'b_vdh': goes18_VDH,
+                          'inclination': goes18_theta}
 
     if gk2a_file:
         gk2a_dataset = nc.Dataset(gk2a_file)
         gk2a_bgse_stacked = stack_gk2a_data(gk2a_dataset)
-        gk2a_VDH = gse_to_vdh(gk2a_bgse_stacked, goes_time_fromnc)
+        # SOSMAG samples are put on the GOES time axis
+        gk2a_theta, gk2a_VDH = transform_spacecraft(
+            gk2a_bgse_stacked, goes_time_fromnc,
+            source_files=[f for f in (gk2a_file, g18_file or g17_file) if f],
+            **transform_kwargs)
+        nc_data['gk2a'] = {'b_gse': gk2a_bgse_stacked, 'b_vdh': gk2a_VDH,
+                           'inclination': gk2a_theta}
+
+    if output_nc:
+        write_vdh_netcdf(output_nc, goes_time_fromnc, nc_data)
+        print(f'GSE, VDH and inclination saved as {output_nc}')
+
+    if not plot:
+        return
 
     date_str = get_date_str_from_goesTime(goes_time_fromnc)
 
@@ -81,15 +162,21 @@ def process_spacecraft_data(g17_file=None, g18_file=None, gk2a_file=None,
         noonmidnighttimes_dict['g18'] = {'noon': g18_noon,
                                          'midnight': g18_midnight}
 
+    # Plotting pulls in matplotlib and spacepy, so import only when needed
+    from plotting.plotter import plot_BGSE_fromdata_ontop, \
+        plot_magnetic_inclination_over_time_3sc
+
     # Plot B field in GSE coords:
     plot_BGSE_fromdata_ontop(goes_time_fromnc, goes17_bgse_stacked,
                              goes18_bgse_stacked, 'G17', 'G18', 'SOSMAG',
-                             gk2a_bgse_stacked, date_str, save_path,
+                             gk2a_bgse_stacked, date_str,
+                             bgse_save_path or bool(save_path),
                              noonmidnighttimes_dict)
 
     # Plot mag incl (theta) over time:
     plot_magnetic_inclination_over_time_3sc(date_str, goes_time_fromnc,
-                                            goes17_VDH, goes18_VDH, gk2a_VDH,
+                                            goes17_theta, goes18_theta,
+                                            gk2a_theta,
                                             save_path, noonmidnighttimes_dict)
 
     # print(gk2a_noon, gk2a_midnight, g17_noon, g17_midnight, g18_noon,
@@ -97,6 +184,14 @@ def process_spacecraft_data(g17_file=None, g18_file=None, gk2a_file=None,
     # print(noonmidnighttimes_dict)
 
 
+def default_output_nc_path(data_file):
+    """ vdh_YYYYMMDD.nc in the current dir, dated from the first sample of
+    the given GOES data file. """
+    with nc.Dataset(data_file) as dataset:
+        first = goes_epoch_to_datetime(dataset['time'][:1])[0]
+    return f"vdh_{first.strftime('%Y%m%d')}.nc"
+
+
 # def analyze_pickle_data_statstics(data1, data2):
 #     # Perform statistical analysis on entire directories of pickle data
 
@@ -130,8 +225,83 @@ def main():
                         help="GK2A s/c longitude in degrees (EAST), "
                              "ex. 128.2\n(optional)")
 
+    parser.add_argument("--transform-backend", default='spacepy',
+                        choices=['spacepy', 'native'],
+                        help="GSE to GEO backend used for the VDH transform. "
+                             "'native' skips spacepy and is much faster "
+                             "(~0.03 deg difference)\n(optional)")
+    parser.add_argument("--knot-cadence", default=None, type=float,
+                        help="Compute the GSE to GEO rotation every N seconds "
+                             "and interpolate in between, for high-rate "
+                             "data, ex. 60\n(optional)")
+
+    parser.add_argument("--no-plot", action='store_true',
+                        help="Skip the figures, for headless runs\n"
+                             "(optional)")
+    parser.add_argument("--output-nc", nargs='?', const=True, default=None,
+                        help="Write GSE, VDH and inclination per spacecraft "
+                             "to a compressed NetCDF file. Without a path "
+                             "(and in batch mode) the file is named "
+                             "vdh_YYYYMMDD.nc\n(optional)")
+
+    parser.add_argument("--cache-dir", default=vdh_cache.DEFAULT_CACHE_DIR,
+                        help="Cache of per-file transform results, see "
+                             "vdh_cache.py\n(optional)")
+    parser.add_argument("--no-cache", action='store_true',
+                        help="Always recompute the transforms\n(optional)")
+
+    # Batch mode: a date range plus a file template per spacecraft
+    batch = parser.add_argument_group('Batch Mode')
+    batch.add_argument("--start-date", default=None,
+                       help="First day to process, YYYY-MM-DD. Enables "
+                            "batch mode\n(optional)")
+    batch.add_argument("--end-date", default=None,
+                       help="Last day to process (inclusive), YYYY-MM-DD, "
+                            "defaults to --start-date\n(optional)")
+    batch.add_argument("--g17-template", default=None,
+                       help="strftime/glob template of the daily GOES-17 "
+                            "files, ex. data/%%Y/%%m/"
+                            "dn_magn-l2-avg1m_g17_d%%Y%%m%%d_v*.nc")
+    batch.add_argument("--g18-template", default=None,
+                       help="strftime/glob template of the daily GOES-18 "
+                            "files")
+    batch.add_argument("--gk2a-template", default=None,
+                       help="strftime/glob template of the daily GK2A "
+                            "SOSMAG files, ex. data/SOSMAG_%%Y%%m%%d_b_gse.nc")
+    batch.add_argument("--output-dir", default='batch_output',
+                       help="Directory for the per-day figures and the "
+                            "failure summary\n(optional)")
+    batch.add_argument("--workers", default=None, type=int,
+                       help="Number of worker processes, defaults to the "
+                            "number of CPUs\n(optional)")
+
     args = parser.parse_args()
 
+    transform_options = {'g17_deg': args.g17_deg, 'g18_deg': args.g18_deg,
+                         'gk2a_deg': args.gk2a_deg,
+                         'transform_backend': args.transform_backend,
+                         'knot_cadence': args.knot_cadence,
+                         'plot': not args.no_plot,
+                         'cache_dir': (None if args.no_cache
+                                       else args.cache_dir)}
+
+    if args.start_date:
+        templates = {key: template for key, template in
+                     [('g17', args.g17_template), ('g18', args.g18_template),
+                      ('gk2a', args.gk2a_template)] if template}
+        if not templates:
+            parser.error('Batch mode needs at least one spacecraft template.')
+
+        from batch_processing import run_batch
+        summary = run_batch(args.start_date, args.end_date or args.start_date,
+                            templates, args.output_dir, workers=args.workers,
+                            output_nc=bool(args.output_nc),
+                            **transform_options)
+        print(f"{summary['n_ok']} of {summary['n_days']} days processed, "
+              f"{summary['n_failed']} failed, {summary['n_missing']} missing. "
+              f"Summary: {summary['summary_path']}")
+        return
+
     # Needed to initialize:
     # goes17_bgse_stacked, goes18_bgse_stacked, gk2a_bgse_stacked, gk2a_VDH, \
     #     goes17_VDH, goes17_VDH, save_path = [None] * 7
@@ -140,11 +310,18 @@ def main():
     if not any([args.g17_file, args.g18_file, args.gk2a_file]):
         parser.error('At least one spacecraft data file must be provided.')
 
+    output_nc = args.output_nc
+    if output_nc is True:
+        if not (args.g17_file or args.g18_file):
+            parser.error('--output-nc without a path is named after the '
+                         '--g17-file or --g18-file; give a path for a '
+                         'GK2A-only run.')
+        output_nc = default_output_nc_path(args.g17_file or args.g18_file)
+
     process_spacecraft_data(g17_file=args.g17_file, g18_file=args.g18_file,
                             gk2a_file=args.gk2a_file,
-                            g17_deg=args.g17_deg, g18_deg=args.g18_deg,
-                            gk2a_deg=args.gk2a_deg,
-                            save_path=args.save_path)
+                            save_path=args.save_path, output_nc=output_nc,
+                            **transform_options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+import os
+import json
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+
+"""
+Columnar store of the T89/TS04 model subtraction outputs.
+
+The daily pickle archive (keys 'time_min', 'sat_gse', 'tsXX_gse' and
+'tsXX-sat') is converted once into monthly partitions, one directory per
+month holding a sorted datetime64[ns] time index and one .npy file per
+column:
+
+    store_dir/store.json            partition list with row counts and ranges
+    store_dir/2022-08/time.npy
+    store_dir/2022-08/sat_gse.npy   (N, 3)
+    store_dir/2022-08/model.npy     (N, 3)
+    store_dir/2022-08/subtr.npy     (N, 3)
+
+Range queries skip partitions from the metadata alone, memory-map the
+remaining ones, locate the rows with a binary search on the time index and
+read only the requested columns.
+"""
+
+STORE_VERSION = 1
+METADATA_FILE = 'store.json'
+COLUMNS = ('sat_gse', 'model', 'subtr')
+
+
+def is_store(path):
+    """ True if path is a model subtraction store directory. """
+    return os.path.isfile(os.path.join(path, METADATA_FILE))
+
+
+def read_metadata(store_dir):
+    """
+    :return: dict with 'version', 'columns' and 'partitions' (partition name
+    -> {'rows', 'start', 'end'}, times as ISO strings)
+    """
+    with open(os.path.join(store_dir, METADATA_FILE)) as file:
+        return json.load(file)
+
+
+def _write_metadata(store_dir, metadata):
+    path = os.path.join(store_dir, METADATA_FILE)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(metadata, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _merge_partition(part_dir, time, columns):
+    """ The rows of an existing partition outside [time[0], time[-1]]
+    merged with the new sorted rows, as (time, columns). """
+    old_time = np.load(os.path.join(part_dir, 'time.npy'))
+    keep = (old_time < time[0]) | (old_time > time[-1])
+    if not keep.any():
+        return time, columns
+    names = list(columns)
+    kept = [old_time[keep]] + [
+        np.load(os.path.join(part_dir, f'{name}.npy'))[keep]
+        for name in names]
+    merged = data_loader.merge_sorted_series(
+        [kept, [time] + [columns[name] for name in names]])
+    return merged[0], dict(zip(names, merged[1:]))
+
+
+def write_store(store_dir, time, columns, replace=False):
+    """
+    Write arrays into monthly partitions. Partitions of other months are
+    kept, so an archive can be converted (or extended) a month at a time.
+
+    Rows already stored in a month are merged with the new ones: stored
+    rows inside the time span of the new rows of that month are replaced,
+    the others are kept, so adding days to the current month keeps the days
+    stored before.
+
+    :param store_dir: Store directory, created if needed.
+    :param time:      datetime64 array (N), any order.
+    :param columns:   dict of column name (see COLUMNS) -> array (N, ...).
+    :param replace:   Replace the partitions of the months covered by time
+    wholesale instead of merging (default False).
+    :return: Updated metadata dict
+    """
+    time = np.asarray(time, dtype='datetime64[ns]')
+    order = np.argsort(time, kind='stable')
+    time = time[order]
+    columns = {name: np.asarray(values)[order]
+               for name, values in columns.items()}
+
+    os.makedirs(store_dir, exist_ok=True)
+    if is_store(store_dir):
+        metadata = read_metadata(store_dir)
+        if sorted(metadata['columns']) != sorted(columns):
+            raise ValueError(f"Store has columns {metadata['columns']}, got "
+                             f"{sorted(columns)}")
+    else:
+        metadata = {'version': STORE_VERSION, 'columns': list(columns),
+                    'partitions': {}}
+
+    months = time.astype('datetime64[M]')
+    bounds = np.flatnonzero(months[1:] != months[:-1]) + 1
+    for rows in np.split(np.arange(len(time)), bounds):
+        if not len(rows):
+            continue
+        name = str(months[rows[0]])
+        part_dir = os.path.join(store_dir, name)
+        part_time = time[rows]
+        part_columns = {column: values[rows]
+                        for column, values in columns.items()}
+        if not replace and name in metadata['partitions']:
+            part_time, part_columns = _merge_partition(part_dir, part_time,
+                                                       part_columns)
+        tmp_dir = f'{part_dir}.{os.getpid()}.tmp'
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'time.npy'), part_time)
+        for column, values in part_columns.items():
+            np.save(os.path.join(tmp_dir, f'{column}.npy'),
+                    np.ascontiguousarray(values))
+        shutil.rmtree(part_dir, ignore_errors=True)
+        os.replace(tmp_dir, part_dir)
+
+        metadata['partitions'][name] = {'rows': len(part_time),
+                                        'start': str(part_time[0]),
+                                        'end': str(part_time[-1])}
+
+    _write_metadata(store_dir, metadata)
+    return metadata
+
+
+def convert_pickle_archive(pickle_dir, store_dir, workers=None,
+                           drop_duplicates=False):
+    """
+    Convert a directory of model subtraction pickle files into a store.
+
+    :param pickle_dir: Directory with the daily .pickle files.
+    :param store_dir:  Output store directory.
+    :param workers:    Worker processes for unpickling (default None,
+    meaning os.cpu_count()). 1 loads in this process.
+    :param drop_duplicates: Keep only the first sample of each repeated
+    timestamp, e.g. at day boundaries (default False).
+    :return: Store metadata dict
+    """
+    files = [os.path.join(pickle_dir, filename)
+             for filename in sorted(os.listdir(pickle_dir))
+             if filename.endswith('.pickle')]
+    if not files:
+        raise ValueError(f"No .pickle files in {pickle_dir}")
+
+    if workers == 1 or len(files) == 1:
+        parts = [data_loader.load_pickle_arrays(path) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(data_loader.load_pickle_arrays, files))
+
+    merged = data_loader.merge_sorted_series(parts,
+                                             drop_duplicates=drop_duplicates)
+    if merged is None:
+        raise ValueError(f"No samples in the .pickle files of {pickle_dir}")
+    time, sat_gse, model, subtr = merged
+    return write_store(store_dir, time, {'sat_gse': sat_gse, 'model': model,
+                                         'subtr': subtr})
+
+
+def read_range(store_dir, start_date, end_date, columns=COLUMNS,
+               mmap=True):
+    """
+    Rows of a store with start_date <= time <= end_date.
+
+    :param store_dir:  Store directory.
+    :param start_date: Start of the range (inclusive), anything
+    pd.Timestamp accepts.
+    :param end_date:   End of the range (inclusive).
+    :param columns:    Columns to read (default: all of COLUMNS).
+    :param mmap:       Memory-map the partition files (default True). When
+    the range falls in one partition, the returned arrays are read-only
+    views of the memory-mapped files.
+    :return: dict with 'time' (datetime64[ns]) and each requested column,
+    sorted by time
+    """
+    start = np.datetime64(pd.Timestamp(start_date), 'ns')
+    end = np.datetime64(pd.Timestamp(end_date), 'ns')
+    metadata = read_metadata(store_dir)
+    unknown = set(columns) - set(metadata['columns'])
+    if unknown:
+        raise KeyError(f"Unknown store columns: {sorted(unknown)}")
+
+    mmap_mode = 'r' if mmap else None
+    parts = []
+    for name in sorted(metadata['partitions']):
+        info = metadata['partitions'][name]
+        if np.datetime64(info['end'], 'ns') < start or \
+                np.datetime64(info['start'], 'ns') > end:
+            continue
+
+        part_dir = os.path.join(store_dir, name)
+        time = np.load(os.path.join(part_dir, 'time.npy'), mmap_mode=mmap_mode)
+        first = np.searchsorted(time, start, side='left')
+        last = np.searchsorted(time, end, side='right')
+        if first == last:
+            continue
+
+        part = {'time': time[first:last]}
+        for column in columns:
+            values = np.load(os.path.join(part_dir, f'{column}.npy'),
+                             mmap_mode=mmap_mode)
+            part[column] = values[first:last]
+        parts.append(part)
+
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        return {'time': np.array([], dtype='datetime64[ns]'),
+                **{column: np.empty((0, 3)) for column in columns}}
+    return {key: np.concatenate([part[key] for part in parts])
+            for key in parts[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert or inspect a model subtraction store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser(
+        'convert', help="Convert a directory of daily pickle files")
+    convert.add_argument("pickle_dir")
+    convert.add_argument("store_dir")
+    convert.add_argument("--workers", default=None, type=int)
+    convert.add_argument("--drop-duplicates", action='store_true',
+                         help="Keep one sample per timestamp")
+    info = subparsers.add_parser('info', help="List the store partitions")
+    info.add_argument("store_dir")
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        metadata = convert_pickle_archive(args.pickle_dir, args.store_dir,
+                                          workers=args.workers,
+                                          drop_duplicates=args.drop_duplicates)
+    else:
+        metadata = read_metadata(args.store_dir)
+
+    for name, part in sorted(metadata['partitions'].items()):
+        print(f"{name}: {part['rows']:8d} rows  {part['start']} - "
+              f"{part['end']}")
+
+
+if __name__ == '__main__':
+    main()
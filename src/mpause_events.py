@@ -0,0 +1,434 @@
+import os
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+"""
+Catalog of magnetopause crossing candidates from the magpause_loc flags.
+
+calculate_flags gives four 0/1 arrays per satellite (Shue r0 inside
+geostationary orbit, Hp <= 0, electron and ion ratios above threshold).
+Each sample's flags are packed into a bit mask (FLAG_BITS) and the mask is
+run-length encoded: an event is a run of samples with the same non-zero
+mask, with its start and end (times of the first and last sample), number
+of samples and mask. Runs also end at data gaps longer than max_gap.
+
+update_events takes one chunk (e.g. a day) of a satellite at a time; the
+run still open at the end of a chunk is kept in the state dict and
+continued by the next chunk, so streaming months day by day gives the same
+events as one pass over the whole range. build_catalog does this for
+daily GOES files and writes the catalog:
+
+    python mpause_events.py build 2023-01-01 2023-12-31 events.npz
+        --satellites g16 g18
+        --magn-template data/%Y_%m/dn_magn-l2-avg1m_{satellite}_d%Y%m%d_v*.nc
+        --mpsl-template data/%Y_%m/dn_mpsl-l2-mom1m_{satellite}_d%Y%m%d_v*.nc
+    python mpause_events.py query events.npz --satellite g18
+        --start 2023-01-01 --end 2024-01-01 --min-flags 3
+
+The catalog is one .npz file of event columns sorted by satellite and start
+time (start and end as int64 ns, the mask as one byte), with the row
+offsets of each satellite and the longest event of each satellite as an
+interval index: the events overlapping [start, end] begin in
+[start - longest, end], two binary searches in the start times.
+"""
+
+# Bit of each calculate_flags array in the event mask
+FLAG_BITS = {'flag_r0': 1, 'flag_b_field': 2, 'flag_electrons': 4,
+             'flag_ions': 8}
+MAX_GAP = '2min'
+CATALOG_VERSION = 1
+EVENT_COLUMNS = ('satellite', 'start', 'end', 'n_samples', 'flags')
+# Number of flags set in each mask
+_N_FLAGS = np.array([bin(mask).count('1') for mask in range(16)],
+                    dtype=np.int64)
+
+logger = logging.getLogger(__name__)
+
+
+def flag_mask(flags):
+    """ uint8 bit mask (FLAG_BITS) of a calculate_flags dict. """
+    mask = None
+    for name, bit in FLAG_BITS.items():
+        values = (np.asarray(flags[name]) != 0).astype(np.uint8) * \
+            np.uint8(bit)
+        mask = values if mask is None else mask | values
+    return mask
+
+
+def flag_names(mask):
+    """ Names of the flags set in one event mask. """
+    return [name for name, bit in FLAG_BITS.items() if int(mask) & bit]
+
+
+def n_flags(masks):
+    """ Number of flags set in each mask. """
+    return _N_FLAGS[np.asarray(masks, dtype=np.int64)]
+
+
+def _empty_events():
+    return {'satellite': np.array([], dtype=str),
+            'start': np.array([], dtype='datetime64[ns]'),
+            'end': np.array([], dtype='datetime64[ns]'),
+            'n_samples': np.array([], dtype=np.int64),
+            'flags': np.array([], dtype=np.uint8)}
+
+
+def _events(satellite, start_ns, end_ns, n_samples, masks):
+    return {'satellite': np.full(len(start_ns), satellite),
+            'start': np.asarray(start_ns, dtype=np.int64).view(
+                'datetime64[ns]'),
+            'end': np.asarray(end_ns, dtype=np.int64).view('datetime64[ns]'),
+            'n_samples': np.asarray(n_samples, dtype=np.int64),
+            'flags': np.asarray(masks, dtype=np.uint8)}
+
+
+def concat_events(parts):
+    """ One events dict of a list of events dicts. """
+    parts = [part for part in parts if len(part['start'])]
+    if not parts:
+        return _empty_events()
+    return {column: np.concatenate([part[column] for part in parts])
+            for column in EVENT_COLUMNS}
+
+
+def new_stream_state(max_gap=MAX_GAP):
+    """
+    Empty state for update_events.
+
+    :param max_gap: Longest time between consecutive samples of one event
+    (timedelta-like; None never splits at gaps).
+    """
+    return {'max_gap': None if max_gap is None else
+            pd.Timedelta(max_gap).value, 'satellites': {}}
+
+
+def update_events(state, satellite, times, flags):
+    """
+    Events of one chunk of a satellite's flags.
+
+    :param state:     dict from new_stream_state, updated in place.
+    :param satellite: Satellite key, e.g. 'g18'.
+    :param times:     Sample times (datetime objects or datetime64), after
+    the times of the previous chunk of this satellite.
+    :param flags:     calculate_flags dict of the chunk.
+    :return: events dict of the events closed by this chunk; the run at the
+    end of the chunk stays open in state (see finish_events)
+    """
+    ns = pd.DatetimeIndex(times).to_numpy(dtype='datetime64[ns]').view(
+        np.int64)
+    masks = flag_mask(flags)
+    if len(masks) != len(ns):
+        raise ValueError(f"{len(ns)} times but {len(masks)} flag values")
+    if np.any(ns[1:] < ns[:-1]):
+        order = np.argsort(ns, kind='stable')
+        ns, masks = ns[order], masks[order]
+    sat_state = state['satellites'].setdefault(
+        satellite, {'last_time': None, 'open': None})
+    if not len(ns):
+        return _empty_events()
+    if sat_state['last_time'] is not None and ns[0] <= sat_state['last_time']:
+        raise ValueError(f"{satellite} chunk starts at {ns[0]}, not after the "
+                         f"previous chunk ({sat_state['last_time']})")
+
+    max_gap = state['max_gap']
+    breaks = masks[1:] != masks[:-1]
+    if max_gap is not None:
+        breaks |= np.diff(ns) > max_gap
+    starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    ends = np.append(starts[1:], len(ns)) - 1
+    run_masks = masks[starts]
+    run_start = ns[starts]
+    run_end = ns[ends]
+    run_samples = ends - starts + 1
+
+    closed = []
+    open_run = sat_state['open']
+    if open_run is not None:
+        continues = run_masks[0] == open_run['flags'] and (
+            max_gap is None or ns[0] - sat_state['last_time'] <= max_gap)
+        if continues:
+            run_start[0] = open_run['start']
+            run_samples[0] += open_run['n_samples']
+        else:
+            closed.append(_events(satellite, [open_run['start']],
+                                  [open_run['end']], [open_run['n_samples']],
+                                  [open_run['flags']]))
+
+    # All runs but the last are complete; the last one may continue
+    complete = run_masks[:-1] != 0
+    closed.append(_events(satellite, run_start[:-1][complete],
+                          run_end[:-1][complete], run_samples[:-1][complete],
+                          run_masks[:-1][complete]))
+    sat_state['open'] = None if run_masks[-1] == 0 else {
+        'start': int(run_start[-1]), 'end': int(run_end[-1]),
+        'n_samples': int(run_samples[-1]), 'flags': int(run_masks[-1])}
+    sat_state['last_time'] = int(ns[-1])
+    return concat_events(closed)
+
+
+def finish_events(state):
+    """ Close the runs still open in state and return them as events. """
+    closed = []
+    for satellite, sat_state in state['satellites'].items():
+        open_run = sat_state['open']
+        if open_run is not None:
+            closed.append(_events(satellite, [open_run['start']],
+                                  [open_run['end']], [open_run['n_samples']],
+                                  [open_run['flags']]))
+            sat_state['open'] = None
+    return concat_events(closed)
+
+
+def extract_events(chunks, max_gap=MAX_GAP):
+    """
+    Events of a stream of flag chunks.
+
+    :param chunks:  Iterable of (satellite, times, flags), in time order per
+    satellite.
+    :param max_gap: See new_stream_state.
+    :return: events dict
+    """
+    state = new_stream_state(max_gap)
+    parts = [update_events(state, satellite, times, flags)
+             for satellite, times, flags in chunks]
+    parts.append(finish_events(state))
+    return concat_events(parts)
+
+
+def _build_index(events):
+    """ Sort events by satellite and start and add the interval index. """
+    order = np.lexsort((events['start'], events['satellite']))
+    events = {column: events[column][order] for column in EVENT_COLUMNS}
+    satellites, offsets = np.unique(events['satellite'], return_index=True)
+    offsets = np.append(offsets, len(events['start'])).astype(np.int64)
+    durations = (events['end'] - events['start']).view(np.int64)
+    longest = np.array([durations[first:last].max() for first, last in
+                        zip(offsets[:-1], offsets[1:])], dtype=np.int64)
+    catalog = dict(events)
+    catalog.update({'satellites': satellites.astype(str), 'offsets': offsets,
+                    'longest': longest})
+    return catalog
+
+
+def write_catalog(path, events):
+    """
+    Write events as an indexed catalog file (.npz), atomically.
+
+    :return: catalog dict, as load_catalog
+    """
+    catalog = _build_index(events)
+    # The satellite of each row follows from the offsets
+    document = {key: values for key, values in catalog.items()
+                if key != 'satellite'}
+    document['version'] = np.array(CATALOG_VERSION)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    # A file object keeps np.savez from appending '.npz' to the tmp name
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **document)
+    os.replace(tmp_path, path)
+    return catalog
+
+
+def load_catalog(path):
+    """ Catalog dict written by write_catalog. """
+    with np.load(path) as document:
+        if int(document['version']) != CATALOG_VERSION:
+            raise ValueError(f"{path}: unsupported catalog version "
+                             f"{int(document['version'])}")
+        catalog = {key: document[key] for key in document.files
+                   if key != 'version'}
+    catalog['satellite'] = np.repeat(catalog['satellites'],
+                                     np.diff(catalog['offsets']))
+    return catalog
+
+
+def query_events(catalog, satellite=None, start=None, end=None, min_flags=1,
+                 flags=None):
+    """
+    Events of a catalog overlapping a time range.
+
+    :param catalog:   dict from load_catalog or write_catalog.
+    :param satellite: Satellite key or None for all.
+    :param start, end: Time range (anything pd.Timestamp accepts); None is
+    unbounded. An event overlaps if it starts at or before end and ends at or
+    after start.
+    :param min_flags: Least number of flags set.
+    :param flags:     Optional flag names that must all be set, e.g.
+    ['flag_r0', 'flag_b_field'].
+    :return: events dict in satellite and start order, plus 'n_flags' and
+    'duration' (timedelta64[ns])
+    """
+    if satellite is None:
+        positions = range(len(catalog['satellites']))
+    else:
+        positions = np.flatnonzero(catalog['satellites'] == satellite)
+    start_ns = None if start is None else pd.Timestamp(start).value
+    end_ns = None if end is None else pd.Timestamp(end).value
+    required = sum(FLAG_BITS[name] for name in flags or ())
+
+    selected = []
+    starts = catalog['start'].view(np.int64)
+    for position in positions:
+        first, last = catalog['offsets'][position:position + 2]
+        if end_ns is not None:
+            last = first + np.searchsorted(starts[first:last], end_ns,
+                                           side='right')
+        if start_ns is not None:
+            # Events ending at or after start begin at most `longest` earlier
+            first += np.searchsorted(
+                starts[first:last], start_ns - catalog['longest'][position],
+                side='left')
+        selected.append(np.arange(first, last))
+    rows = np.concatenate(selected) if selected else np.array([], np.int64)
+
+    masks = catalog['flags'][rows]
+    keep = n_flags(masks) >= min_flags
+    if required:
+        keep &= (masks & required) == required
+    if start_ns is not None:
+        keep &= catalog['end'][rows].view(np.int64) >= start_ns
+    rows = rows[keep]
+    result = {column: catalog[column][rows] for column in EVENT_COLUMNS}
+    result['n_flags'] = n_flags(result['flags'])
+    result['duration'] = result['end'] - result['start']
+    return result
+
+
+def to_frame(events):
+    """ DataFrame of an events dict, with the flag names of each event. """
+    frame = pd.DataFrame({column: events[column] for column in events})
+    frame['flag_names'] = [','.join(name.replace('flag_', '') for name in
+                                    flag_names(mask))
+                           for mask in events['flags']]
+    return frame
+
+
+def daily_flags(start_date, end_date, satellites, magn_template,
+                mpsl_template, method=None, max_gap=None):
+    """
+    calculate_flags of daily GOES files, a day at a time.
+
+    :param satellites: Satellite keys, e.g. ('g16', 'g18').
+    :param magn_template, mpsl_template: strftime/glob templates of the daily
+    magnetometer and MPS-LO files (see batch_processing.discover_daily_files)
+    in which '{satellite}' is replaced by the satellite key.
+    :param method, max_gap: Solar wind resampling, see
+    magpause_loc.align_drivers (default magpause_loc.SW_RESAMPLE_METHOD and
+    SW_MAX_GAP).
+    :return: generator of (satellite, datetime_values, flags); days without
+    both files are skipped
+    """
+    # NetCDF reading and OMNI access are only needed to build a catalog
+    import magpause_loc
+    from batch_processing import discover_daily_files
+
+    method = method or magpause_loc.SW_RESAMPLE_METHOD
+    max_gap = max_gap or magpause_loc.SW_MAX_GAP
+    files = {}
+    for satellite in satellites:
+        files[satellite] = (
+            discover_daily_files(magn_template.format(satellite=satellite),
+                                 start_date, end_date),
+            discover_daily_files(mpsl_template.format(satellite=satellite),
+                                 start_date, end_date))
+
+    for day in pd.date_range(pd.Timestamp(start_date).normalize(),
+                             pd.Timestamp(end_date).normalize(), freq='D'):
+        results = {}
+        for satellite, (magn_files, mpsl_files) in files.items():
+            magn_file = magn_files[day.date()]
+            mpsl_file = mpsl_files[day.date()]
+            if magn_file is None or mpsl_file is None:
+                logger.warning(f"No {satellite} files for {day.date()}")
+                continue
+            # Only the variables the flags use (no b_gsm)
+            res = magpause_loc.process_satellite(
+                {f'{satellite}_magn_file': magn_file,
+                 f'{satellite}_mpsl_file': mpsl_file}, satellite,
+                spec=magpause_loc.FLAG_READ_SPEC)
+            if res:
+                results[satellite] = res
+        if not results:
+            continue
+
+        # One solar wind fetch per day for all satellites
+        start_datetime = min(res['start_datetime'] for res in results.values())
+        end_datetime = max(res['end_datetime'] for res in results.values())
+        sw_data = magpause_loc.get_omni_values(start_datetime, end_datetime)
+        sw_dyn_p = magpause_loc.calculate_solar_wind_dynamic_pressure(sw_data)
+        for satellite, res in results.items():
+            sw_bz, sw_pdyn = magpause_loc.align_drivers(
+                sw_data, sw_dyn_p, res['datetime_values'], method, max_gap)
+            shue_r0, _ = magpause_loc.run_shue(sw_bz, sw_pdyn)
+            flags = magpause_loc.calculate_flags(
+                shue_r0, res['ion_ratios'], res['electron_ratios'],
+                res['b_epn'])
+            yield satellite, res['datetime_values'], flags
+
+
+def build_catalog(path, start_date, end_date, satellites, magn_template,
+                  mpsl_template, max_gap=MAX_GAP):
+    """
+    Stream daily GOES files into an event catalog file.
+
+    :param path: Catalog file (.npz).
+    :param max_gap: See new_stream_state.
+    Other parameters as daily_flags.
+    :return: catalog dict
+    """
+    events = extract_events(
+        daily_flags(start_date, end_date, satellites, magn_template,
+                    mpsl_template), max_gap=max_gap)
+    return write_catalog(path, events)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Magnetopause crossing event catalog")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Build a catalog from daily "
+                                              "GOES files")
+    build.add_argument('start', help="First day, e.g. 2023-01-01")
+    build.add_argument('end', help="Last day (inclusive)")
+    build.add_argument('catalog', help="Catalog file (.npz)")
+    build.add_argument('--satellites', nargs='+', default=('g16', 'g18'))
+    build.add_argument('--magn-template', required=True,
+                       help="strftime/glob template of the daily "
+                            "magnetometer files, with {satellite}")
+    build.add_argument('--mpsl-template', required=True,
+                       help="strftime/glob template of the daily MPS-LO "
+                            "files, with {satellite}")
+    build.add_argument('--max-gap', default=MAX_GAP,
+                       help="Longest data gap inside one event")
+
+    query = commands.add_parser('query', help="List the events of a catalog")
+    query.add_argument('catalog', help="Catalog file (.npz)")
+    query.add_argument('--satellite', default=None)
+    query.add_argument('--start', default=None)
+    query.add_argument('--end', default=None)
+    query.add_argument('--min-flags', default=1, type=int)
+    query.add_argument('--flags', nargs='+', default=None,
+                       choices=sorted(FLAG_BITS),
+                       help="Flags that must be set")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        catalog = build_catalog(args.catalog, args.start, args.end,
+                                args.satellites, args.magn_template,
+                                args.mpsl_template, max_gap=args.max_gap)
+        print(f"{len(catalog['start'])} events written to {args.catalog}")
+        return catalog
+
+    events = query_events(load_catalog(args.catalog), args.satellite,
+                          args.start, args.end, args.min_flags, args.flags)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(to_frame(events))
+    return events
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+import os
+import json
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+import netCDF4 as nc
+
+"""
+Local, persistent store of OMNI_HRO_1MIN data fetched from CDAWeb.
+
+Values are kept on the dataset's 1-minute grid in one NetCDF4 (HDF5) file
+per month, with NaN for minutes without data:
+
+    store_dir/OMNI_HRO_1MIN/store.json      covered spans per variable
+    store_dir/OMNI_HRO_1MIN/2024-05.nc      (minutes of the month) per variable
+
+get_data fetches from CDAWeb only the parts of the requested range that the
+store does not cover yet (one request per month of each gap), so repeated and
+overlapping intervals cost no network traffic. In offline mode
+(offline=True, or OMNI_OFFLINE=1 in the environment, e.g. on cluster nodes)
+CDAWeb is never contacted and uncovered spans raise LookupError; fill the
+store beforehand with 'python omni_store.py fetch'.
+
+Values are stored as CDAWeb returns them, fill values included;
+get_data(..., fill_nan=True) replaces the OMNI fill values (FILL_VALUES) with
+NaN.
+"""
+
+DATASET = 'OMNI_HRO_1MIN'
+CADENCE = np.timedelta64(1, 'm')
+STORE_VERSION = 1
+METADATA_FILE = 'store.json'
+# OMNI_HRO_1MIN fill values (values at or above these are missing)
+FILL_VALUES = {'BZ_GSM': 9999.99, 'BX_GSE': 9999.99, 'BY_GSM': 9999.99,
+               'F': 9999.99, 'flow_speed': 99999.9, 'Vx': 99999.9,
+               'proton_density': 999.99, 'T': 9999999.0, 'Pressure': 99.99,
+               'E': 999.99, 'Speed': 99999.9, 'SYM_H': 99999, 'SYM_D': 99999,
+               'ASY_H': 99999, 'ASY_D': 99999, 'AE_INDEX': 99999}
+DEFAULT_STORE_DIR = os.environ.get(
+    'OMNI_STORE_DIR', os.path.join(os.path.expanduser('~'), '.cache',
+                                   'omni'))
+
+logger = logging.getLogger(__name__)
+
+
+def is_offline():
+    """ True if OMNI_OFFLINE is set to 1/true/yes. """
+    return os.environ.get('OMNI_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def _to_minute(time):
+    """ Whole minutes since 1970 of a time (naive UTC or tz-aware). """
+    timestamp = pd.Timestamp(time)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return int(np.datetime64(timestamp.floor('min'), 'm').astype(np.int64))
+
+
+def _minute_time(minute):
+    return np.datetime64(int(minute), 'm')
+
+
+def _month_bounds(month):
+    """ First and last minute of a datetime64[M] month. """
+    first = month.astype('datetime64[m]').astype(np.int64)
+    last = (month + 1).astype('datetime64[m]').astype(np.int64) - 1
+    return int(first), int(last)
+
+
+def _add_span(spans, start, end):
+    """ Sorted, merged list of inclusive [start, end] minute spans. """
+    merged = []
+    for span_start, span_end in sorted(spans + [[start, end]]):
+        if merged and span_start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], span_end)
+        else:
+            merged.append([span_start, span_end])
+    return merged
+
+
+def _missing_spans(spans, start, end):
+    """ Parts of [start, end] not covered by the sorted spans. """
+    missing = []
+    for span_start, span_end in spans:
+        if span_end < start or span_start > end:
+            continue
+        if span_start > start:
+            missing.append([start, span_start - 1])
+        start = max(start, span_end + 1)
+    if start <= end:
+        missing.append([start, end])
+    return missing
+
+
+def _dataset_dir(store_dir, dataset):
+    return os.path.join(store_dir, dataset)
+
+
+def read_metadata(store_dir=DEFAULT_STORE_DIR, dataset=DATASET):
+    """
+    :return: dict with 'version', 'dataset' and 'coverage' (variable ->
+    list of inclusive [start, end] minute spans, minutes since 1970)
+    """
+    path = os.path.join(_dataset_dir(store_dir, dataset), METADATA_FILE)
+    if not os.path.exists(path):
+        return {'version': STORE_VERSION, 'dataset': dataset, 'coverage': {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_metadata(store_dir, dataset, metadata):
+    path = os.path.join(_dataset_dir(store_dir, dataset), METADATA_FILE)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(metadata, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def coverage(variable, store_dir=DEFAULT_STORE_DIR, dataset=DATASET):
+    """ Covered spans of a variable as (start, end) datetime64 pairs. """
+    spans = read_metadata(store_dir, dataset)['coverage'].get(variable, [])
+    return [(_minute_time(start), _minute_time(end)) for start, end in spans]
+
+
+def missing_spans(variables, start, end, store_dir=DEFAULT_STORE_DIR,
+                  dataset=DATASET):
+    """
+    Spans of [start, end] not in the store for at least one of the
+    variables.
+
+    :return: list of inclusive (start, end) datetime64[m] pairs
+    """
+    first, last = _to_minute(start), _to_minute(end)
+    known = read_metadata(store_dir, dataset)['coverage']
+    gaps = []
+    for variable in variables:
+        for gap in _missing_spans(known.get(variable, []), first, last):
+            gaps = _add_span(gaps, *gap)
+    return [(_minute_time(gap_start), _minute_time(gap_end))
+            for gap_start, gap_end in gaps]
+
+
+def _partition_path(store_dir, dataset, month):
+    return os.path.join(_dataset_dir(store_dir, dataset), f'{month}.nc')
+
+
+def _read_partition(store_dir, dataset, month):
+    """ dict of variable -> values on the minutes of the month. """
+    path = _partition_path(store_dir, dataset, month)
+    if not os.path.exists(path):
+        return {}
+    with nc.Dataset(path) as partition:
+        partition.set_auto_mask(False)
+        return {name: variable[:] for name, variable in
+                partition.variables.items() if name != 'time'}
+
+
+def _write_partition(store_dir, dataset, month, columns):
+    first, last = _month_bounds(month)
+    path = _partition_path(store_dir, dataset, month)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with nc.Dataset(tmp_path, 'w', format='NETCDF4') as partition:
+        partition.title = f'{dataset} {month}'
+        partition.createDimension('time', last - first + 1)
+        time_var = partition.createVariable('time', 'i4', ('time',))
+        time_var.units = f'minutes since {_minute_time(first)}'
+        time_var[:] = np.arange(last - first + 1)
+        for name, values in columns.items():
+            variable = partition.createVariable(name, 'f8', ('time',),
+                                                zlib=True)
+            variable[:] = values
+    os.replace(tmp_path, path)
+
+
+def _month_pieces(first, last):
+    """ [first, last] split at month boundaries: (month, start, end). """
+    pieces = []
+    month = _minute_time(first).astype('datetime64[M]')
+    while True:
+        month_first, month_last = _month_bounds(month)
+        pieces.append((month, max(first, month_first), min(last, month_last)))
+        if month_last >= last:
+            return pieces
+        month += 1
+
+
+def fetch(variables, start, end, store_dir=DEFAULT_STORE_DIR,
+          dataset=DATASET, cdas=None):
+    """
+    Fetch the spans of [start, end] that the store does not cover for all
+    variables from CDAWeb and add them to the store.
+
+    :param cdas: CdasWs-like client (default cdaweb.get_cdas()).
+    :return: list of (start, end) spans fetched
+    """
+    variables = list(variables)
+    gaps = missing_spans(variables, start, end, store_dir, dataset)
+    if not gaps:
+        return []
+    if cdas is None:
+        from cdaweb import get_cdas
+        cdas = get_cdas()
+
+    os.makedirs(_dataset_dir(store_dir, dataset), exist_ok=True)
+    metadata = read_metadata(store_dir, dataset)
+    fetched = []
+    for gap_start, gap_end in gaps:
+        first, last = int(gap_start.astype(np.int64)), \
+            int(gap_end.astype(np.int64))
+        for month, piece_first, piece_last in _month_pieces(first, last):
+            status, data = cdas.get_data(
+                dataset, variables,
+                f'{_minute_time(piece_first)}:00Z',
+                f'{_minute_time(piece_last)}:00Z')
+            if data is None:
+                # Nothing served (outage or error): leave the gap open
+                logger.warning(f"{dataset}: no data for "
+                               f"{_minute_time(piece_first)} - "
+                               f"{_minute_time(piece_last)} ({status})")
+                continue
+
+            served = [variable for variable in variables if variable in data]
+            month_first, month_last = _month_bounds(month)
+            columns = _read_partition(store_dir, dataset, month)
+            for variable in served:
+                columns.setdefault(variable, np.full(
+                    month_last - month_first + 1, np.nan))
+            minutes = np.round((np.asarray(
+                pd.DatetimeIndex(data['Epoch']).tz_localize(None),
+                dtype='datetime64[ns]') - np.datetime64(
+                    _minute_time(month_first), 'ns')) / CADENCE).astype(
+                np.int64)
+            inside = (minutes >= piece_first - month_first) & \
+                (minutes <= piece_last - month_first)
+            if not inside.any():
+                logger.warning(f"{dataset}: no records for "
+                               f"{_minute_time(piece_first)} - "
+                               f"{_minute_time(piece_last)}")
+                continue
+            # Minutes after the last record served (e.g. past the current
+            # end of the dataset) stay uncovered, to be fetched again later
+            covered_last = month_first + int(minutes[inside].max())
+            for variable in served:
+                column = columns[variable]
+                column[piece_first - month_first:
+                       piece_last - month_first + 1] = np.nan
+                column[minutes[inside]] = np.asarray(
+                    data[variable], dtype=np.float64)[inside]
+            _write_partition(store_dir, dataset, month, columns)
+
+            for variable in served:
+                metadata['coverage'][variable] = _add_span(
+                    metadata['coverage'].get(variable, []), piece_first,
+                    covered_last)
+            _write_metadata(store_dir, dataset, metadata)
+            fetched.append((_minute_time(piece_first),
+                            _minute_time(covered_last)))
+    return fetched
+
+
+def read_range(variables, start, end, store_dir=DEFAULT_STORE_DIR,
+               dataset=DATASET):
+    """
+    Stored values of [start, end] on the 1-minute grid, NaN where the store
+    has no data.
+
+    :return: dict with 'Epoch' (datetime64[ns]) and one array per variable
+    """
+    first, last = _to_minute(start), _to_minute(end)
+    result = {'Epoch': np.arange(_minute_time(first), _minute_time(last + 1),
+                                 CADENCE).astype('datetime64[ns]')}
+    parts = {variable: [] for variable in variables}
+    for month, piece_first, piece_last in _month_pieces(first, last):
+        month_first, _ = _month_bounds(month)
+        columns = _read_partition(store_dir, dataset, month)
+        for variable in variables:
+            column = columns.get(variable)
+            if column is None:
+                parts[variable].append(np.full(piece_last - piece_first + 1,
+                                               np.nan))
+            else:
+                parts[variable].append(column[piece_first - month_first:
+                                              piece_last - month_first + 1])
+    for variable in variables:
+        result[variable] = np.concatenate(parts[variable])
+    return result
+
+
+def get_data(variables, start, end, store_dir=DEFAULT_STORE_DIR,
+             dataset=DATASET, offline=None, cdas=None, fill_nan=False):
+    """
+    OMNI values of [start, end] (inclusive, whole minutes), fetching only
+    what the store does not have yet.
+
+    :param variables: Variable name or list of names, e.g. ['BZ_GSM',
+    'flow_speed', 'proton_density'].
+    :param start, end: Anything pd.Timestamp accepts; tz-aware times are
+    converted to UTC.
+    :param offline: Never contact CDAWeb (default: is_offline()).
+    :param cdas: CdasWs-like client (default cdaweb.get_cdas()).
+    :param fill_nan: Replace the FILL_VALUES of the variables with NaN
+    (default False: values as served).
+    :return: dict with 'Epoch' (datetime64[ns], 1-minute grid) and one
+    float array per variable, as the data dict of CdasWs.get_data
+    :raises LookupError: in offline mode, if part of the range is not in the
+    store
+    """
+    if isinstance(variables, str):
+        variables = [variables]
+    if offline is None:
+        offline = is_offline()
+    if offline:
+        gaps = missing_spans(variables, start, end, store_dir, dataset)
+        if gaps:
+            raise LookupError(f"{dataset} {variables} not in {store_dir} "
+                              f"for {gaps[0][0]} - {gaps[-1][1]} (offline)")
+    else:
+        fetch(variables, start, end, store_dir, dataset, cdas)
+    data = read_range(variables, start, end, store_dir, dataset)
+    if fill_nan:
+        for variable in variables:
+            if variable in FILL_VALUES:
+                data[variable][data[variable] >= FILL_VALUES[variable]] = \
+                    np.nan
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fill or inspect the local OMNI store")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--dataset", default=DATASET)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fetch_parser = subparsers.add_parser(
+        'fetch', help="Fetch the missing parts of a range from CDAWeb")
+    fetch_parser.add_argument("start", help="e.g. 2024-05-01")
+    fetch_parser.add_argument("end", help="e.g. 2024-05-31T23:59")
+    fetch_parser.add_argument(
+        "--variables", nargs='+',
+        default=['BZ_GSM', 'flow_speed', 'proton_density', 'Pressure',
+                 'Speed', 'SYM_H'])
+    subparsers.add_parser('info', help="List the covered spans")
+    args = parser.parse_args(argv)
+
+    if args.command == 'fetch':
+        for start, end in fetch(args.variables, args.start, args.end,
+                                args.store_dir, args.dataset):
+            print(f"fetched {start} - {end}")
+
+    for variable, spans in sorted(read_metadata(
+            args.store_dir, args.dataset)['coverage'].items()):
+        print(f"{variable}: " + ', '.join(
+            f"{_minute_time(start)} - {_minute_time(end)}"
+            for start, end in spans))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,7 @@ import matplotlib.pyplot as plt
 import xarray as xr
 import matplotlib.dates as mdates
 import matplotlib.colors as cm
-from datetime import datetime, timedelta
+import timestamp_utils as tsu
 
 # Channel labels and y-axis limits
 DIFF_ELECTRON_CHANNEL_LABELS = ["E1S", "E2", "E3", "E4", "E5", "E6", "E7",
@@ -28,8 +28,8 @@ mpsh_variables = mpsh_Dataset.variables.keys()
 ic(mpsh_variables)
 
 times = mpsh_Dataset['time'][:]
-epoch = datetime(2000, 1, 1, 12, 0)  # Epoch is January 1, 2000, at 12:00 PM
-dt = np.array([epoch + timedelta(seconds=int(t)) for t in times])
+# Whole seconds since J2000 (January 1, 2000, at 12:00 PM)
+dt = tsu.j2000_to_posix(np.trunc(times[:]))
 ic(dt[0], dt[-1])
 date_str = dt[0].strftime("%Y-%m-%d")
 
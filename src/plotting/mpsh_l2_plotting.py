@@ -14,7 +14,7 @@ import numpy as np
 from netCDF4 import Dataset as NCDataset
 
 matplotlib.rcParams.update({'font.size': 10})
-import utils as tsu
+import timestamp_utils as tsu
 
 ELE_DIFF_CHANS = 7  # Change depending on what you want to plot (1-10)
 PRO_DIFF_CHANS = 11
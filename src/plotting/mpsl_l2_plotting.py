@@ -11,7 +11,7 @@ import numpy as np
 from netCDF4 import Dataset as NCDataset
 
 matplotlib.rcParams.update({'font.size': 10})
-import utils as tsu
+import timestamp_utils as tsu
 
 ELE_DIFF_CHANS = 10
 PRO_DIFF_CHANS = 11
@@ -4,31 +4,16 @@ import numpy as np
 from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
-import spacepy.coordinates as spcoords
-import spacepy.time as spt
-import spacepy.omni as omni
 from datetime import datetime, timedelta
 import os
-import pytplot
-from pyspedas import sosmag_load
-
-
-if not "CDF_LIB" in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
+from cdaweb import configure_cdf_env, get_cdas
+import timestamp_utils as tsu
 from plotter import plot_spacecraft_positions_with_earth_and_magnetopause, \
     plot_sc_and_shue_gk2a_bytimediff
 
 RE_EARTH = 6378
 GEOSTAT = 6.6  # geostationary orbit - Re
 
-from cdasws import CdasWs
-
-cdas = CdasWs()
-from cdasws.datarepresentation import DataRepresentation as dr
-
 # I am using cdas to get omni data, so this is how I found what variables to
 # grab
 # datasets = cdas.get_datasets(observatoryGroup='OMNI', instrumentType='')
@@ -149,6 +134,10 @@ def load_sosmag_positional_data(timestamp_str):
     trange = [start_time.strftime('%Y-%m-%d %H:%M:%S'),
               end_time.strftime('%Y-%m-%d %H:%M:%S')]
 
+    # pyspedas/pytplot are slow to import, only needed for SOSMAG positions
+    import pytplot
+    from pyspedas import sosmag_load
+
     sosmag_load(trange=trange, datatype='1m')
 
     data_types = list(pytplot.data_quants.keys())
@@ -227,8 +216,10 @@ def get_omni_values(date_str, hour, startminute, endminute):
         start_time = f"{date_str}T{hour}:{startminute}:00Z"
         end_time = f"{date_str}T{hour}:{endminute}:00Z"
 
-    data = cdas.get_data('OMNI_HRO_1MIN', ['BZ_GSM', 'Pressure'], start_time,
-                         end_time, dataRepresentation=dr.XARRAY)[1]
+    from cdasws.datarepresentation import DataRepresentation as dr
+    data = get_cdas().get_data('OMNI_HRO_1MIN', ['BZ_GSM', 'Pressure'],
+                               start_time, end_time,
+                               dataRepresentation=dr.XARRAY)[1]
 
     pressure_values = data.Pressure.values
     average_pressure = np.nanmean(pressure_values)
@@ -253,15 +244,12 @@ def get_omni_values(date_str, hour, startminute, endminute):
 
 
 def j2000_to_datetime(timestamp):  # for sosmag data
-    epoch = pd.to_datetime('2000-01-01 00:00:00')
-    time_datetime = epoch + pd.to_timedelta(timestamp, unit='s')
-    return time_datetime
+    return pd.to_datetime(tsu.cf_to_datetime64(
+        timestamp, 'seconds since 2000-01-01 00:00:00'))
 
 
 def goes_epoch_to_datetime(timestamp):  # for GOES data
-    epoch = pd.to_datetime('2000-01-01 12:00:00')
-    time_datetime = epoch + pd.to_timedelta(timestamp, unit='s')
-    return time_datetime
+    return tsu.j2000_to_timestamp(timestamp)
 
 
 def gse_to_earth(pos, alpha=np.radians(23.5)):
@@ -375,6 +363,10 @@ def convert_and_filter_gse_by_timestamp(spc_coords_file, timestamp):
                           The 'time' column contains datetime objects.
     """
 
+    configure_cdf_env()
+    import spacepy.coordinates as spcoords
+    import spacepy.time as spt
+
     spc_coords = nc.Dataset(spc_coords_file)
     spcCoords_time = goes_epoch_to_datetime(
         spc_coords['time'][:]).to_pydatetime().tolist()
@@ -2,19 +2,12 @@ import netCDF4 as nc
 import argparse
 import numpy as np
 import pandas as pd
-import spacepy.coordinates as spcoords
-import spacepy.time as spt
 from datetime import datetime, timedelta
 from icecream import ic
 import os
-import pytplot
-from pyspedas import sosmag_load
-
-if not "CDF_LIB" in os.environ:
-    base_dir = "C:/Scripts/cdf3.9.0"
-    os.environ["CDF_BASE"] = base_dir
-    os.environ["CDF_BIN"] = base_dir + "/bin"
-    os.environ["CDF_LIB"] = base_dir + "/lib"
+from cdaweb import configure_cdf_env
+import omni_store
+import timestamp_utils as tsu
 from plotter import plot_spacecraft_positions_with_earth_and_magnetopause
 
 # GEOSTAT = 42164  # Radius of geostationary orbit in km (from Earth's center)
@@ -25,11 +18,6 @@ GK2A_LONG = 128.2  # GK2A consistent longitude, EAST
 G18_LONG = 137.0  # WEST
 G17_LONG = 137.2  # WEST until 1/10/23
 
-from cdasws import CdasWs
-from cdasws.datarepresentation import DataRepresentation as dr
-
-cdas = CdasWs()
-
 
 def parse_arguments():
     """
@@ -89,17 +77,12 @@ def get_omni_values(timestamp):
     start_time = dttime - timedelta(minutes=30)
     end_time = dttime + timedelta(minutes=30)
 
-    # Formatting the start and end times to string
-    start_time_str = start_time.strftime('%Y%m%dT%H:%M:00Z')
-    end_time_str = end_time.strftime('%Y%m%dT%H:%M:00Z')
-
-    data = \
-    cdas.get_data('OMNI_HRO_1MIN', ['BZ_GSM', 'Pressure', 'Speed'], start_time_str,
-                  end_time_str, dataRepresentation=dr.XARRAY)[1]
+    data = omni_store.get_data(['BZ_GSM', 'Pressure', 'Speed'], start_time,
+                               end_time, fill_nan=True)
 
-    bz_imf_values = data.BZ_GSM.values
-    pressure_values = data.Pressure.values
-    speed_values = data.Speed.values
+    bz_imf_values = data['BZ_GSM']
+    pressure_values = data['Pressure']
+    speed_values = data['Speed']
 
     average_pressure = np.nanmean(pressure_values)
     max_pressure = np.nanmax(pressure_values)
@@ -184,6 +167,10 @@ def load_sosmag_positional_data(timestamp_str):
     trange = [start_time.strftime('%Y-%m-%d %H:%M:%S'),
               end_time.strftime('%Y-%m-%d %H:%M:%S')]
 
+    # pyspedas/pytplot are slow to import, only needed for SOSMAG positions
+    import pytplot
+    from pyspedas import sosmag_load
+
     sosmag_load(trange=trange, datatype='1m')
 
     data_types = list(pytplot.data_quants.keys())
@@ -251,9 +238,7 @@ def average_of_minute_timestamp_of_GK2A(df):
 
 
 def goes_epoch_to_datetime(timestamp):  # for GOES data
-    epoch = pd.to_datetime('2000-01-01 12:00:00')
-    time_datetime = epoch + pd.to_timedelta(timestamp, unit='s')
-    return time_datetime
+    return tsu.j2000_to_timestamp(timestamp)
 
 
 def apply_GSE_nparraystack(pos):
@@ -303,6 +288,10 @@ def convert_and_filter_gse_by_timestamp(spc_coords_file, timestamp):
                           The 'time' column contains datetime objects.
     """
 
+    configure_cdf_env()
+    import spacepy.coordinates as spcoords
+    import spacepy.time as spt
+
     spc_coords = nc.Dataset(spc_coords_file)
     spcCoords_time = goes_epoch_to_datetime(
         spc_coords['time'][:]).to_pydatetime().tolist()
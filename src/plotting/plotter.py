@@ -1,13 +1,10 @@
 import netCDF4 as nc
 from matplotlib.patches import Wedge, Circle
-import spacepy.plot as spp  # For dual_half_circle
-import spacepy.empiricals as spe  # For getMagnetopause
 import numpy as np
-import spacepy.omni as omni
 from icecream import ic
-import spacepy.time as spt
 from datetime import datetime, timedelta
 import utils
+from cdaweb import configure_cdf_env
 from coord_transform import *
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -34,6 +31,15 @@ g18_color = 'orange'
 sosmag_color = 'blue'
 g16_color = 'green'
 
+
+def _spacepy_plot_modules():
+    """ spacepy.plot (dual_half_circle) and spacepy.empiricals
+    (getMagnetopause), imported on first use since they are slow to load. """
+    configure_cdf_env()
+    import spacepy.plot as spp
+    import spacepy.empiricals as spe
+    return spp, spe
+
 def transform_longitude_to_GSE(longitude, utc_time, is_west=False):
     """
     Transform the longitude of a geostationary satellite into GSE coordinates.
@@ -94,8 +100,8 @@ def plot_BGSE_fromdata_ontop(goes_time, goes17_spacecraft_data=None,
     :param whatsc_gk2a: A label for the third spacecraft (optional).
     :param gk2a_spacecraft_data: Data for the third spacecraft (optional).
     :param date_str: A string representing the date (e.g., "YYYY-MM-DD").
-    :param save_path: bool, if True, will save fig in current dir (
-    default=False).
+    :param save_path: File path to save the fig to, or True to save it as
+    'B_gse_3comp.png' in the current dir (default=False).
 
     Example:
     plot_BGSE_fromdata_ontop(goes17_spacecraft_data, goes18_spacecraft_data,
@@ -211,14 +217,25 @@ def plot_BGSE_fromdata_ontop(goes_time, goes17_spacecraft_data=None,
     ax3.set_ylim(10, 150)
 
     plt.tight_layout()
-    # TODO: Fix save file, it is not working currently.
     if save_path:
-        save_file_as = 'B_gse_3comp.png'
+        save_file_as = save_path if isinstance(save_path, str) \
+            else 'B_gse_3comp.png'
         plt.savefig(save_file_as)
         print(f'fig saved as {save_file_as}')
         plt.show()
     else:
         plt.show()
+    plt.close(fig)
+
+def inclination_from_plot_data(data):
+    """ Inclination [rad] from Nx3 VDH data, or data already holding the
+    inclination angles (1D) as returned by inclination_from_gse. """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        return data
+    return calculate_magnetic_inclination_angle_VDH(data[:, 0], data[:, 1],
+                                                    data[:, 2])
+
 
 def plot_magnetic_inclination_over_time_3sc(date_str, goes_time,
                                             goes17_data=None, goes18_data=None,
@@ -230,9 +247,10 @@ def plot_magnetic_inclination_over_time_3sc(date_str, goes_time,
 
     :param date_str: A string representing the date (e.g., "YYYY-MM-DD").
     :param goes_time: The timestamp data for the plotted time.
-    :param goes17_data: Data for GOES-17 (optional).
-    :param goes18_data: Data for GOES-18 (optional).
-    :param gk2a_data: Data for SOSMAG (optional).
+    :param goes17_data: Data for GOES-17 (optional). Either Nx3 VDH data or
+    inclination angles in radians from inclination_from_gse (length N).
+    :param goes18_data: Data for GOES-18 (optional), same as goes17_data.
+    :param gk2a_data: Data for SOSMAG (optional), same as goes17_data.
     :param save_path: The file path to save the generated plot (optional).
     :param noonmidnighttime_dict: OPTIONAL, data dictionary storing noon and
     mignight times of spacecraft for plotting
@@ -243,21 +261,17 @@ def plot_magnetic_inclination_over_time_3sc(date_str, goes_time,
     fig, (ax1) = plt.subplots()
 
     if goes17_data is not None:
-        goes17_theta = calculate_magnetic_inclination_angle_VDH(
-            goes17_data[:, 0], goes17_data[:, 1], goes17_data[:, 2])
+        goes17_theta = inclination_from_plot_data(goes17_data)
         ax1.plot(goes_time, np.degrees(goes17_theta), label='G17',
                  color=g17_color)
 
     if goes18_data is not None:
-        goes18_theta = calculate_magnetic_inclination_angle_VDH(
-            goes18_data[:, 0], goes18_data[:, 1], goes18_data[:, 2])
+        goes18_theta = inclination_from_plot_data(goes18_data)
         ax1.plot(goes_time, np.degrees(goes18_theta), label='G18',
                  color=g18_color)
 
     if gk2a_data is not None:
-        gk2a_theta = calculate_magnetic_inclination_angle_VDH(gk2a_data[:, 0],
-                                                              gk2a_data[:, 1],
-                                                              gk2a_data[:, 2])
+        gk2a_theta = inclination_from_plot_data(gk2a_data)
         ax1.plot(goes_time, np.degrees(gk2a_theta), label='SOSMAG',
                  color=sosmag_color)
 
@@ -329,6 +343,7 @@ def plot_magnetic_inclination_over_time_3sc(date_str, goes_time,
         plt.show()
     else:
         plt.show()
+    plt.close(fig)
 
 
 # TODO: make this more general/WORK
@@ -697,6 +712,8 @@ def plot_spacecraft_positions_with_earth_and_magnetopause(transformed_dict,
         solar_wind_pressure (float): Solar wind dynamic pressure in nPa.
         imf_bz (float): Interplanetary Magnetic Field Bz component in nT.
     """
+    spp, spe = _spacepy_plot_modules()
+
     fig, ax = plt.subplots(subplot_kw={'aspect': 'equal'})
 
     # Plot Earth with spacepy's dual half circle
@@ -777,6 +794,8 @@ def plot_sc_and_shue_gk2a_bytimediff(transformed_dict, solar_wind_pressure,
         solar_wind_pressure (float): Solar wind dynamic pressure in nPa.
         imf_bz (float): Interplanetary Magnetic Field Bz component in nT.
     """
+    spp, spe = _spacepy_plot_modules()
+
     fig, ax = plt.subplots(subplot_kw={'aspect': 'equal'})
 
     # Plot Earth with spacepy's dual half circle
@@ -1,185 +1,154 @@
-import utils
-import data_loader
+import argparse
 import pandas as pd
-from plotting import plotter
-
-# # Load kp data:
-# kp_data_txt_path = 'C:/Users/sarah.auriemma/Desktop/Data_new/kp_2019.txt'
-# dfkp = kp.readKpData(kp_data_txt_path)
-# dfkp['Time'] = pd.to_datetime(dfkp['Time'])
-
-model_str = 'T89'
-sosmag_pickle_dir = 'C:/Users/sarah.auriemma/Desktop/Data_new/6month_study' \
-                    '/sosmag'
-g17_pickle_dir = 'C:/Users/sarah.auriemma/Desktop/Data_new/6month_study/g17'
-
-# Define the start and end dates for your desired date range
-start_date = pd.to_datetime('2019-05-14')
-end_date = pd.to_datetime('2019-05-15')
-
-# Load and trim GK2A data
-gk2a_time_list, gk2a_data_list, gk2a_89_model_list, gk2a_89_subtr_list = \
-    data_loader.load_and_trim_data(
-        sosmag_pickle_dir, start_date, end_date)
-
-# Load and trim GOES-17 data
-g17_time_list, g17_data_list, g17_89_model_list, g17_89_subtr_list = \
-    data_loader.load_and_trim_data(
-        g17_pickle_dir, start_date, end_date)
-
-
-#
-# gk2a_time_list = []
-# gk2a_data_list = []
-# gk2a_89_subtr_list = []
-#
-# g17_time_list = []
-# g17_data_list = []
-# g17_89_subtr_list = []
-#
-# # Load GK2A data
-# for filename in os.listdir(sosmag_pickle_dir):
-#     if filename.endswith('.pickle'):
-#         file_path = os.path.join(sosmag_pickle_dir, filename)
-#         time, ts89_gse, sat_gse = \
-#             data_loader.load_model_subtr_gse_from_pickle_file(
-#             file_path)
-#         gk2a_time_list.extend(time)
-#         gk2a_89_subtr_list.extend(ts89_gse)
-#         gk2a_data_list.extend(sat_gse)
-#
-# # Load GOES-17 data
-# for filename in os.listdir(g17_pickle_dir):
-#     if filename.endswith('.pickle'):
-#         file_path = os.path.join(g17_pickle_dir, filename)
-#         time, ts89_gse, sat_gse = \
-#             data_loader.load_model_subtr_gse_from_pickle_file(
-#                 file_path)
-#         g17_time_list.extend(time)
-#         g17_89_subtr_list.extend(ts89_gse)
-#         g17_data_list.extend(sat_gse)
-#
-# gk2a_time_list = [pd.to_datetime(time) for time in gk2a_time_list]
-# g17_time_list = [pd.to_datetime(time) for time in g17_time_list]
-###################
-
-# TODO: fix error handling
-if len(g17_data_list) == len(gk2a_data_list):
-    pass
-else:
-    print('raise error: len not equal')
-
-# Get |B| from data using utils
-gk2a_total_mag_field_model = [utils.calculate_total_magnetic_field(*point)
-                              for point in gk2a_89_model_list]
-g17_total_mag_field_model = [utils.calculate_total_magnetic_field(*point)
-                             for point in g17_89_model_list]
-
-gk2a_total_mag_field_modelsub = [utils.calculate_total_magnetic_field(*point)
-                                 for point in gk2a_89_subtr_list]
-g17_total_mag_field_modelsub = [utils.calculate_total_magnetic_field(*point)
-                                for point in g17_89_subtr_list]
-
-gk2a_total_mag_field = [utils.calculate_total_magnetic_field(*point) for point
-                        in gk2a_data_list]
-g17_total_mag_field = [utils.calculate_total_magnetic_field(*point) for point
-                       in g17_data_list]
-
-
-mean_difference_g17_obsvsmodel, standard_deviation_g17_obsvsmodel = \
-    utils.mean_and_std_dev(
-    g17_total_mag_field_model, g17_total_mag_field)
-mean_difference_gk2a_obsvsmodel, standard_deviation_gk2a_obsvsmodel = \
-    utils.mean_and_std_dev(
-    gk2a_total_mag_field_model, gk2a_total_mag_field)
-
-print(f'g17 |B| (GSE) obsv vs {model_str} model')
-print('bottom left sub plot')
-print(f'Mean Difference: {mean_difference_g17_obsvsmodel} nT')
-print(f'Standard Deviation: {standard_deviation_g17_obsvsmodel} nT')
-print('---------------')
-print(f'gk2a |B| (GSE) obsv vs {model_str} model')
-print('bottom right sub plot')
-print(f'Mean Difference: {mean_difference_gk2a_obsvsmodel} nT')
-print(f'Standard Deviation: {standard_deviation_gk2a_obsvsmodel} nT')
-print('---------------')
-
-# plt.plot(gk2a_time_list, gk2a_total_mag_field_modelsub,
-#          label=f'gk2a {model_str} removed')
-# plt.plot(gk2a_time_list, gk2a_total_mag_field, label='gk2a gse')
-# plt.legend()
-# plt.title('GK2A |B|')
-# plt.show()
-#
-# plt.plot(g17_time_list, g17_total_mag_field_modelsub, label=f'g17 {
-# model_str} removed')
-# plt.plot(g17_time_list, g17_total_mag_field, label='g17 gse')
-# plt.legend()
-# plt.title('G17 |B|')
-# plt.show()
-
-
-plotter.plot_components_vs_t89_with_color('G17', g17_data_list,
-                                          g17_89_subtr_list, g17_time_list,
-                                          model_str)
-plotter.plot_components_vs_t89_with_color('GK2A', gk2a_data_list,
-                                          gk2a_89_subtr_list, gk2a_time_list,
-                                          model_str)
-
-# plotter.plot_4_scatter_plots_with_color(
-#     g17_total_mag_field, g17_total_mag_field_model, g17_time_list,
-#     gk2a_total_mag_field, gk2a_total_mag_field_model, gk2a_time_list,
-#     model_used=model_str,
-#     output_file=None, best_fit=True, is_model_subtr=False)
-
-# plotter.plot_4_scatter_plots_with_color(
-#     g17_total_mag_field, g17_total_mag_field_modelsub, g17_time_list,
-#     gk2a_total_mag_field,
-#     gk2a_total_mag_field_modelsub, gk2a_time_list, model_used=model_str,
-#     output_file=None,
-#     best_fit=True, is_model_subtr=True)
-
-
-mean_difference_subtrvssubtr, standard_deviation_subtrvssubtr = \
-    utils.mean_and_std_dev(
-        g17_total_mag_field_modelsub, gk2a_total_mag_field_modelsub)
-mean_diff_modelvsmodel, stddev_modelvsmodel = utils.mean_and_std_dev(
-    g17_total_mag_field_model, gk2a_total_mag_field_model)
-# print(f'(g17 - {model_str} model) vs (gk2a - {model_str} model)')
-# print('top left plot, model removed from data')
-# print(f'Mean Difference: {mean_difference_subtrvssubtr} nT')
-# print(f'Standard Deviation: {standard_deviation_subtrvssubtr} nT')
-# print('---------------')
-print(f'(g17 {model_str}) vs (gk2a {model_str})')
-print('top left plot, just estimated model vs model')
-print(f'Mean Difference: {mean_diff_modelvsmodel} nT')
-print(f'Standard Deviation: {stddev_modelvsmodel} nT')
-print('---------------')
-
-mean_difference_g17_obsvsmodel_sub, standard_deviation_g17_obsvsmodel_sub = \
-    utils.mean_and_std_dev(
-        g17_total_mag_field_modelsub, g17_total_mag_field)
-mean_difference_gk2a_obsvsmodel_sub, standard_deviation_gk2a_obsvsmodel_sub = \
-    utils.mean_and_std_dev(
-        gk2a_total_mag_field_modelsub, gk2a_total_mag_field)
-
-print(f'g17 |B| (GSE) obsv vs g17 |B| with {model_str} removed')
-print('bottom left sub plot, model removed')
-print(f'Mean Difference: {mean_difference_g17_obsvsmodel_sub} nT')
-print(f'Standard Deviation: {standard_deviation_g17_obsvsmodel_sub} nT')
-print('---------------')
-print(f'gk2a |B| (GSE) obsv vs gk2a |B| with {model_str} removed')
-print('bottom right sub plot, model removed')
-print(f'Mean Difference: {mean_difference_gk2a_obsvsmodel_sub} nT')
-print(f'Standard Deviation: {standard_deviation_gk2a_obsvsmodel_sub} nT')
-print('---------------')
-
-# Use the function to calculate stats
-# hourly_stats = utils.calc_stats(gk2a_time_list,
-# gk2a_total_mag_field_modelsub, g17_total_mag_field_modelsub)
-# hourly_stats = utils.calc_stats(gk2a_time_list,
-# gk2a_total_mag_field_modelsub, g17_total_mag_field_modelsub, 'H')
-# print(hourly_stats)
-
-
-# TODO: add if __name__ == '__main__' to avoid running on import
+
+import data_loader
+import streaming_stats
+import utils
+
+"""
+|B| and component statistics of two spacecraft's model subtraction outputs,
+e.g. GOES-17 vs GK2A with T89:
+
+    python statistics_v01.py g17_dir gk2a_dir --start-date 2019-05-14
+        --end-date 2019-05-15 --names G17 GK2A --model T89 [--plot]
+
+Each directory is a daily pickle archive or a model_store directory. Series
+are kept as (N, 3) float arrays; the magnitudes of the data, model and
+subtraction of a spacecraft are one np.linalg.norm call and the statistics
+are streaming_stats accumulators. The cross-spacecraft comparisons pair the
+samples by time (utils.match_times, exact by default). With --checkpoint the
+range is processed a day at a time with a resumable checkpoint
+(streaming_stats.compare_spacecraft) instead of being loaded at once.
+"""
+
+# Comparison name (see streaming_stats.comparison_pairs) -> report title,
+# the printed mean/std are of the first series minus the second
+REPORT = (
+    ('model_vs_obs_1', "{sc_1} |B| (GSE) obsv vs {model} model"),
+    ('model_vs_obs_2', "{sc_2} |B| (GSE) obsv vs {model} model"),
+    ('model_vs_model', "({sc_1} {model}) vs ({sc_2} {model})"),
+    ('subtr_vs_subtr', "({sc_1} - {model} model) vs ({sc_2} - {model} "
+                       "model)"),
+    ('subtr_vs_obs_1', "{sc_1} |B| (GSE) obsv vs {sc_1} |B| with {model} "
+                       "removed"),
+    ('subtr_vs_obs_2', "{sc_2} |B| (GSE) obsv vs {sc_2} |B| with {model} "
+                       "removed"),
+    ('subtr_components', "{sc_1} - {model} vs {sc_2} - {model}, X/Y/Z "
+                         "components"),
+)
+
+
+def load_series(pickle_dir, start_date, end_date, workers=None):
+    """
+    :return: dict with 'time' (datetime64[ns]) and the (N, 3) float arrays
+    'data', 'model' and 'subtr', sorted by time
+    """
+    time, data, model, subtr = data_loader.load_and_trim_arrays(
+        pickle_dir, start_date, end_date, workers=workers)
+    return {'time': time, 'data': data, 'model': model, 'subtr': subtr}
+
+
+def compare_series(series_1, series_2, mode='exact', tolerance=None):
+    """
+    Statistics of the REPORT comparisons of two loaded series.
+
+    :param series_1, series_2: dicts from load_series.
+    :param mode, tolerance: Time alignment, see utils.match_times.
+    :return: dict of comparison name -> streaming_stats.summarize dict
+    """
+    index_1, index_2 = utils.match_times(series_1['time'], series_2['time'],
+                                         mode, tolerance)
+    pairs = streaming_stats.comparison_pairs(
+        [series_1[key] for key in ('data', 'model', 'subtr')],
+        [series_2[key] for key in ('data', 'model', 'subtr')],
+        index_1, index_2)
+    return {name: streaming_stats.summarize(
+        streaming_stats.pair_moments(x, y)) for name, (x, y) in pairs.items()}
+
+
+def print_report(summaries, sc_1='G17', sc_2='GK2A', model_str='T89'):
+    for name, title in REPORT:
+        if name not in summaries:
+            # No samples were compared (e.g. no days in the range)
+            continue
+        summary = summaries[name]
+        print(title.format(sc_1=sc_1, sc_2=sc_2, model=model_str))
+        if len(summary['mean_diff']) == 1:
+            print(f"Samples: {summary['count'][0]}")
+            print(f"Mean Difference: {summary['mean_diff'][0]} nT")
+            print(f"Standard Deviation: {summary['std_diff'][0]} nT")
+        else:
+            print(f"Samples: {summary['count'].tolist()}")
+            print(f"Mean Difference: {summary['mean_diff'].tolist()} nT")
+            print(f"Standard Deviation: {summary['std_diff'].tolist()} nT")
+        print('---------------')
+
+
+def plot_series(series, spacecraft_name, model_str):
+    # matplotlib is only needed for the figures
+    from plotting import plotter
+    plotter.plot_components_vs_t89_with_color(
+        spacecraft_name, series['data'], series['subtr'],
+        pd.DatetimeIndex(series['time']).to_pydatetime(), model_str)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two spacecraft's model subtraction outputs")
+    parser.add_argument("dir_1", help="Pickle or model_store directory of "
+                                      "the first spacecraft")
+    parser.add_argument("dir_2", help="Pickle or model_store directory of "
+                                      "the second spacecraft")
+    parser.add_argument("--start-date", required=True,
+                        help="Start date (inclusive), e.g. 2019-05-14")
+    parser.add_argument("--end-date", required=True,
+                        help="End date (inclusive)")
+    parser.add_argument("--names", nargs=2, default=('G17', 'GK2A'),
+                        help="Spacecraft names for the report")
+    parser.add_argument("--model", default='T89', help="Model name")
+    parser.add_argument("--align", default='exact',
+                        choices=('exact', 'nearest', 'backward', 'forward'),
+                        help="Time alignment of the two spacecraft")
+    parser.add_argument("--tolerance", default=None,
+                        help="Largest time difference for inexact "
+                             "alignment, e.g. 500ms")
+    parser.add_argument("--workers", default=None, type=int,
+                        help="Worker processes for unpickling")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Process a day at a time and save/resume the "
+                             "statistics in this JSON file")
+    parser.add_argument("--plot", action='store_true',
+                        help="Plot the components vs the model subtraction")
+    args = parser.parse_args(argv)
+    if pd.Timestamp(args.start_date) > pd.Timestamp(args.end_date):
+        parser.error("--start-date is after --end-date")
+
+    if args.checkpoint:
+        if args.plot:
+            parser.error("--plot needs the whole series, not --checkpoint")
+        state = streaming_stats.compare_spacecraft(
+            args.dir_1, args.dir_2, args.start_date, args.end_date,
+            checkpoint=args.checkpoint, mode=args.align,
+            tolerance=args.tolerance)
+        summaries = {name: streaming_stats.summarize(stats)
+                     for name, stats in state['stats'].items()}
+    else:
+        end_date = pd.Timestamp(args.end_date)
+        if end_date == end_date.normalize():
+            # A date means the whole day, as with --checkpoint
+            end_date += pd.Timedelta(1, 'D') - pd.Timedelta(1, 'ns')
+        series = [load_series(directory, args.start_date, end_date,
+                              workers=args.workers)
+                  for directory in (args.dir_1, args.dir_2)]
+        summaries = compare_series(*series, mode=args.align,
+                                   tolerance=args.tolerance)
+        if args.plot:
+            for one_series, name in zip(series, args.names):
+                plot_series(one_series, name, args.model)
+
+    print_report(summaries, *args.names, model_str=args.model)
+    return summaries
+
+
+if __name__ == '__main__':
+    main()
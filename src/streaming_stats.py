@@ -0,0 +1,227 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import utils
+
+"""
+Mergeable streaming statistics of paired series (x, y).
+
+A pair accumulator is a dict of arrays, one value per component: the number
+of valid pairs, the means of x and y, their sums of squared deviations and
+the co-moment sum((x - mean_x) * (y - mean_y)). Batches are reduced with
+numpy and merged with the pairwise update of Chan et al., so accumulators
+fed a day at a time (or built on different machines and merged) give the
+same result as one pass over the whole series, without keeping the series
+in memory. summarize turns an accumulator into the mean/std of the
+difference (as utils.mean_and_std_dev), the covariance, correlation and the
+regression of y on x.
+
+compare_spacecraft runs the statistics_v01 comparisons (|B| observed vs
+model, model vs model, ...) day by day between two model subtraction
+archives and checkpoints the accumulators to a JSON file after every day, so
+a multi-year comparison can be resumed after an interruption.
+"""
+
+CHECKPOINT_VERSION = 1
+FIELDS = ('n', 'mean_x', 'mean_y', 'm2_x', 'm2_y', 'c_xy')
+
+
+def new_pair_stats(n_components=1):
+    """ Empty accumulator for pairs of n_components-component values. """
+    return {field: np.zeros(n_components, dtype=np.int64 if field == 'n'
+                            else np.float64) for field in FIELDS}
+
+
+def pair_moments(x, y):
+    """
+    Accumulator of one batch of pairs.
+
+    :param x: Array (N) or (N, components).
+    :param y: Array of the same shape. Pairs where x or y is NaN are skipped.
+    :return: Accumulator dict
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.shape != y.shape:
+        raise ValueError(f"x has shape {x.shape} but y has shape {y.shape}")
+    if x.ndim == 1:
+        x, y = x[:, None], y[:, None]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.where(valid, x, 0.0).sum(axis=0) / n
+        mean_y = np.where(valid, y, 0.0).sum(axis=0) / n
+    dx = np.where(valid, x - mean_x, 0.0)
+    dy = np.where(valid, y - mean_y, 0.0)
+    return {'n': n.astype(np.int64),
+            'mean_x': np.where(n > 0, mean_x, 0.0),
+            'mean_y': np.where(n > 0, mean_y, 0.0),
+            'm2_x': (dx * dx).sum(axis=0), 'm2_y': (dy * dy).sum(axis=0),
+            'c_xy': (dx * dy).sum(axis=0)}
+
+
+def merge_pair_stats(a, b):
+    """ Accumulator of the union of the pairs of accumulators a and b. """
+    n = a['n'] + b['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(n > 0, b['n'] / n, 0.0)
+    delta_x = b['mean_x'] - a['mean_x']
+    delta_y = b['mean_y'] - a['mean_y']
+    # n_a * n_b / n, written to stay in floating point
+    scale = a['n'] * weight
+    return {'n': n,
+            'mean_x': a['mean_x'] + delta_x * weight,
+            'mean_y': a['mean_y'] + delta_y * weight,
+            'm2_x': a['m2_x'] + b['m2_x'] + delta_x * delta_x * scale,
+            'm2_y': a['m2_y'] + b['m2_y'] + delta_y * delta_y * scale,
+            'c_xy': a['c_xy'] + b['c_xy'] + delta_x * delta_y * scale}
+
+
+def update_pair_stats(stats, x, y):
+    """ stats merged with the pairs (x, y); see pair_moments. """
+    return merge_pair_stats(stats, pair_moments(x, y))
+
+
+def summarize(stats, ddof=0):
+    """
+    :param stats: Accumulator dict.
+    :param ddof:  Delta degrees of freedom of the std and covariance
+    (default 0, as np.nanstd in utils.mean_and_std_dev).
+    :return: dict of arrays (one value per component; NaN without enough
+    pairs): 'count', 'mean_x', 'mean_y', 'mean_diff' and 'std_diff' of
+    x - y, 'std_x', 'std_y', 'covariance', 'correlation', and 'slope' and
+    'intercept' of the least-squares fit y = slope * x + intercept
+    """
+    n = stats['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = np.where(n > ddof, n - ddof, np.nan)
+        empty = np.where(n > 0, 1.0, np.nan)
+        m2_diff = stats['m2_x'] + stats['m2_y'] - 2 * stats['c_xy']
+        slope = stats['c_xy'] / stats['m2_x']
+        return {'count': n,
+                'mean_x': stats['mean_x'] * empty,
+                'mean_y': stats['mean_y'] * empty,
+                'mean_diff': (stats['mean_x'] - stats['mean_y']) * empty,
+                'std_diff': np.sqrt(np.maximum(m2_diff, 0) / denominator),
+                'std_x': np.sqrt(stats['m2_x'] / denominator),
+                'std_y': np.sqrt(stats['m2_y'] / denominator),
+                'covariance': stats['c_xy'] / denominator,
+                'correlation': stats['c_xy'] / np.sqrt(stats['m2_x'] *
+                                                       stats['m2_y']),
+                'slope': slope,
+                'intercept': stats['mean_y'] - slope * stats['mean_x']}
+
+
+def save_checkpoint(path, state):
+    """
+    Write a comparison state atomically as JSON (floats round-trip
+    exactly).
+
+    :param state: dict with 'config', 'completed_through' (ISO date of the
+    last day included, or None) and 'stats' (name -> accumulator).
+    """
+    document = {'version': CHECKPOINT_VERSION, 'config': state['config'],
+                'completed_through': state['completed_through'],
+                'stats': {name: {field: values.tolist()
+                                 for field, values in stats.items()}
+                          for name, stats in state['stats'].items()}}
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(document, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """ State written by save_checkpoint. """
+    with open(path) as file:
+        document = json.load(file)
+    if document.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: unsupported checkpoint version "
+                         f"{document.get('version')}")
+    stats = {name: {field: np.array(values, dtype=np.int64 if field == 'n'
+                                    else np.float64)
+                    for field, values in fields.items()}
+             for name, fields in document['stats'].items()}
+    return {'config': document['config'],
+            'completed_through': document['completed_through'],
+            'stats': stats}
+
+
+def comparison_pairs(sc_1, sc_2, index_1, index_2):
+    """
+    The statistics_v01 comparisons of one batch of two spacecraft's data.
+
+    :param sc_1, sc_2: (data, model, subtr) arrays (N, 3) of each spacecraft.
+    :param index_1, index_2: Aligned sample indices (see
+    utils.match_times); the cross-spacecraft comparisons use only these.
+    :return: dict of name -> (x, y); the statistics are of x - y
+    """
+    # |B| of data, model and subtr of a spacecraft in one pass
+    data_1, model_1, subtr_1 = np.linalg.norm(np.stack(sc_1), axis=-1)
+    data_2, model_2, subtr_2 = np.linalg.norm(np.stack(sc_2), axis=-1)
+    return {'model_vs_obs_1': (model_1, data_1),
+            'model_vs_obs_2': (model_2, data_2),
+            'subtr_vs_obs_1': (subtr_1, data_1),
+            'subtr_vs_obs_2': (subtr_2, data_2),
+            'model_vs_model': (model_1[index_1], model_2[index_2]),
+            'subtr_vs_subtr': (subtr_1[index_1], subtr_2[index_2]),
+            'subtr_components': (sc_1[2][index_1], sc_2[2][index_2])}
+
+
+def compare_spacecraft(dir_1, dir_2, start_date, end_date, checkpoint=None,
+                       mode='exact', tolerance=None):
+    """
+    Streaming comparison of two spacecraft's model subtraction archives,
+    one day at a time.
+
+    :param dir_1, dir_2: Pickle directories or model_store directories.
+    :param start_date: First day (inclusive).
+    :param end_date:   Last day (inclusive).
+    :param checkpoint: Optional JSON path. Saved after every day; if it
+    exists, the days it already covers are skipped. The end date may be
+    moved later between runs, the other arguments must not change.
+    :param mode, tolerance: Time alignment of the two spacecraft, see
+    utils.match_times.
+    :return: state dict, see save_checkpoint; summarize(state['stats'][name])
+    gives the statistics
+    """
+    first_day = pd.Timestamp(start_date).normalize()
+    last_day = pd.Timestamp(end_date).normalize()
+    config = {'dir_1': os.path.abspath(dir_1),
+              'dir_2': os.path.abspath(dir_2),
+              'start_date': first_day.isoformat(), 'mode': mode,
+              'tolerance': None if tolerance is None else str(tolerance)}
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        if state['config'] != config:
+            raise ValueError(f"{checkpoint} was written for "
+                             f"{state['config']}, not {config}")
+    else:
+        state = {'config': config, 'completed_through': None, 'stats': {}}
+    if state['completed_through'] is not None:
+        first_day = pd.Timestamp(state['completed_through']) + \
+            pd.Timedelta(1, 'D')
+
+    for day in pd.date_range(first_day, last_day, freq='D'):
+        day_end = day + pd.Timedelta(1, 'D') - pd.Timedelta(1, 'ns')
+        time_1, *sc_1 = data_loader.load_and_trim_arrays(dir_1, day, day_end,
+                                                         workers=1)
+        time_2, *sc_2 = data_loader.load_and_trim_arrays(dir_2, day, day_end,
+                                                         workers=1)
+        index_1, index_2 = utils.match_times(time_1, time_2, mode, tolerance)
+        for name, (x, y) in comparison_pairs(sc_1, sc_2, index_1,
+                                             index_2).items():
+            batch = pair_moments(x, y)
+            stats = state['stats'].get(name)
+            state['stats'][name] = batch if stats is None else \
+                merge_pair_stats(stats, batch)
+
+        state['completed_through'] = day.date().isoformat()
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, state)
+    return state
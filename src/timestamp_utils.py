@@ -0,0 +1,408 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+"""
+Time conversions on int64/datetime64 arrays.
+
+The array functions (j2000_to_datetime64, unix_ms_to_datetime64, ...) take
+scalars or arrays of any shape and never loop in Python; datetime64[ns] is
+the common representation. The scalar-style functions further down
+(j2000_to_posix, doy_to_dom, ...) keep the signatures and return types of
+the original utils helpers, built on the array functions.
+"""
+
+J2000_EPOCH = dt.datetime(2000, 1, 1, 12, 0, 0)
+J2000_EPOCH_64 = np.datetime64('2000-01-01T12:00:00', 'ns')
+UNIX_EPOCH_64 = np.datetime64('1970-01-01T00:00:00', 'ns')
+SECONDS_POSIX_J2000 = 946728000.0
+# Correct for a POSIX day, even one with a leap second.
+N_SECONDS_DAY = 86400
+
+# CF time units, '<unit> since <epoch>'
+TIME_UNIT_STEPS = {'days': np.timedelta64(1, 'D'),
+                   'hours': np.timedelta64(1, 'h'),
+                   'minutes': np.timedelta64(1, 'm'),
+                   'seconds': np.timedelta64(1, 's'),
+                   'milliseconds': np.timedelta64(1, 'ms'),
+                   'microseconds': np.timedelta64(1, 'us')}
+
+
+def _offsets_to_datetime64(values, epoch, unit_ns):
+    """ epoch + values * unit_ns nanoseconds, with NaN/inf giving NaT. The
+    whole and fractional parts are scaled separately to keep ns precision
+    for float inputs. """
+    if np.ma.isMaskedArray(values):
+        values = values.astype(float).filled(np.nan)
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return epoch + (values.astype(np.int64) * unit_ns).astype(
+            'timedelta64[ns]')
+
+    values = values.astype(float)
+    finite = np.isfinite(values)
+    safe = np.where(finite, values, 0.0)
+    whole = np.floor(safe)
+    offsets = whole.astype(np.int64) * unit_ns + np.round(
+        (safe - whole) * unit_ns).astype(np.int64)
+    times = epoch + offsets.astype('timedelta64[ns]')
+    if not finite.all():
+        times = np.where(finite, times, np.datetime64('NaT'))
+    return times
+
+
+def j2000_to_datetime64(j2000_seconds):
+    """
+    :param j2000_seconds: Seconds since the J2000 epoch (2000-01-01 12:00),
+    scalar or array.
+    :return: datetime64[ns] array of the same shape (NaN gives NaT)
+    """
+    return _offsets_to_datetime64(j2000_seconds, J2000_EPOCH_64, 10 ** 9)
+
+
+def j2000_to_timestamp(j2000_seconds):
+    """
+    pandas flavour of j2000_to_datetime64, for the GOES time variables.
+
+    :return: pd.DatetimeIndex for array input, pd.Timestamp for a scalar
+    """
+    return pd.to_datetime(j2000_to_datetime64(j2000_seconds))
+
+
+def posix_to_datetime64(posix_seconds):
+    """ datetime64[ns] of POSIX (unix) seconds, scalar or array. """
+    return _offsets_to_datetime64(posix_seconds, UNIX_EPOCH_64, 10 ** 9)
+
+
+def unix_ms_to_datetime64(unix_ms):
+    """ datetime64[ns] of unix milliseconds (DSCOVR 'time'), scalar or
+    array. """
+    return _offsets_to_datetime64(unix_ms, UNIX_EPOCH_64, 10 ** 6)
+
+
+def datetime64_to_j2000(times):
+    """
+    :param times: datetime64 array, DatetimeIndex, datetime or list of them.
+    :return: float seconds since the J2000 epoch (NaT gives NaN)
+    """
+    if not (isinstance(times, np.ndarray) and times.dtype.kind == 'M'):
+        times = pd.to_datetime(times)
+    times = np.asarray(times, dtype='datetime64[ns]')
+    return (times - J2000_EPOCH_64) / np.timedelta64(1, 's')
+
+
+def datetime64_to_posix(times):
+    """ Float POSIX seconds of datetime64 values (NaT gives NaN). """
+    return datetime64_to_j2000(times) + SECONDS_POSIX_J2000
+
+
+def to_datetime_objects(times):
+    """
+    datetime.datetime objects (microsecond resolution) of datetime64 values,
+    converted in C rather than per element.
+
+    :return: object array of the same shape; NaT gives None
+    """
+    return np.asarray(times).astype('datetime64[us]').astype(object)
+
+
+def parse_time_units(units):
+    """
+    Step and epoch of CF time units, e.g. 'seconds since 2000-01-01 12:00:00'.
+
+    :return: (step as timedelta64, epoch as datetime64[ns])
+    """
+    unit, _, epoch = units.partition(' since ')
+    unit = unit.strip().lower()
+    if not unit.endswith('s'):
+        unit += 's'
+    if unit not in TIME_UNIT_STEPS or not epoch.strip():
+        raise ValueError(f"Unsupported time units: '{units}'")
+    epoch = pd.Timestamp(epoch.strip())
+    if epoch.tzinfo is not None:
+        epoch = epoch.tz_convert(None)
+    return TIME_UNIT_STEPS[unit], np.datetime64(epoch, 'ns')
+
+
+def cf_to_datetime64(values, units):
+    """
+    datetime64[ns] of numeric CF times, e.g. a NetCDF 'time' variable.
+
+    :param values: Numeric times, scalar or array.
+    :param units:  CF units string, '<unit> since <epoch>'.
+    """
+    step, epoch = parse_time_units(units)
+    return _offsets_to_datetime64(values, epoch,
+                                  int(step / np.timedelta64(1, 'ns')))
+
+
+# pandas >= 2 infers one format from the first string unless told the
+# strings are ISO 8601 (e.g. a mix of 'Z' and '+01:00' designators)
+_ISO8601_FORMAT = {'format': 'ISO8601'} \
+    if int(pd.__version__.split('.')[0]) >= 2 else {}
+
+
+def iso8601_to_datetime64(iso8601):
+    """
+    datetime64[ns] of ISO 8601 strings, e.g. '2010-04-05T09:30:00.0Z'. Time
+    zone designators are converted to UT.
+
+    :param iso8601: String or array/list of strings.
+    """
+    times = pd.to_datetime(np.atleast_1d(np.asarray(iso8601, dtype=str)),
+                           utc=True, **_ISO8601_FORMAT).tz_convert(None)
+    times = times.to_numpy(dtype='datetime64[ns]')
+    return times.reshape(np.shape(iso8601))
+
+
+def datetime64_to_iso8601(times, unit='us'):
+    """ ISO 8601 strings (UT, no designator) of datetime64 values. """
+    return np.datetime_as_string(np.asarray(times, dtype='datetime64[ns]'),
+                                 unit=unit)
+
+
+def day_of_year(times):
+    """ Day of year (1-366) of datetime64 values, as an int array. """
+    days = np.asarray(times, dtype='datetime64[ns]').astype('datetime64[D]')
+    return (days - days.astype('datetime64[Y]')).astype(int) + 1
+
+
+def doy_to_datetime64(year, doy):
+    """
+    datetime64[ns] of the start (00 UT) of a day of year.
+
+    :param year: Year(s), e.g. 2000.
+    :param doy:  Day(s) of year, 1-366.
+    """
+    years = (np.asarray(year) - 1970).astype('timedelta64[Y]')
+    start = np.datetime64('1970', 'Y') + years
+    return (start.astype('datetime64[D]') +
+            (np.asarray(doy) - 1).astype('timedelta64[D]')
+            ).astype('datetime64[ns]')
+
+
+def day_timestamps(year, month, date, cadence_seconds):
+    """
+    J2000 seconds of every sample of a UT day at a fixed cadence.
+
+    :param year, month, date: The day (UT).
+    :param cadence_seconds:   Sample spacing in seconds, e.g. 0.1 for 10 Hz.
+    :return: float array of N_SECONDS_DAY / cadence_seconds timestamps
+    """
+    start = (dt.datetime(year, month, date) - J2000_EPOCH).total_seconds()
+    n_samples = int(round(N_SECONDS_DAY / cadence_seconds))
+    return start + np.arange(n_samples) * np.float64(cadence_seconds)
+
+
+def timestamp_constants():
+    """
+    Provides certain constants related to time stamps.
+
+    Returns
+    -------
+    J2000_EPOCH : datetime.datetime
+        J2000 epoch as a datetime object.
+    SECONDS_POSIX_J2000 : float
+        Number of seconds from POSIX time to J2000 epoch.
+    N_SECONDS_DAY : int
+        Number of seconds in a POSIX day.
+    """
+    return J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY
+
+
+def j2000_to_posix(j2000_seconds):
+    """
+    Converts vector of J2000 time stamps (in seconds) to Datetime POSIX
+    timestamps
+    """
+    return to_datetime_objects(j2000_to_datetime64(j2000_seconds))
+
+
+def j2000_to_posix_0d(j2000_seconds):
+    """DESCRIPTION:
+      Converts J2000 time stamp scalar (in seconds) to Datetime POSIX timestamp
+    MODULES:
+      datetime
+    INPUTS:
+      j2000_seconds: seconds since J2000 epoch
+    OUTPUTS:
+      datetime"""
+    return to_datetime_objects(j2000_to_datetime64(j2000_seconds)).item()
+
+
+def j2000_1s_timestamps(year, month, date, N_REPORTS):
+    """DESCRIPTION:
+      Creates 1-second-cadence timestamps for the given date in a 2-d array
+      with one dimension being the number of seconds in N_REPORTS.  Timestamps
+      represent the number of seconds since the J2000 epoch.
+    MODULES:
+      datetime, numpy
+    INPUTS:
+      year, month, date: integers describing date (UT)
+      N_REPORTS: number of seconds in L1b record -- likely 30 or 60
+    OUTPUTS:
+      timestamp_array:  n_files x N_REPORTS NumPy array containing timestamps
+      measured in number of seconds since 01 Jan 2000, 1200 UT"""
+    return day_timestamps(year, month, date, 1).reshape(-1, N_REPORTS)
+
+
+def j2000_p1s_timestamps(year, month, date, N_REPORTS, SAMPLES_PER_REPORT):
+    """DESCRIPTION:
+      Creates 0.1-second-cadence timestamps for the given date in a 3-d array
+      with one dimension being the number of seconds in N_REPORTS.  Timestamps
+      represent the number of seconds since the J2000 epoch.
+    MODULES:
+      datetime, numpy
+    INPUTS:
+      year, month, date: integers describing date (UT)
+      N_REPORTS: number of seconds in L1b record -- likely 60
+      SAMPLES_PER_REPORT: number of samples in one second: likely 10
+    OUTPUTS:
+      timestamp_array:  n_files x N_REPORTS x SAMPLES_PER_REPORT NumPy array
+      containing timestamps measured in number of seconds since 01 Jan 2000,
+      1200 UT"""
+    timestamps = day_timestamps(year, month, date, 1 / SAMPLES_PER_REPORT)
+    return timestamps.reshape(-1, N_REPORTS, SAMPLES_PER_REPORT)
+
+
+def create_j2000_timestamps(year, month, date, n_seconds_cadence):
+    """
+    Creates n_seconds_cadence timestamps for a given date.
+
+    Parameters
+    ----------
+    year : int
+        The year.
+    month : int
+        The month.
+    date : int
+        The day of the month.
+    n_seconds_cadence : int
+        Cadence in number of seconds.
+
+    Returns
+    -------
+    timestamp_array : numpy.ndarray
+        Array containing timestamps measured in seconds since 01 Jan 2000,
+        1200 UT.
+    """
+    return day_timestamps(year, month, date, n_seconds_cadence)
+
+
+def posix_to_j2000(year, month, day, hour, min, sec):
+    """DESCRIPTION:
+      Converts Datetime POSIX timestamp to J2000 time stamp (in seconds)
+    MODULES:
+      datetime
+    INPUTS:
+      year, month, day, hour, min, sec: UT date and time
+    OUTPUTS:
+      j2000_seconds: seconds since J2000 epoch"""
+    return (dt.datetime(year, month, day, hour, min, sec) -
+            J2000_EPOCH).total_seconds()
+
+
+def iso8601_to_datetime(iso8601):
+    """DESCRIPTION:
+      Converts an ISO8601 string (e.g. '2010-04-05T09:30:00.0Z') to a datetime
+      object
+    MODULES:
+      datetime
+    INPUTS:
+      iso8601: string
+    OUTPUTS:
+      dt: datetime object
+      j2000_sec: seconds since J2000 epoch"""
+    time = iso8601_to_datetime64(iso8601)
+    return to_datetime_objects(time).item(), float(datetime64_to_j2000(time))
+
+
+def doy_to_dom(year, doy):
+    """DESCRIPTION:
+      This function converts day of year (doy) and year to number of month and
+      day of month (dom)
+    MODULES:
+      NumPy
+    INPUTS:
+      year: 4-digit year, e.g. 2000
+      doy: 1-366
+    OUTPUTS:
+      month: 1-12
+      dom: 1-31"""
+    day = doy_to_datetime64(year, doy).astype('datetime64[D]')
+    month = day.astype('datetime64[M]')
+    return (int(month.astype(int) % 12 + 1),
+            int((day - month.astype('datetime64[D]')).astype(int) + 1))
+
+
+def dom_to_doy(year, month, dom):
+    """DESCRIPTION:
+      This function converts month and day of month (dom) and year to day of
+      year (doy)
+    MODULES:
+      NumPy
+    INPUTS:
+      year: 4-digit year, e.g. 2000
+      month: 1-12
+      dom: 1-31
+    OUTPUTS:
+      doy: 1-366"""
+    return int(day_of_year(np.datetime64(dt.date(year, month, dom))))
+
+
+def doy_to_j2000(year, doy):
+    """DESCRIPTION:
+      This function converts day of year (doy) and year to seconds since J2000
+      epoch at 00 UT
+    MODULES:
+      NumPy, datetime
+    INPUTS:
+      year: 4-digit year, e.g. 2000
+      doy: 1-366
+    OUTPUTS:+
+      j2000_start: seconds since J2000 epoch at start of given doy"""
+    return float(datetime64_to_j2000(doy_to_datetime64(year, doy)))
+
+
+def doy_to_j2000_day(year, doy):
+    """DESCRIPTION:
+      Determines number of integral days since J2000 epoch and
+      milliseconds at start of current UT day.  To simulate L0 header times.
+    MODULES:
+      NumPy, datetime
+    INPUTS:
+      year: 4-digit year, e.g. 2000
+      doy: 1-366
+    OUTPUTS:+
+      j2000_start: seconds since J2000 epoch at start of given doy"""
+    j2000_start = doy_to_j2000(year, doy)
+
+    n_day_j2k = np.int64(j2000_start / N_SECONDS_DAY)
+    ms_j2k = (j2000_start - n_day_j2k * N_SECONDS_DAY) * 1000.0
+
+    return n_day_j2k, ms_j2k
+
+
+def j2000_to_doy(j2000_seconds):
+    """DESCRIPTION:
+      This function converts seconds since J2000 epoch to day of year
+    MODULES:
+      NumPy, datetime
+    INPUTS:
+      j2000_seconds: seconds since J2000 epoch
+    OUTPUTS:
+      doy: day of year, 1-366"""
+    return np.int32(day_of_year(j2000_to_datetime64(j2000_seconds)))
+
+
+def j2000_to_iso8601(j2000_seconds):
+    """DESCRIPTION:
+      This function converts a floating point scalar quantifying the number of
+      seconds since J2000 epoch to an ISO 8601 string (UT).
+    MODULES:
+      datetime
+    INPUTS:
+      j2000_seconds: seconds since J2000 epoch, float
+    OUTPUTS:
+      iso8601: ISO8601 string representing UT"""
+    return j2000_to_posix_0d(j2000_seconds).isoformat()
@@ -3,13 +3,21 @@ import datetime as dt
 from typing import List, Tuple
 import pandas as pd
 import re
-import utils as tsu
-import requests
-from bs4 import BeautifulSoup
+import timestamp_utils as tsu
+import grouped_stats
+# Time conversions moved to timestamp_utils; re-exported for existing callers
+from timestamp_utils import timestamp_constants, j2000_to_posix, \
+    j2000_to_posix_0d, j2000_1s_timestamps, j2000_p1s_timestamps, \
+    create_j2000_timestamps, posix_to_j2000, iso8601_to_datetime, \
+    doy_to_dom, dom_to_doy, doy_to_j2000, doy_to_j2000_day, j2000_to_doy, \
+    j2000_to_iso8601
 import os
 import gzip
 import shutil
 import time
+import bisect
+import itertools
+from collections import deque
 
 
 def download_and_extract_dscovr_data(instr, start_date, end_date, base_download_dir):
@@ -22,6 +30,10 @@ def download_and_extract_dscovr_data(instr, start_date, end_date, base_download_
     end_date (str): End date in 'YYYY-MM-DD' format.
     base_download_dir (str): Base directory to store downloaded and extracted data.
     """
+    # Web client imports are deferred, only this function needs them
+    import requests
+    from bs4 import BeautifulSoup
+
     start = dt.datetime.strptime(start_date, '%Y-%m-%d')
     end = dt.datetime.strptime(end_date, '%Y-%m-%d')
     current = start
@@ -146,29 +158,309 @@ def calc_hourly_stddev(datetime_list, subtr_list, kp_mask=None):
     subtr_list (list): List of subtraction data.
     kp_mask (list, optional): List of boolean values indicating Kp values
     over threshold. Default is None.
-        If provided, only data points where kp_mask is True will be used.
+        If provided, data points where kp_mask is True are left out.
 
     Returns
     -------
     hourly_std_dev (pd.Series): Hourly standard deviation of subtraction data.
 
     """
-    # Create a pandas DataFrame with datetime as the index
-    df = pd.DataFrame({'datetime': datetime_list, 'subtraction': subtr_list})
-    df.set_index('datetime', inplace=True)
+    stats = grouped_stats.grouped_stats(datetime_list, subtr_list,
+                                        freqs=('H',), mask=kp_mask)['H']
+    hourly_std_dev = pd.Series(stats['std'], name='subtraction',
+                               index=pd.DatetimeIndex(stats['time'], freq='H',
+                                                      name='datetime'))
 
-    # apply the Kp mask
-    if kp_mask is not None:
-        df['subtraction'] = df['subtraction'].mask(kp_mask)
+    return hourly_std_dev
 
-    # resample data to hourly freq, take std dev
-    hourly_std_dev = df['subtraction'].resample('H').std()
 
-    return hourly_std_dev
+ALIGN_MODES = ('exact', 'nearest', 'backward', 'forward')
+_UNIX_EPOCH = dt.datetime(1970, 1, 1)
+_ONE_MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def _time_keys(times):
+    """
+    Sortable keys for a time sequence: int64 nanoseconds for datetime-like
+    input (datetime objects, datetime64, pandas timestamps), float64 for
+    numeric times such as J2000 seconds. Missing times (NaT/NaN) are
+    returned as a boolean mask.
+    """
+    if isinstance(times, (list, tuple)) and times and \
+            isinstance(times[0], dt.datetime):
+        # np.asarray probes every element of a datetime list, fromiter does
+        # not
+        values = np.fromiter(times, object, len(times))
+    else:
+        values = np.asarray(times)
+    if values.dtype.kind in 'iuf':
+        keys = values.astype(np.float64)
+        return keys, np.isnan(keys)
+    if values.dtype.kind == 'O':
+        try:
+            # Naive datetime objects: integer arithmetic is several times
+            # faster than pandas' per-object parsing
+            values = np.fromiter(
+                ((t - _UNIX_EPOCH) // _ONE_MICROSECOND for t in values.ravel()),
+                np.int64, values.size).astype('datetime64[us]')
+        except TypeError:
+            values = np.asarray(pd.to_datetime(values.ravel()))
+    elif values.dtype.kind != 'M':
+        values = np.asarray(pd.to_datetime(values.ravel()))
+    values = values.astype('datetime64[ns]')
+    return values.view(np.int64), np.isnat(values)
+
+
+def _tolerance_key(tolerance, keys):
+    if tolerance is None:
+        return None
+    if keys.dtype.kind == 'f':
+        return float(tolerance)
+    if isinstance(tolerance, (int, float, np.integer, np.floating)):
+        # Plain numbers are seconds for datetime-like times
+        return int(round(tolerance * 1e9))
+    return pd.Timedelta(tolerance).value
+
+
+def match_times(reference, other, mode='exact', tolerance=None):
+    """
+    Pair each reference time with a sample of another time series.
+
+    The join is a binary search (np.searchsorted) of the reference times in
+    the sorted times of the other series, so it costs O(N log M) without
+    Python loops. Unsorted input is sorted internally.
+
+    Parameters
+    ----------
+    reference : array-like
+        Times to match (datetime objects, datetime64 or numeric, e.g. J2000
+        seconds).
+    other : array-like
+        Times of the series to match against, same kind as reference.
+    mode : str
+        'exact'    - identical timestamps only,
+        'nearest'  - closest sample (the earlier one on a tie),
+        'backward' - last sample at or before the reference time,
+        'forward'  - first sample at or after the reference time.
+        For repeated timestamps in other, 'exact' and 'backward' pick the
+        last and 'forward' the first of them.
+    tolerance : timedelta-like, float or None
+        Largest allowed |reference - other| for the inexact modes (a
+        pd.Timedelta, timedelta or string like '500ms'; plain numbers are
+        seconds for datetime-like times and in the units of the times
+        otherwise). None means no limit.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Index arrays (reference_index, other_index) of the matched pairs,
+        in reference order. Unmatched reference times are left out.
+    """
+    if mode not in ALIGN_MODES:
+        raise ValueError(f"mode must be one of {ALIGN_MODES}, got {mode!r}")
+    ref_keys, ref_missing = _time_keys(reference)
+    other_keys, other_missing = _time_keys(other)
+    if ref_keys.dtype != other_keys.dtype and len(ref_keys) and \
+            len(other_keys):
+        raise TypeError("Cannot match datetime-like and numeric times")
+    tolerance = _tolerance_key(tolerance, other_keys)
+
+    other_index = np.flatnonzero(~other_missing)
+    other_keys = other_keys[other_index]
+    if np.any(other_keys[1:] < other_keys[:-1]):
+        order = np.argsort(other_keys, kind='stable')
+        other_keys, other_index = other_keys[order], other_index[order]
+    n_other = len(other_keys)
+    if not n_other:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+
+    if mode == 'forward':
+        pos = np.searchsorted(other_keys, ref_keys, side='left')
+        valid = pos < n_other
+    else:
+        pos = np.searchsorted(other_keys, ref_keys, side='right') - 1
+        valid = pos >= 0
+    if mode == 'nearest':
+        after = np.minimum(pos + 1, n_other - 1)
+        has_after = pos + 1 < n_other
+        take_after = has_after & (
+            ~valid | (np.abs(other_keys[after] - ref_keys) <
+                      np.abs(ref_keys - other_keys[np.maximum(pos, 0)])))
+        pos = np.where(take_after, after, pos)
+        valid |= has_after
+    valid &= ~ref_missing
+
+    ref_index = np.flatnonzero(valid)
+    pos = pos[ref_index]
+    if mode == 'exact':
+        keep = other_keys[pos] == ref_keys[ref_index]
+    elif tolerance is not None:
+        keep = np.abs(other_keys[pos] - ref_keys[ref_index]) <= tolerance
+    else:
+        keep = slice(None)
+    return ref_index[keep], other_index[pos[keep]]
+
+
+def align_indices(times, mode='exact', tolerance=None, reference=None):
+    """
+    Index arrays that align any number of time series on the samples of a
+    reference series that have a match in every other series.
+
+    Parameters
+    ----------
+    times : List or Dict of array-like
+        Time arrays, e.g. one per spacecraft.
+    mode, tolerance :
+        As for match_times, applied between the reference and each series.
+    reference : int, key or None
+        Position (list) or key (dict) of the reference series, default the
+        first one.
+
+    Returns
+    -------
+    List or Dict of np.ndarray
+        One index array per series (same container type and keys as times),
+        all of equal length, such that data[i][indices[i]] are aligned.
+    """
+    keys = list(times) if isinstance(times, dict) else range(len(times))
+    if reference is None:
+        reference = keys[0]
+    ref_times = np.asarray(times[reference])
+    ref_index = np.arange(len(ref_times))
+    matched = {}
+    for key in keys:
+        if key == reference:
+            continue
+        ref_pos, other_index = match_times(ref_times[ref_index], times[key],
+                                           mode, tolerance)
+        ref_index = ref_index[ref_pos]
+        matched = {k: index[ref_pos] for k, index in matched.items()}
+        matched[key] = other_index
+    matched[reference] = ref_index
+
+    if isinstance(times, dict):
+        return {key: matched[key] for key in keys}
+    return [matched[key] for key in keys]
+
+
+RESAMPLE_METHODS = ('nearest', 'linear', 'previous')
+
+
+def resample_to_times(times, values, target_times, method='linear',
+                      max_gap=None):
+    """
+    Resample a time series onto other sample times, e.g. the solar wind
+    drivers onto a satellite's time axis.
+
+    Every target time is located in the source times with one
+    np.searchsorted call per component, so the cost is O(M log N) without
+    Python loops. NaN source values are treated as missing samples, so each
+    component is resampled from its own valid samples.
+
+    Parameters
+    ----------
+    times : array-like
+        Source sample times (datetime objects, datetime64 or numeric), any
+        order.
+    values : array-like
+        Source values, (N) or (N, components).
+    target_times : array-like
+        Times to resample onto, same kind as times.
+    method : str
+        'nearest'  - closest valid sample (the earlier one on a tie),
+        'linear'   - linear interpolation between the valid samples on
+                     either side (no extrapolation),
+        'previous' - last valid sample at or before the target time (hold
+                     last value).
+    max_gap : timedelta-like, float or None
+        Largest gap to bridge, as the tolerance of match_times: for
+        'nearest' and 'previous' the largest |target - sample|, for
+        'linear' the largest spacing of the two samples interpolated
+        between. None means no limit.
+
+    Returns
+    -------
+    np.ndarray
+        Float array (M) or (M, components); NaN where no sample qualifies.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"method must be one of {RESAMPLE_METHODS}, got "
+                         f"{method!r}")
+    keys, missing = _time_keys(times)
+    target_keys, target_missing = _time_keys(target_times)
+    if keys.dtype != target_keys.dtype and len(keys) and len(target_keys):
+        raise TypeError("Cannot resample between datetime-like and numeric "
+                        "times")
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) != len(keys):
+        raise ValueError(f"{len(keys)} times but {len(values)} values")
+    one_d = values.ndim == 1
+    values = values[:, None] if one_d else values.reshape(
+        len(values), int(np.prod(values.shape[1:])))
+    if not len(keys):
+        # No source samples (e.g. an empty propagation): nothing qualifies,
+        # and the float keys of [] say nothing about the tolerance type
+        result = np.full((len(target_keys), values.shape[1]), np.nan)
+        return result[:, 0] if one_d else result
+    max_gap = _tolerance_key(max_gap, keys)
+
+    if np.any(keys[1:] < keys[:-1]):
+        order = np.argsort(keys, kind='stable')
+        keys, missing, values = keys[order], missing[order], values[order]
+
+    result = np.full((len(target_keys), values.shape[1]), np.nan)
+    for column in range(values.shape[1]):
+        valid = ~missing & ~np.isnan(values[:, column])
+        source_keys = keys[valid]
+        source_values = values[valid, column]
+        n_source = len(source_keys)
+        if not n_source:
+            continue
+
+        # Last sample at or before each target time
+        before = np.searchsorted(source_keys, target_keys, side='right') - 1
+        has_before = before >= 0
+        before = np.maximum(before, 0)
+        if method == 'previous':
+            pos, found = before, has_before
+            distance = target_keys - source_keys[pos]
+        else:
+            after = np.minimum(before + 1, n_source - 1)
+            has_after = np.where(has_before, before + 1, 0) < n_source
+            after = np.where(has_before, after, 0)
+            if method == 'nearest':
+                take_after = has_after & (
+                    ~has_before | (np.abs(source_keys[after] - target_keys) <
+                                   np.abs(target_keys - source_keys[before])))
+                pos = np.where(take_after, after, before)
+                found = has_before | has_after
+                distance = np.abs(target_keys - source_keys[pos])
+            else:
+                exact = has_before & (source_keys[before] == target_keys)
+                found = exact | (has_before & has_after)
+                spacing = source_keys[after] - source_keys[before]
+                distance = np.where(exact, 0, spacing)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    fraction = np.where(
+                        exact | (spacing == 0), 0.0,
+                        (target_keys - source_keys[before]) /
+                        np.where(spacing == 0, 1, spacing))
+                interpolated = source_values[before] + fraction * (
+                    source_values[after] - source_values[before])
+        found &= ~target_missing
+        if max_gap is not None:
+            found &= distance <= max_gap
+        if method == 'linear':
+            result[:, column] = np.where(found, interpolated, np.nan)
+        else:
+            result[:, column] = np.where(found, source_values[pos], np.nan)
+
+    return result[:, 0] if one_d else result
 
 
 def align_datasets(time_list_1: List, time_list_2: List,
-                   data_1: List[float], data_2: List[float]) -> Tuple[
+                   data_1: List[float], data_2: List[float],
+                   mode: str = 'exact', tolerance=None) -> Tuple[
     np.ndarray, np.ndarray]:
     """
     Align two datasets based on their timestamps and return the paired data.
@@ -176,34 +468,26 @@ def align_datasets(time_list_1: List, time_list_2: List,
     Parameters
     ----------
     time_list_1 : List[dt.datetime]
-        Timestamps of the first dataset.
+        Timestamps of the first dataset (the reference).
     time_list_2 : List[dt.datetime]
         Timestamps of the second dataset.
     data_1 : List[float]
-        Data points of the first dataset.
+        Data points of the first dataset, scalars or (N, ...) arrays.
     data_2 : List[float]
         Data points of the second dataset.
+    mode : str
+        'exact' (default), 'nearest', 'backward' or 'forward', see
+        match_times.
+    tolerance : timedelta-like, float or None
+        Largest allowed time difference for the inexact modes.
 
     Returns
     -------
     Tuple[np.ndarray, np.ndarray]
         Two numpy arrays with aligned data from both datasets.
     """
-    # Assuming the timestamps are already datetime objects and the lists are
-    # sorted
-    # Create a dictionary from time_list_2 to its corresponding data for
-    # quick lookup
-    data_dict_2 = {time: data for time, data in zip(time_list_2, data_2)}
-
-    # Align the datasets
-    aligned_data_1 = []
-    aligned_data_2 = []
-    for time, data in zip(time_list_1, data_1):
-        if time in data_dict_2:
-            aligned_data_1.append(data)
-            aligned_data_2.append(data_dict_2[time])
-
-    return np.array(aligned_data_1), np.array(aligned_data_2)
+    index_1, index_2 = match_times(time_list_1, time_list_2, mode, tolerance)
+    return np.asarray(data_1)[index_1], np.asarray(data_2)[index_2]
 
 
 def calculate_std_dev(dataset1, dataset2):
@@ -455,29 +739,83 @@ def mean_and_std_dev(data_1, data_2):
     return mean_diff, std_dev
 
 
-def find_data_errors(data, window=5, threshold=5):
+# Windows up to this size use the sliding-window (partition) version of
+# find_data_errors, larger ones the streaming sorted-window version
+MAD_VECTORIZED_MAX_WINDOW = 101
+# Elements per sliding-window chunk, bounds the temporary memory
+MAD_CHUNK_ELEMENTS = 2 ** 22
+
+
+def find_data_errors(data, window=5, threshold=5, method='auto',
+                     return_mask=False):
     """
     Finds erroneous data points by flagging outliers that are a certain number
     of median absolute deviations away from the median of their neighbors.
 
+    The windows at the edges are padded with the median of the whole series.
+    Windows with a zero MAD, or containing NaN, never flag a point.
+
     Parameters:
-    data (np.array): The dataset to be checked for errors.
+    data (np.array): The dataset to be checked for errors, 1D or (N, k); the
+                     columns of 2D data (e.g. the three B components) are
+                     screened independently.
     window (int): The number of neighboring points to consider for each check.
     threshold (float): The number of median absolute deviations from the median
                        which will be considered an outlier.
+    method (str): 'vectorized' (sliding-window medians, in chunks),
+                  'streaming' (running sorted window, O(N log window)
+                  comparisons, suited to large windows), 'loop' (the original
+                  per-sample implementation) or 'auto' (default: vectorized
+                  up to MAD_VECTORIZED_MAX_WINDOW, streaming above).
+    return_mask (bool): Return the boolean outlier mask, shaped like data,
+                        instead of indices.
 
     Returns:
-    List[int]: A list of indices where the data points are considered outliers.
+    List[int]: A list of indices where the data points are considered outliers
+               (for 2D data, the rows where any column is an outlier).
     """
 
     if window % 2 == 0 or window < 1:
         raise ValueError("Window size must be odd and greater than 0")
+    if method == 'auto':
+        method = 'vectorized' if window <= MAD_VECTORIZED_MAX_WINDOW \
+            else 'streaming'
+    column_mask = {'vectorized': _rolling_mad_mask,
+                   'streaming': _rolling_mad_mask_streaming,
+                   'loop': _rolling_mad_mask_loop}.get(method)
+    if column_mask is None:
+        raise ValueError(f"Unknown method '{method}'")
+
+    data = np.asarray(data)
+    if not len(data):
+        mask = np.zeros(data.shape, dtype=bool)
+    elif data.ndim == 1:
+        mask = column_mask(data, window, threshold)
+    elif data.ndim == 2:
+        mask = np.column_stack([column_mask(data[:, i], window, threshold)
+                                for i in range(data.shape[1])])
+    else:
+        raise ValueError("data must be 1D or 2D")
+
+    if return_mask:
+        return mask
+    if mask.ndim == 2:
+        mask = mask.any(axis=1)
+    return np.flatnonzero(mask).tolist()
 
+
+def _padded_for_mad(data, window):
+    """ Data padded by window // 2 median values on both sides, as float. """
+    return np.pad(data, (window // 2, window // 2),
+                  mode='median').astype(float)
+
+
+def _rolling_mad_mask_loop(data, window, threshold):
+    """ Original per-sample find_data_errors, as a boolean mask. """
     # Pad the data at the beginning and end to handle the window at edges
     padded_data = np.pad(data, (window // 2, window // 2), mode='median')
 
-    # List to hold the indices of outliers
-    outliers = []
+    mask = np.zeros(len(data), dtype=bool)
 
     # Calculate the median and median absolute deviation
     for i in range(window // 2, len(data) + window // 2):
@@ -494,9 +832,136 @@ def find_data_errors(data, window=5, threshold=5):
         if mad == 0:  # Avoid division by zero
             continue
         if np.abs(data[i - window // 2] - local_median) / mad > threshold:
-            outliers.append(i - window // 2)
+            mask[i - window // 2] = True
+
+    return mask
+
+
+def _rolling_mad_mask(data, window, threshold):
+    """ find_data_errors mask from medians of sliding-window views. """
+    padded = _padded_for_mad(data, window)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    values = padded[window // 2: window // 2 + len(data)]
 
-    return outliers
+    mask = np.zeros(len(data), dtype=bool)
+    chunk = max(1, MAD_CHUNK_ELEMENTS // window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for start in range(0, len(data), chunk):
+            block = windows[start:start + chunk]
+            local_median = np.median(block, axis=1)
+            mad = np.median(np.abs(block - local_median[:, None]), axis=1)
+            deviation = np.abs(values[start:start + chunk] - local_median)
+            mask[start:start + chunk] = (mad != 0) & (deviation / mad >
+                                                      threshold)
+    return mask
+
+
+def _rolling_mad_mask_streaming(data, window, threshold):
+    """ find_data_errors mask from rolling_mad_outliers. """
+    pad_value = _padded_for_mad(data, 3)[0] if len(data) else np.nan
+    mask = np.zeros(len(data), dtype=bool)
+    mask[list(rolling_mad_outliers(data.astype(float), window, threshold,
+                                   pad_value))] = True
+    return mask
+
+
+def _kth_absolute_deviation(ordered, middle, k):
+    """
+    k-th smallest (0-based) |x - m| over a sorted list, m = ordered[middle],
+    in O(log len) steps: the deviations left of the median, read backwards,
+    and right of it are two sorted sequences.
+    """
+    median = ordered[middle]
+    n_left, n_right = middle + 1, len(ordered) - middle - 1
+
+    def left(i):
+        return median - ordered[middle - i]
+
+    def right(j):
+        return ordered[middle + 1 + j] - median
+
+    low, high = max(0, k + 1 - n_right), min(k + 1, n_left)
+    while low < high:
+        n_from_left = (low + high) // 2
+        if k + 1 - n_from_left > 0 and \
+                right(k - n_from_left) > left(n_from_left):
+            low = n_from_left + 1
+        else:
+            high = n_from_left
+    n_from_right = k + 1 - low
+    candidates = []
+    if low > 0:
+        candidates.append(left(low - 1))
+    if n_from_right > 0:
+        candidates.append(right(n_from_right - 1))
+    return max(candidates)
+
+
+def rolling_mad_outliers(values, window=5, threshold=5, pad_value=np.nan):
+    """
+    Streaming version of find_data_errors: yields the index of each outlier
+    while consuming the values one at a time, keeping only a window of them.
+
+    The window is kept as a sorted list, so each step costs a binary search
+    for the median and for the MAD (the k-th smallest absolute deviation of
+    a sorted window) plus a short memmove, instead of two full medians.
+
+    Parameters:
+    values (iterable of float): The series to be checked, e.g. a generator
+                                over a long file.
+    window (int): Odd number of neighboring points in each check.
+    threshold (float): Number of MADs from the median to flag a point.
+    pad_value (float): Value padding the windows at both edges;
+                       find_data_errors uses the median of the whole series.
+
+    Yields:
+    int: Indices of the outliers, in increasing order.
+    """
+    if window % 2 == 0 or window < 1:
+        raise ValueError("Window size must be odd and greater than 0")
+    half = window // 2
+
+    current = deque()
+    ordered = []
+    n_nan = 0
+
+    def push(value):
+        nonlocal n_nan
+        current.append(value)
+        if value != value:
+            n_nan += 1
+        else:
+            bisect.insort(ordered, value)
+
+    def pop():
+        nonlocal n_nan
+        value = current.popleft()
+        if value != value:
+            n_nan -= 1
+        else:
+            del ordered[bisect.bisect_left(ordered, value)]
+
+    def check():
+        if n_nan:
+            return False
+        local_median = ordered[half]
+        mad = _kth_absolute_deviation(ordered, half, half)
+        if mad == 0:
+            return False
+        return abs(current[half] - local_median) / mad > threshold
+
+    # Every push that fills the window completes the check of one index
+    index = 0
+    padded = itertools.chain(itertools.repeat(pad_value, half),
+                             (float(value) for value in values),
+                             itertools.repeat(pad_value, half))
+    for value in padded:
+        push(value)
+        if len(current) == window:
+            if check():
+                yield index
+            index += 1
+            pop()
 
 
 def mkticks(first_j2000_sec, num_input_files):
@@ -582,361 +1047,3 @@ def fix_data_error_with_nan(data, index):
     # Set the erroneous point to NaN
     data[index] = np.nan
     return data
-
-def timestamp_constants():
-    """
-    Provides certain constants related to time stamps.
-
-    Returns
-    -------
-    J2000_EPOCH : datetime.datetime
-        J2000 epoch as a datetime object.
-    SECONDS_POSIX_J2000 : float
-        Number of seconds from POSIX time to J2000 epoch.
-    N_SECONDS_DAY : int
-        Number of seconds in a POSIX day.
-    """
-    N_SECONDS_DAY = 86400  # Correct for a POSIX day, even one with a leap
-    # second.
-    J2000_EPOCH = dt.datetime(2000, 1, 1, 12, 0, 0)
-    SECONDS_POSIX_J2000 = 946728000.0
-
-    return J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY
-
-
-def j2000_to_posix(j2000_seconds):
-    """
-    Converts vector of J2000 time stamps (in seconds) to Datetime POSIX
-    timestamps
-    """
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = timestamp_constants()
-
-    dt_list = []
-
-    posix_seconds = SECONDS_POSIX_J2000 + j2000_seconds
-    npts = len(posix_seconds)
-
-    for i in range(npts):
-        # dt64 = np.datetime64(datetime.datetime.utcfromtimestamp(
-        #     posix_seconds[i]))
-        # dt_list.append(dt64)
-        dtt = dt.datetime.utcfromtimestamp(posix_seconds[i])
-        dt_list.append(dtt)
-
-    return np.array(dt_list)
-
-
-def j2000_to_posix_0d(j2000_seconds):
-    """DESCRIPTION:
-      Converts J2000 time stamp scalar (in seconds) to Datetime POSIX timestamp
-    MODULES:
-      datetime
-    INPUTS:
-      j2000_seconds: seconds since J2000 epoch
-    OUTPUTS:
-      datetime"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = timestamp_constants()
-
-    posix_seconds = SECONDS_POSIX_J2000 + j2000_seconds
-
-    dtt = dt.datetime.utcfromtimestamp(posix_seconds)
-
-    return dtt
-
-
-def j2000_1s_timestamps(year, month, date, N_REPORTS):
-    """DESCRIPTION:
-      Creates 1-second-cadence timestamps for the given date in a 2-d array
-      with one dimension being the number of seconds in N_REPORTS.  Timestamps
-      represent the number of seconds since the J2000 epoch.
-    MODULES:
-      datetime, numpy
-    INPUTS:
-      year, month, date: integers describing date (UT)
-      N_REPORTS: number of seconds in L1b record -- likely 30 or 60
-    OUTPUTS:
-      timestamp_array:  n_files x N_REPORTS NumPy array containing timestamps
-      measured in number of seconds since 01 Jan 2000, 1200 UT"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    n_files = N_SECONDS_DAY / N_REPORTS
-
-    timestamp_array = np.zeros((n_files, N_REPORTS))
-
-    dt_start = dt.datetime(year, month, date, 0, 0, 0)
-
-    time_stamp = (dt_start - J2000_EPOCH).total_seconds()
-
-    for r in range(n_files):
-        for s in range(N_REPORTS):
-            timestamp_array[r, s] = time_stamp
-            time_stamp += 1.0
-
-    return timestamp_array
-
-
-def j2000_p1s_timestamps(year, month, date, N_REPORTS, SAMPLES_PER_REPORT):
-    """DESCRIPTION:
-      Creates 0.1-second-cadence timestamps for the given date in a 3-d array
-      with one dimension being the number of seconds in N_REPORTS.  Timestamps
-      represent the number of seconds since the J2000 epoch.
-    MODULES:
-      datetime, numpy
-    INPUTS:
-      year, month, date: integers describing date (UT)
-      N_REPORTS: number of seconds in L1b record -- likely 60
-      SAMPLES_PER_REPORT: number of samples in one second: likely 10
-    OUTPUTS:
-      timestamp_array:  n_files x N_REPORTS x SAMPLES_PER_REPORT NumPy array
-      containing timestamps measured in number of seconds since 01 Jan 2000,
-      1200 UT"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    n_files = N_SECONDS_DAY / N_REPORTS
-    dtt = np.float64(1) / np.float64(SAMPLES_PER_REPORT)
-
-    timestamp_array = np.zeros((n_files, N_REPORTS, SAMPLES_PER_REPORT),
-                               dtype='float64')
-
-    dt_start = dt.datetime(year, month, date, 0, 0, 0)
-
-    time_stamp = np.float64((dt_start - J2000_EPOCH).total_seconds())
-
-    for r in range(n_files):
-        for s in range(N_REPORTS):
-            for t in range(SAMPLES_PER_REPORT):
-                timestamp_array[r, s, t] = time_stamp
-                time_stamp += dtt
-
-    return timestamp_array
-
-
-def create_j2000_timestamps(year, month, date, n_seconds_cadence):
-    """
-    Creates n_seconds_cadence timestamps for a given date.
-
-    Parameters
-    ----------
-    year : int
-        The year.
-    month : int
-        The month.
-    date : int
-        The day of the month.
-    n_seconds_cadence : int
-        Cadence in number of seconds.
-
-    Returns
-    -------
-    timestamp_array : numpy.ndarray
-        Array containing timestamps measured in seconds since 01 Jan 2000,
-        1200 UT.
-    """
-    J2000_EPOCH, _, N_SECONDS_DAY = timestamp_constants()
-
-    n_timestamps = int(N_SECONDS_DAY / n_seconds_cadence)
-
-    timestamp_array = np.zeros(n_timestamps)
-
-    dt_start = dt.datetime(year, month, date, 0, 0, 0)
-    time_stamp = (dt_start - J2000_EPOCH).total_seconds()
-
-    for r in range(n_timestamps):
-        timestamp_array[r] = time_stamp
-        time_stamp += n_seconds_cadence
-
-    return timestamp_array
-
-
-def posix_to_j2000(year, month, day, hour, min, sec):
-    """DESCRIPTION:
-      Converts Datetime POSIX timestamp to J2000 time stamp (in seconds)
-    MODULES:
-      datetime
-    INPUTS:
-      NumPy array containing datetimes
-    OUTPUTS:
-      j2000_seconds: NumPy array of seconds since J2000 epoch"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    dt_start = dt.datetime(year, month, day, hour, min, sec)
-
-    timestamp = (dt_start - J2000_EPOCH).total_seconds()
-
-    return timestamp
-
-
-def iso8601_to_datetime(iso8601):
-    """DESCRIPTION:
-      Converts an ISO8601 string (e.g. '2010-04-05T09:30:00.0Z') to a datetime
-      object
-    MODULES:
-      datetime
-    INPUTS:
-      iso8601: string
-    OUTPUTS:
-      dt: datetime object
-      j2000_sec: seconds since J2000 epoch"""
-
-    year = int(iso8601[0:4])
-    month = int(iso8601[5:7])
-    day = int(iso8601[8:10])
-    hour = int(iso8601[11:13])
-    min = int(iso8601[14:16])
-    sec = int(iso8601[17:19])
-    micro = int(iso8601[20:21]) * 100000
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    dtt = dt.datetime(year, month, day, hour, min, sec, micro)
-
-    j2000_sec = (dtt - J2000_EPOCH).total_seconds()
-
-    return dtt, j2000_sec
-
-
-def doy_to_dom(year, doy):
-    """DESCRIPTION:
-      This function converts day of year (doy) and year to number of month and
-      day of month (dom)
-    MODULES:
-      NumPy
-    INPUTS:
-      year: 4-digit year, e.g. 2000
-      doy: 1-366
-    OUTPUTS:
-      month: 1-12
-      dom: 1-31"""
-
-    if (year % 4) != 0:
-        days = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
-    else:
-        days = [0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366]
-    days = np.array(days)
-    month = days[days < doy].shape[0]
-    dom = doy - days[month - 1]
-
-    return month, dom
-
-
-def dom_to_doy(year, month, dom):
-    """DESCRIPTION:
-      This function converts day of year (doy) and year to number of month and
-      day of month (dom)
-    MODULES:
-      NumPy
-    INPUTS:
-      year: 4-digit year, e.g. 2000
-      doy: 1-366
-    OUTPUTS:
-      month: 1-12
-      dom: 1-31"""
-
-    if (year % 4) != 0:
-        days = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
-    else:
-        days = [0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366]
-
-    doy = days[month - 1] + dom
-
-    return doy
-
-
-def doy_to_j2000(year, doy):
-    """DESCRIPTION:
-      This function converts day of year (doy) and year to seconds since J2000
-      epoch at 00 UT
-    MODULES:
-      NumPy, datetime
-    INPUTS:
-      year: 4-digit year, e.g. 2000
-      doy: 1-366
-    OUTPUTS:+
-      j2000_start: seconds since J2000 epoch at start of given doy"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    (month, dom) = doy_to_dom(year, doy)
-    dt_start = dt.datetime(year, month, dom, 0, 0, 0)
-
-    j2000_start = (dt_start - J2000_EPOCH).total_seconds()
-
-    return j2000_start
-
-
-def doy_to_j2000_day(year, doy):
-    """DESCRIPTION:
-      Determines number of integral days since J2000 epoch and
-      milliseconds at start of current UT day.  To simulate L0 header times.
-    MODULES:
-      NumPy, datetime
-    INPUTS:
-      year: 4-digit year, e.g. 2000
-      doy: 1-366
-    OUTPUTS:+
-      j2000_start: seconds since J2000 epoch at start of given doy"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-    j2000_start = doy_to_j2000(year, doy)
-
-    n_day_j2k = np.int64(j2000_start / N_SECONDS_DAY)
-    ms_j2k = (j2000_start - n_day_j2k * N_SECONDS_DAY) * 1000.0
-
-    return n_day_j2k, ms_j2k
-
-
-def j2000_to_doy(j2000_seconds):
-    """DESCRIPTION:
-      This function converts seconds since J2000 epoch at 00 UT
-      to day of year
-    MODULES:
-      NumPy, datetime
-    INPUTS:
-      year: 4-digit year, e.g. 2000
-      doy: 1-366
-    OUTPUTS:+
-      j2000_start: seconds since J2000 epoch at start of given doy"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    posix_seconds = SECONDS_POSIX_J2000 + j2000_seconds
-
-    dtt = dt.datetime.utcfromtimestamp(posix_seconds)
-
-    doy = dom_to_doy(dtt.year, dtt.month, dtt.day)
-
-    return np.int32(doy)
-
-
-def j2000_to_iso8601(j2000_seconds):
-    """DESCRIPTION:
-      This function converts a floating point scalar quantifying the number of
-      seconds since J2000 epoch to an ISO 8601 string (UT).
-    MODULES:
-      datetime
-    INPUTS:
-      j2000_seconds: seconds since J2000 epoch, float
-    OUTPUTS:
-      iso8601: ISO8601 string representing UT"""
-
-    (J2000_EPOCH, SECONDS_POSIX_J2000, N_SECONDS_DAY) = \
-        timestamp_constants()
-
-    dtt = dt.datetime.utcfromtimestamp(SECONDS_POSIX_J2000 +
-                                       j2000_seconds)
-
-    iso8601 = dtt.isoformat()
-
-    return iso8601
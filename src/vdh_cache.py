@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+
+from coord_transform import TRANSFORM_VERSION
+
+"""
+On-disk cache of per-file transform results (VDH, inclination).
+
+Entries are .npz files named by a sha256 key of the input file path, size,
+mtime and TRANSFORM_VERSION plus the transform options, so a changed input
+file or transform never returns stale data. The cache is bounded in size and
+evicts least recently used entries (hits refresh the entry's mtime).
+"""
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'VDH_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'vdh'))
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_SUFFIX = '.npz'
+
+
+def cache_key(source_files, options=None):
+    """
+    Key of the transform results of one or more input files.
+
+    :param source_files: Path or list of paths the result depends on (e.g.
+    the GK2A file and the GOES file its time axis comes from).
+    :param options: dict of transform options that change the result.
+    :return: hex sha256 string
+    """
+    if isinstance(source_files, (str, os.PathLike)):
+        source_files = [source_files]
+
+    sources = []
+    for path in source_files:
+        stat = os.stat(path)
+        sources.append([os.path.abspath(path), stat.st_size,
+                        stat.st_mtime_ns])
+
+    description = json.dumps({'sources': sources,
+                              'transform_version': TRANSFORM_VERSION,
+                              'options': options or {}},
+                             sort_keys=True, default=str)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def _entry_path(cache_dir, key):
+    return os.path.join(cache_dir, key + ENTRY_SUFFIX)
+
+
+def load(source_files, options=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Cached arrays of the given input files and options.
+
+    :return: dict of name -> Numpy array, or None on a miss
+    """
+    path = _entry_path(cache_dir, cache_key(source_files, options))
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            arrays = {name: entry[name] for name in entry.files
+                      if name != 'meta'}
+    except (OSError, ValueError):
+        return None
+
+    # Mark as recently used for the LRU eviction; the entry may have been
+    # evicted by another worker meanwhile, or the cache dir be read-only
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return arrays
+
+
+def store(source_files, arrays, options=None, cache_dir=DEFAULT_CACHE_DIR,
+          max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Store arrays for the given input files and options, then evict least
+    recently used entries until the cache fits in max_bytes.
+
+    :param arrays: dict of name -> Numpy array.
+    :return: path of the cache entry
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    if isinstance(source_files, (str, os.PathLike)):
+        source_files = [source_files]
+
+    key = cache_key(source_files, options)
+    meta = json.dumps({'sources': [os.path.abspath(path)
+                                   for path in source_files],
+                       'transform_version': TRANSFORM_VERSION,
+                       'options': options or {}}, default=str)
+
+    # Write to a temporary name first so readers never see partial entries
+    path = _entry_path(cache_dir, key)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, meta=np.array(meta), **arrays)
+    os.replace(tmp_path, path)
+
+    evict(cache_dir, max_bytes)
+    return path
+
+
+def list_entries(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Cache entries, most recently used first.
+
+    :return: list of dicts with 'key', 'path', 'bytes', 'last_used' (POSIX
+    seconds) and 'sources'
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(ENTRY_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Evicted by another process since listdir
+            continue
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                sources = json.loads(str(entry['meta']))['sources']
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError, KeyError):
+            sources = []
+        entries.append({'key': name[:-len(ENTRY_SUFFIX)], 'path': path,
+                        'bytes': stat.st_size, 'last_used': stat.st_mtime,
+                        'sources': sources})
+
+    entries.sort(key=lambda entry: entry['last_used'], reverse=True)
+    return entries
+
+
+def cache_info(cache_dir=DEFAULT_CACHE_DIR):
+    """ Number of entries and total size [bytes] of the cache. """
+    entries = list_entries(cache_dir)
+    return {'cache_dir': cache_dir, 'entries': len(entries),
+            'bytes': sum(entry['bytes'] for entry in entries)}
+
+
+def evict(cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Delete least recently used entries until the cache fits in max_bytes.
+
+    :return: number of entries deleted
+    """
+    entries = list_entries(cache_dir)
+    total = sum(entry['bytes'] for entry in entries)
+    n_deleted = 0
+    while entries and total > max_bytes:
+        oldest = entries.pop()
+        try:
+            os.remove(oldest['path'])
+        except FileNotFoundError:
+            pass
+        total -= oldest['bytes']
+        n_deleted += 1
+    return n_deleted
+
+
+def clear(cache_dir=DEFAULT_CACHE_DIR):
+    """ Delete every cache entry. :return: number of entries deleted """
+    return evict(cache_dir, max_bytes=-1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Inspect or clear the VDH transform cache")
+    parser.add_argument("command", choices=['info', 'list', 'clear', 'evict'])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Cache directory (default: $VDH_CACHE_DIR or "
+                             "~/.cache/vdh)")
+    parser.add_argument("--max-bytes", default=DEFAULT_MAX_BYTES, type=int,
+                        help="Size bound for 'evict'")
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        info = cache_info(args.cache_dir)
+        print(f"{info['cache_dir']}: {info['entries']} entries, "
+              f"{info['bytes'] / 1024 ** 2:.1f} MB")
+    elif args.command == 'list':
+        for entry in list_entries(args.cache_dir):
+            print(f"{entry['key'][:16]}  {entry['bytes'] / 1024:10.1f} kB  "
+                  f"{', '.join(entry['sources'])}")
+    elif args.command == 'clear':
+        print(f"Deleted {clear(args.cache_dir)} entries")
+    else:
+        print(f"Deleted {evict(args.cache_dir, args.max_bytes)} entries")
+
+
+if __name__ == '__main__':
+    main()
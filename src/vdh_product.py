@@ -0,0 +1,88 @@
+import numpy as np
+import netCDF4 as nc
+
+import timestamp_utils as tsu
+
+# Same time convention as the GOES L2 files
+TIME_UNITS = "seconds since 2000-01-01 12:00:00"
+
+# Samples per chunk along time (one day of 1-min data)
+TIME_CHUNK = 1440
+FILL_VALUE = -9999.0
+
+
+def write_vdh_netcdf(path, time, spacecraft_data, complevel=4,
+                     time_chunk=TIME_CHUNK):
+    """
+    Write the GSE, VDH and inclination arrays of each spacecraft to a
+    compressed, time-chunked NetCDF file.
+
+    Variables are named <sc>_b_gse and <sc>_b_vdh (time, component) and
+    <sc>_inclination (time, degrees), e.g. g17_b_vdh, for a shared time
+    axis stored as seconds since J2000 (TIME_UNITS).
+
+    :param path:            Output file path.
+    :param time:            Pandas DatetimeIndex or datetime64 array (N).
+    :param spacecraft_data: dict of spacecraft key (e.g. 'g17') -> dict
+    with 'b_gse' and 'b_vdh' (Nx3, nT) and 'inclination' (N, radians).
+    :param complevel:       zlib compression level (default 4).
+    :param time_chunk:      Chunk length along time (default 1440).
+    """
+    times = np.asarray(time, dtype='datetime64[ns]').ravel()
+    n_times = len(times)
+    chunk = max(1, min(time_chunk, n_times))
+
+    with nc.Dataset(path, 'w', format='NETCDF4') as dataset:
+        dataset.title = 'Magnetic field in GSE and VDH with inclination angle'
+        dataset.spacecraft = ' '.join(spacecraft_data)
+
+        dataset.createDimension('time', n_times)
+        dataset.createDimension('component', 3)
+
+        time_var = dataset.createVariable('time', 'f8', ('time',), zlib=True,
+                                          complevel=complevel,
+                                          chunksizes=(chunk,))
+        time_var.units = TIME_UNITS
+        time_var[:] = tsu.datetime64_to_j2000(times)
+
+        for key, data in spacecraft_data.items():
+            for name, long_name in (('b_gse', 'B field, GSE (x, y, z)'),
+                                    ('b_vdh', 'B field, VDH (V, D, H)')):
+                var = dataset.createVariable(
+                    f'{key}_{name}', 'f4', ('time', 'component'), zlib=True,
+                    complevel=complevel, shuffle=True,
+                    chunksizes=(chunk, 3), fill_value=FILL_VALUE)
+                var.units = 'nT'
+                var.long_name = long_name
+                var[:] = np.ma.masked_invalid(
+                    np.asarray(data[name], dtype=float))
+
+            var = dataset.createVariable(
+                f'{key}_inclination', 'f4', ('time',), zlib=True,
+                complevel=complevel, shuffle=True, chunksizes=(chunk,),
+                fill_value=FILL_VALUE)
+            var.units = 'degrees'
+            var.long_name = 'Magnetic inclination angle, atan2(H, sqrt(V^2 + D^2))'
+            var[:] = np.ma.masked_invalid(
+                np.degrees(np.asarray(data['inclination'], dtype=float)))
+
+
+def read_vdh_netcdf(path):
+    """
+    Read a file written by :func:`write_vdh_netcdf`.
+
+    :param path: File path.
+    :return: (time, spacecraft_data). time is a datetime64[ns] array and
+    spacecraft_data a dict of spacecraft key -> dict with 'b_gse', 'b_vdh'
+    (Nx3) and 'inclination' (N, degrees); fill values become NaN.
+    """
+    with nc.Dataset(path) as dataset:
+        time = tsu.j2000_to_datetime64(dataset['time'][:])
+
+        spacecraft_data = {}
+        for key in dataset.spacecraft.split():
+            spacecraft_data[key] = {
+                name: dataset[f'{key}_{name}'][:].astype(float).filled(np.nan)
+                for name in ('b_gse', 'b_vdh', 'inclination')}
+
+    return time, spacecraft_data
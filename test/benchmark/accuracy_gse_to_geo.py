@@ -0,0 +1,75 @@
+"""
+Accuracy harness for the native GSE -> GEO backend of coord_transform.
+
+Converts random GSE vectors at random times with both the spacepy and the
+native backends and reports the angular difference between the GEO vectors,
+the largest component difference, the latitude difference and the run time
+of each backend.
+
+Run from ./test/benchmark with:
+
+    python accuracy_gse_to_geo.py --n-samples 2000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+import coord_transform as ct
+
+
+def random_inputs(n_samples, start, end, seed=0):
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.integers(pd.Timestamp(start).value,
+                                 pd.Timestamp(end).value, n_samples))
+    time_index = pd.DatetimeIndex(times)
+    b_gse = rng.normal([10., -20., 90.], 40., (n_samples, 3))
+    return time_index, b_gse
+
+
+def angle_between(a, b):
+    cos_angle = np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) *
+                                         np.linalg.norm(b, axis=1))
+    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--n-samples', type=int, default=1000)
+    parser.add_argument('--start', default='2016-01-01')
+    parser.add_argument('--end', default='2025-01-01')
+    args = parser.parse_args()
+
+    time_index, b_gse = random_inputs(args.n_samples, args.start, args.end)
+
+    start = time.perf_counter()
+    sp_geo, sp_lat, sp_long = ct.gse_to_geo(b_gse, time_index,
+                                            backend='spacepy')
+    t_spacepy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nat_geo, nat_lat, nat_long = ct.gse_to_geo(b_gse, time_index,
+                                               backend='native')
+    t_native = time.perf_counter() - start
+
+    angle = angle_between(sp_geo.data, nat_geo)
+    component_diff = np.abs(sp_geo.data - nat_geo)
+
+    print(f'samples:              {args.n_samples} '
+          f'({args.start} to {args.end})')
+    print(f'angle [deg]:          max {angle.max():.4f}, '
+          f'mean {angle.mean():.4f}')
+    print(f'|component diff| [nT]: max {component_diff.max():.4f}, '
+          f'mean {component_diff.mean():.4f}')
+    print(f'|latitude diff| [deg]: max {np.abs(sp_lat - nat_lat).max():.4f}')
+    print(f'spacepy:              {t_spacepy:.3f} s '
+          f'({args.n_samples / t_spacepy:.0f} samples/s)')
+    print(f'native:               {t_native:.5f} s '
+          f'({args.n_samples / t_native:.0f} samples/s)')
+
+
+if __name__ == '__main__':
+    main()
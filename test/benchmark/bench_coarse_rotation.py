@@ -0,0 +1,52 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from coord_transform import *
+
+# Times GSE -> VDH for one day of 10 Hz data with the GSE -> GEO rotation
+# computed exactly for every sample vs. at coarse knots + slerp, and reports
+# the max angular error of the interpolated rotation.
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate-hz", default=10, type=float)
+    parser.add_argument("--knot-cadence", nargs='+', default=[60, 600, 3600],
+                        type=float)
+    args = parser.parse_args()
+
+    n_samples = int(86400 * args.rate_hz)
+    times = pd.date_range('2022-08-01', periods=n_samples,
+                          freq=f'{int(1e9 / args.rate_hz)}ns')
+    b_gse = np.random.default_rng(0).normal([10., -20., 90.], 5.,
+                                            (n_samples, 3))
+
+    start = time.perf_counter()
+    exact = gse_to_vdh(b_gse, times, backend='native')
+    elapsed = time.perf_counter() - start
+    print(f"{n_samples} samples, exact native: {elapsed:.2f} s "
+          f"({n_samples / elapsed:,.0f} samples/s)")
+
+    for cadence in args.knot_cadence:
+        for backend in ('native', 'spacepy'):
+            start = time.perf_counter()
+            coarse = gse_to_vdh(b_gse, times, backend=backend,
+                                knot_cadence=cadence)
+            elapsed = time.perf_counter() - start
+            max_err = gse_to_geo_coarse(b_gse[:1], times[[0, -1]],
+                                        knot_cadence=cadence,
+                                        backend=backend,
+                                        return_error=True)[3]
+            print(f"knots every {cadence:g} s, {backend}: {elapsed:.2f} s "
+                  f"({n_samples / elapsed:,.0f} samples/s), "
+                  f"max rotation error {max_err:.2e} deg, "
+                  f"max VDH diff vs exact native "
+                  f"{np.abs(coarse - exact).max():.3g} nT")
+
+
+if __name__ == '__main__':
+    main()
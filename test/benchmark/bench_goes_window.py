@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import netCDF4 as nc
+
+sys.path.insert(0, '../../src')  # noqa
+from data_loader import process_goes_dataset, goes_epoch_to_datetime, \
+    read_goes_window
+
+# A 2-hour event window out of an aggregated multi-month 1-minute GOES file:
+# full read + trim vs. read_goes_window.
+
+
+def write_aggregated_file(path, n_days):
+    n_points = n_days * 1440
+    time = pd.date_range('2022-05-01', periods=n_points, freq='1min')
+    with nc.Dataset(path, 'w') as dataset:
+        dataset.createDimension('time', n_points)
+        dataset.createDimension('component', 3)
+        time_var = dataset.createVariable('time', 'f8', ('time',), zlib=True,
+                                          chunksizes=(1440,))
+        time_var.units = 'seconds since 2000-01-01 12:00:00'
+        time_var[:] = (time - pd.Timestamp('2000-01-01 12:00')) / \
+            pd.Timedelta(1, 's')
+        var = dataset.createVariable('b_gse', 'f4', ('time', 'component'),
+                                     zlib=True, fill_value=-9999.0,
+                                     chunksizes=(1440, 3))
+        var[:] = np.random.default_rng(0).normal(0, 50, (n_points, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", default=180, type=int)
+    parser.add_argument("--repeat", default=5, type=int)
+    args = parser.parse_args()
+
+    start, end = pd.Timestamp('2022-07-04 10:00'), \
+        pd.Timestamp('2022-07-04 12:00')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'aggregated.nc')
+        write_aggregated_file(path, args.days)
+
+        begin = time.perf_counter()
+        for _ in range(args.repeat):
+            with nc.Dataset(path) as dataset:
+                b_gse = process_goes_dataset(dataset['b_gse'])
+                goes_time = goes_epoch_to_datetime(dataset['time'][:])
+            keep = (goes_time >= start) & (goes_time <= end)
+            full = b_gse[keep]
+        full_s = (time.perf_counter() - begin) / args.repeat
+
+        begin = time.perf_counter()
+        for _ in range(args.repeat):
+            _, data = read_goes_window(path, start, end)
+        window_s = (time.perf_counter() - begin) / args.repeat
+
+    print(f"{args.days} days of 1-min data, {len(full)}-sample window")
+    print(f"full read + trim: {full_s * 1e3:8.1f} ms")
+    print(f"read_goes_window: {window_s * 1e3:8.1f} ms")
+    print(f"speed-up x{full_s / window_s:.0f}, identical: "
+          f"{np.array_equal(full, data['b_gse'], equal_nan=True)}")
+
+
+if __name__ == '__main__':
+    main()
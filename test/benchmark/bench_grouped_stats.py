@@ -0,0 +1,56 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from grouped_stats import grouped_stats
+
+# Hourly, daily and monthly std of 1-minute (N, 3) model subtraction data
+# with a Kp mask: one pandas resample per resolution and component vs. one
+# grouped_stats call.
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", default=2, type=int)
+    parser.add_argument("--quantiles", default=[], type=float, nargs='*')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2022-01-01', periods=args.years * 365 * 1440,
+                          freq='1min')
+    subtr = rng.normal(0, 5, (len(times), 3))
+    kp_mask = rng.random(len(times)) < 0.15
+    freqs = ('H', 'D', 'M')
+
+    start = time.perf_counter()
+    expected = {}
+    for freq in freqs:
+        columns = []
+        for component in range(3):
+            series = pd.DataFrame({'datetime': times,
+                                   'subtraction': subtr[:, component]})
+            series = series.set_index('datetime')['subtraction'].mask(kp_mask)
+            columns.append(series.resample(freq).std().values)
+            for q in args.quantiles:
+                series.resample(freq).quantile(q)
+        expected[freq] = np.column_stack(columns)
+    pandas_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = grouped_stats(times, subtr, freqs=freqs, mask=kp_mask,
+                           quantiles=args.quantiles)
+    engine_s = time.perf_counter() - start
+
+    same = all(np.allclose(result[freq]['std'], expected[freq],
+                           equal_nan=True) for freq in freqs)
+    print(f"{len(times)} samples, quantiles {args.quantiles}")
+    print(f"pandas resample: {pandas_s:7.3f} s")
+    print(f"grouped_stats:   {engine_s:7.3f} s  x{pandas_s / engine_s:.0f}, "
+          f"same std: {same}")
+
+
+if __name__ == '__main__':
+    main()
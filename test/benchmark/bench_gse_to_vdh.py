@@ -0,0 +1,85 @@
+"""
+Benchmark the GEO -> RHENP -> VDH engine of coord_transform.gse_to_vdh.
+
+Reports samples/second of the per-sample reference loops and of the batched
+engine for 1 day, 1 month and 1 year of 1-minute data, and the maximum
+absolute difference between the two. The GSE -> GEO step is not part of the
+engine, so synthetic GEO vectors are used as input.
+
+Run from ./test/benchmark with:
+
+    python bench_gse_to_vdh.py
+"""
+import argparse
+import sys
+import time
+import warnings
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+import coord_transform as ct
+
+SIZES = {'1 day': 1440, '1 month': 30 * 1440, '1 year': 365 * 1440}
+
+
+def make_inputs(n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    time_index = pd.date_range('2022-01-01', periods=n_points, freq='1min')
+    geo_coords = rng.normal([10., -20., 90.], 5., (n_points, 3))
+    geo_lat = np.degrees(np.arcsin(geo_coords[:, 2] /
+                                   np.linalg.norm(geo_coords, axis=1)))
+    geo_long = np.degrees(np.arctan2(geo_coords[:, 1], geo_coords[:, 0]))
+    return time_index, geo_coords, geo_lat, geo_long
+
+
+def run_loop(time_index, geo_coords, geo_lat, geo_long):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        rhenp = ct.geo_to_rhenp(geo_long, SimpleNamespace(data=geo_coords))
+        return ct.rhenp_to_vdh(time_index, geo_lat, geo_long, rhenp)
+
+
+def run_batched(time_index, geo_coords, geo_lat, geo_long):
+    rhenp = ct.geo_to_rhenp_batched(geo_long, geo_coords)
+    return ct.rhenp_to_vdh_batched(time_index, geo_lat, geo_long, rhenp)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--max-loop-samples', type=int, default=30 * 1440,
+                        help='Skip the reference loops above this size')
+    args = parser.parse_args()
+
+    print(f'{"input":>8} {"samples":>9} {"loop [samp/s]":>15} '
+          f'{"batched [samp/s]":>17} {"speedup":>8} {"max |diff|":>11}')
+
+    for label, n_points in SIZES.items():
+        time_index, geo_coords, geo_lat, geo_long = make_inputs(n_points)
+
+        vdh_batched, t_batched = timed(run_batched, time_index, geo_coords,
+                                       geo_lat, geo_long)
+
+        if n_points <= args.max_loop_samples:
+            vdh_loop, t_loop = timed(run_loop, time_index, geo_coords,
+                                     geo_lat, geo_long)
+            loop_rate = f'{n_points / t_loop:15.0f}'
+            speedup = f'{t_loop / t_batched:7.1f}x'
+            max_diff = f'{np.nanmax(np.abs(vdh_loop - vdh_batched)):11.2e}'
+        else:
+            loop_rate, speedup, max_diff = f'{"skipped":>15}', ' ' * 8, ''
+
+        print(f'{label:>8} {n_points:9d} {loop_rate} '
+              f'{n_points / t_batched:17.0f} {speedup} {max_diff}')
+
+
+if __name__ == '__main__':
+    main()
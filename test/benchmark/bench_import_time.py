@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+# Measures module import cost with `python -X importtime`, run in a fresh
+# interpreter per sample (as our short-lived batch workers do).
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
+                                       '..', 'src'))
+
+
+def import_time_us(module, env):
+    """ Cumulative import time [us] of module and the importtime table. """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-W', 'ignore',
+                           '-c', f'import {module}'], cwd=SRC_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    total = next(cum for _, cum, name in rows if name == module)
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs='+',
+                        default=['main', 'data_loader', 'coord_transform',
+                                 'utils', 'magpause_loc'])
+    parser.add_argument("--repeats", default=5, type=int)
+    parser.add_argument("--top", default=10, type=int,
+                        help="Show the heaviest direct imports of the "
+                             "first module")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+
+    for module in args.modules:
+        totals = [import_time_us(module, env)[0]
+                  for _ in range(args.repeats)]
+        print(f"import {module}: median {statistics.median(totals) / 1e3:.0f}"
+              f" ms (min {min(totals) / 1e3:.0f} ms, {args.repeats} runs)")
+
+    # importtime lists children before their parent, so the direct imports
+    # are the depth-1 rows just above the module's own top-level row
+    _, rows = import_time_us(args.modules[0], env)
+    end = next(i for i, (_, _, name) in enumerate(rows)
+               if name == args.modules[0])
+    direct = []
+    for _, cum, name in reversed(rows[:end]):
+        if not name.startswith('  '):
+            break
+        if not name.startswith('    '):
+            direct.append((cum, name.strip()))
+    print(f"\nheaviest direct imports of {args.modules[0]}:")
+    for cum, name in sorted(direct, reverse=True)[:args.top]:
+        print(f"  {cum / 1e3:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from kp_data_processing import createkpMask, create_kp_mask_array
+
+# Kp mask for a year of 1-minute data: list.index based createkpMask vs.
+# searchsorted/cumsum create_kp_mask_array.
+
+
+def make_inputs(n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    data_times = pd.date_range('2019-01-01', periods=n_days * 1440,
+                               freq='1min')
+    kp_times = pd.date_range('2019-01-01', periods=n_days * 8, freq='3H')
+    dfkp = pd.DataFrame({'Kp': rng.choice(np.arange(0, 9, 1 / 3),
+                                          len(kp_times)) * 0.6,
+                         'Time': kp_times})
+    return dfkp, data_times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", default=365, type=int)
+    parser.add_argument("--max-kp", default=2, type=float)
+    args = parser.parse_args()
+
+    dfkp, data_times = make_inputs(args.days)
+    datetime_list = list(data_times.to_pydatetime())
+    print(f"{len(datetime_list)} samples, {len(dfkp)} Kp records, "
+          f"{(dfkp['Kp'] > args.max_kp).sum()} over {args.max_kp}")
+
+    start = time.perf_counter()
+    mask_array = create_kp_mask_array(dfkp, data_times, max_kp=args.max_kp)
+    array_s = time.perf_counter() - start
+    print(f"create_kp_mask_array: {array_s:.3f} s")
+
+    start = time.perf_counter()
+    mask_list = createkpMask(dfkp, datetime_list, max_kp=args.max_kp)
+    list_s = time.perf_counter() - start
+    print(f"createkpMask:         {list_s:.3f} s")
+
+    print(f"speed-up x{list_s / array_s:.0f}, masks identical: "
+          f"{np.array_equal(mask_array, np.array(mask_list))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import netCDF4 as nc
+
+sys.path.insert(0, '../../src')  # noqa
+from magpause_loc import read_nc_data, extract_moment_data, \
+    FLAG_READ_SPEC, TIME_UNITS
+
+# An aggregated multi-month 1-minute MPS-LO file: the former full read of
+# the moment cubes vs. the NC_READ_SPEC hyperslabs, and a one-day window.
+
+
+def write_aggregated_file(path, n_days, n_ranges, n_moments):
+    n_points = n_days * 1440
+    time_index = pd.date_range('2023-01-01', periods=n_points, freq='1min')
+    rng = np.random.default_rng(0)
+    with nc.Dataset(path, 'w') as dataset:
+        dataset.createDimension('time', n_points)
+        dataset.createDimension('energy_range', n_ranges)
+        dataset.createDimension('moment', n_moments)
+        time_var = dataset.createVariable('time', 'f8', ('time',), zlib=True,
+                                          chunksizes=(1440,))
+        time_var.units = TIME_UNITS
+        time_var[:] = (time_index - pd.Timestamp('2000-01-01 12:00')) / \
+            pd.Timedelta(1, 's')
+        for name in ('EleMoments', 'IonMoments'):
+            var = dataset.createVariable(
+                name, 'f4', ('time', 'energy_range', 'moment'), zlib=True,
+                fill_value=-1e+31, chunksizes=(1440, 1, n_moments))
+            for first in range(0, n_points, 1440 * 30):
+                rows = min(1440 * 30, n_points - first)
+                var[first:first + rows] = rng.uniform(
+                    0.1, 10, (rows, n_ranges, n_moments))
+
+
+def full_read(path):
+    # Former read_nc_data
+    with nc.Dataset(path) as dataset:
+        return {name: dataset.variables[name][:]
+                for name in ('EleMoments', 'IonMoments')}
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", default=90, type=int)
+    parser.add_argument("--energy-ranges", default=5, type=int)
+    parser.add_argument("--moments", default=8, type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mpsl_aggregated.nc')
+        write_aggregated_file(path, args.days, args.energy_ranges,
+                              args.moments)
+        size_mb = os.path.getsize(path) / 1e6
+
+        full, full_s = timed(full_read, path)
+        spec, spec_s = timed(read_nc_data, path)
+        middle = pd.Timestamp('2023-01-01') + pd.Timedelta(args.days // 2,
+                                                           'D')
+        day, day_s = timed(read_nc_data, path, FLAG_READ_SPEC, middle,
+                           middle + pd.Timedelta('23h59min'))
+
+    same = all(np.array_equal(extract_moment_data(full[name]),
+                              extract_moment_data(spec[name]),
+                              equal_nan=True)
+               for name in ('EleMoments', 'IonMoments'))
+    full_mb = sum(values.nbytes for values in full.values()) / 1e6
+    spec_mb = sum(spec[name].nbytes for name in full) / 1e6
+    print(f"{args.days} days, {args.energy_ranges} energy ranges x "
+          f"{args.moments} moments ({size_mb:.0f} MB file)")
+    print(f"full read      {full_s * 1e3:8.1f} ms  {full_mb:7.1f} MB")
+    print(f"NC_READ_SPEC   {spec_s * 1e3:8.1f} ms  {spec_mb:7.1f} MB  "
+          f"x{full_s / spec_s:.1f}, identical moments: {same}")
+    print(f"one-day window {day_s * 1e3:8.1f} ms  "
+          f"{len(day['time'])} samples")
+
+
+if __name__ == '__main__':
+    main()
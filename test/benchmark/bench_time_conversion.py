@@ -0,0 +1,86 @@
+import sys
+import time
+import argparse
+import datetime
+import numpy as np
+
+sys.path.insert(0, '../../src')  # noqa
+import timestamp_utils as tsu
+
+# A day of 10 Hz timestamps through the per-element conversions the
+# timestamp_utils functions replaced vs. the vectorized versions.
+
+J2000_EPOCH = datetime.datetime(2000, 1, 1, 12)
+UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def j2000_loop(j2000_seconds):
+    # Former utils.j2000_to_posix
+    return np.array([datetime.datetime.utcfromtimestamp(
+        tsu.SECONDS_POSIX_J2000 + s) for s in j2000_seconds])
+
+
+def unix_ms_loop(unix_ms):
+    # Former DSCOVR unix_ms_to_datetime
+    return np.array([UNIX_EPOCH + datetime.timedelta(milliseconds=x)
+                     for x in unix_ms])
+
+
+def p1s_loop(year, month, date):
+    # Former utils.j2000_p1s_timestamps
+    timestamp_array = np.zeros((1440, 60, 10))
+    time_stamp = (datetime.datetime(year, month, date) -
+                  J2000_EPOCH).total_seconds()
+    for r in range(1440):
+        for s in range(60):
+            for t in range(10):
+                timestamp_array[r, s, t] = time_stamp
+                time_stamp += 0.1
+    return timestamp_array
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", default=1, type=int)
+    args = parser.parse_args()
+
+    j2000 = np.concatenate([tsu.day_timestamps(2022, 8, 4 + day, 0.1)
+                            for day in range(args.days)])
+    # DSCOVR 'time' read as float milliseconds
+    unix_ms = np.round(tsu.datetime64_to_posix(
+        tsu.j2000_to_datetime64(j2000)) * 1000)
+    print(f"{len(j2000)} timestamps (10 Hz)")
+
+    cases = [
+        ("J2000 s -> datetime", j2000_loop, (j2000,),
+         lambda: tsu.j2000_to_posix(j2000)),
+        ("J2000 s -> datetime64", j2000_loop, (j2000,),
+         lambda: tsu.j2000_to_datetime64(j2000)),
+        ("unix ms -> datetime", unix_ms_loop, (unix_ms,),
+         lambda: tsu.to_datetime_objects(tsu.unix_ms_to_datetime64(unix_ms))),
+        ("10 Hz day timestamps", p1s_loop, (2022, 8, 4),
+         lambda: tsu.j2000_p1s_timestamps(2022, 8, 4, 60, 10)),
+    ]
+    for name, loop, loop_args, vectorized in cases:
+        if loop is p1s_loop and args.days != 1:
+            continue
+        expected, loop_s = timed(loop, *loop_args)
+        result, vector_s = timed(vectorized)
+        if result.dtype.kind in 'MO':
+            error_s = np.abs((np.asarray(result, dtype='datetime64[ns]') -
+                              expected.astype('datetime64[ns]')) /
+                             np.timedelta64(1, 's')).max()
+        else:
+            error_s = np.abs(result - expected).max()
+        print(f"{name:24s} loop {loop_s:7.3f} s  vectorized {vector_s:7.4f} s"
+              f"  x{loop_s / vector_s:5.0f}  max diff {error_s:.1e} s")
+
+
+if __name__ == '__main__':
+    main()
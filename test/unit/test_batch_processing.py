@@ -0,0 +1,130 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import sys
+from unittest import mock
+import numpy as np
+import netCDF4 as nc
+
+sys.path.insert(0, '../../src')  # noqa
+from batch_processing import *
+
+J2000 = np.datetime64('2000-01-01T12:00:00')
+
+
+def write_goes_day(path, day):
+    """ Minimal GOES 1-min mag file (time + b_gse) for one day. """
+    start = (np.datetime64(day) - J2000) / np.timedelta64(1, 's')
+    with nc.Dataset(path, 'w') as dataset:
+        dataset.createDimension('time', 1440)
+        dataset.createDimension('vector', 3)
+        dataset.createVariable('time', 'f8', ('time',))[:] = \
+            start + 60.0 * np.arange(1440)
+        dataset.createVariable('b_gse', 'f4', ('time', 'vector'))[:] = \
+            np.random.default_rng(0).normal([10, -20, 90], 5, (1440, 3))
+
+
+class TestBatchProcessing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, 'data')
+        os.makedirs(self.data_dir)
+        self.template = os.path.join(self.data_dir, 'g17_d%Y%m%d_v*.nc')
+        for day in ('20220801', '20220803'):
+            write_goes_day(os.path.join(self.data_dir, f'g17_d{day}_v2-0-2.nc'),
+                           f'{day[:4]}-{day[4:6]}-{day[6:]}')
+        # Older data version of the same day must be ignored
+        shutil.copy(os.path.join(self.data_dir, 'g17_d20220801_v2-0-2.nc'),
+                    os.path.join(self.data_dir, 'g17_d20220801_v1-0-0.nc'))
+        # Unreadable file
+        with open(os.path.join(self.data_dir, 'g17_d20220804_v2-0-2.nc'),
+                  'w') as file:
+            file.write('not netcdf')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_discover_daily_files(self):
+        files = discover_daily_files(self.template, '2022-08-01',
+                                     '2022-08-04')
+        self.assertEqual([str(day) for day in files],
+                         ['2022-08-01', '2022-08-02', '2022-08-03',
+                          '2022-08-04'])
+        self.assertTrue(files[min(files)].endswith('g17_d20220801_v2-0-2.nc'))
+        self.assertIsNone(list(files.values())[1])
+
+    def test_run_batch(self):
+        output_dir = os.path.join(self.tmp_dir, 'out')
+        for workers in (1, 2):
+            summary = run_batch('2022-08-01', '2022-08-04',
+                                {'g17': self.template}, output_dir,
+                                workers=workers, transform_backend='native')
+            statuses = [day['status'] for day in summary['days']]
+            self.assertEqual(statuses, ['ok', 'missing', 'ok', 'failed'])
+            self.assertEqual((summary['n_ok'], summary['n_failed'],
+                              summary['n_missing']), (2, 1, 1))
+            for day in ('20220801', '20220803'):
+                self.assertTrue(os.path.exists(os.path.join(
+                    output_dir, f'mag_inclination_{day}.png')))
+                self.assertTrue(os.path.exists(os.path.join(
+                    output_dir, f'b_gse_{day}.png')))
+
+            with open(summary['summary_path']) as file:
+                saved = json.load(file)
+            self.assertEqual(saved['days'][3]['status'], 'failed')
+            self.assertIsNotNone(saved['days'][3]['error'])
+
+        # Only pool workers switch to Agg, not the calling process
+        with mock.patch('matplotlib.use') as use:
+            run_batch('2022-08-01', '2022-08-01', {'g17': self.template},
+                      output_dir, workers=1, transform_backend='native')
+        use.assert_not_called()
+
+    def test_run_batch_no_plot_output_nc(self):
+        output_dir = os.path.join(self.tmp_dir, 'out')
+        summary = run_batch('2022-08-01', '2022-08-03',
+                            {'g17': self.template}, output_dir, workers=1,
+                            transform_backend='native', plot=False,
+                            output_nc=True)
+        self.assertEqual(summary['n_ok'], 2)
+        self.assertEqual(sorted(f for f in os.listdir(output_dir)
+                                if not f.endswith('.json')),
+                         ['vdh_20220801.nc', 'vdh_20220803.nc'])
+        with nc.Dataset(os.path.join(output_dir, 'vdh_20220801.nc')) as ds:
+            self.assertEqual(ds['g17_b_vdh'].shape, (1440, 3))
+            self.assertEqual(ds['g17_inclination'].shape, (1440,))
+
+    def test_run_batch_reuses_cache(self):
+        output_dir = os.path.join(self.tmp_dir, 'out')
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        options = dict(workers=1, transform_backend='native', plot=False,
+                       output_nc=True, cache_dir=cache_dir)
+        run_batch('2022-08-01', '2022-08-01', {'g17': self.template},
+                  output_dir, **options)
+        nc_path = os.path.join(output_dir, 'vdh_20220801.nc')
+        with nc.Dataset(nc_path) as ds:
+            first = ds['g17_b_vdh'][:]
+        entries = os.listdir(cache_dir)
+        self.assertEqual(len(entries), 1)
+
+        run_batch('2022-08-01', '2022-08-01', {'g17': self.template},
+                  output_dir, **options)
+        self.assertEqual(os.listdir(cache_dir), entries)
+        with nc.Dataset(nc_path) as ds:
+            np.testing.assert_array_equal(ds['g17_b_vdh'][:], first)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            run_batch('2022-08-01', '2022-08-02', {}, self.tmp_dir)
+        with self.assertRaises(ValueError):
+            run_batch('2022-08-01', '2022-08-02', {'g19': self.template},
+                      self.tmp_dir)
+        with self.assertRaises(ValueError):
+            run_batch('2022-08-02', '2022-08-01', {'g17': self.template},
+                      self.tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+import subprocess
+import sys
+
+sys.path.insert(0, '../../src')  # noqa
+from cdaweb import *
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                       'src'))
+
+
+class TestCdaweb(unittest.TestCase):
+    def test_get_cdas_is_shared(self):
+        self.assertIs(get_cdas(), get_cdas())
+
+    def test_configure_cdf_env_keeps_existing(self):
+        saved = {key: os.environ.get(key)
+                 for key in ('CDF_BASE', 'CDF_BIN', 'CDF_LIB')}
+        try:
+            os.environ['CDF_LIB'] = '/opt/cdf/lib'
+            configure_cdf_env()
+            self.assertEqual(os.environ['CDF_LIB'], '/opt/cdf/lib')
+
+            del os.environ['CDF_LIB']
+            configure_cdf_env()
+            self.assertEqual(os.environ['CDF_LIB'], CDF_BASE_DIR + '/lib')
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    def test_imports_are_lazy(self):
+        # Importing the pipeline must not load the web client, spacepy or
+        # matplotlib; they are only imported on first use.
+        code = ('import sys, main, data_loader, coord_transform, utils, '
+                'magpause_loc; print(sorted({m.split(".")[0] for m in '
+                'sys.modules} & {"cdasws", "spacepy", "matplotlib", '
+                '"requests", "pyspedas", "pytplot"}))')
+        proc = subprocess.run([sys.executable, '-W', 'ignore', '-c', code],
+                              cwd=SRC_DIR, capture_output=True, text=True,
+                              check=True)
+        self.assertEqual(proc.stdout.strip(), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+import unittest
+import sys
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+
+sys.path.insert(0, '../../src')  # noqa
+from coord_transform import *
+from coord_transform import _cached_dipole_12_mag_lat_lon
+from coord_transform import _knot_times, _rotation_matrices_to_quaternions, \
+    _quaternions_to_rotation_matrices
+
+
+def make_geo_inputs(n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    time = pd.date_range('2022-08-01', periods=n_points, freq='17min')
+    geo_lat = rng.uniform(-80, 80, n_points)
+    geo_lon = rng.uniform(-180, 180, n_points)
+    geo_cart = rng.normal(0, 100, (n_points, 3))
+    return time, geo_lat, geo_lon, geo_cart
+
+
+class TestBatchedEngine(unittest.TestCase):
+    def test_hapgood_matrices_match_scalar(self):
+        thetas = np.array([-170.0, -45.5, 0.0, 12.25, 90.0, 359.0])
+        for axis in range(3):
+            mats = hapgood_matrices(thetas, axis)
+            self.assertEqual(mats.shape, (len(thetas), 3, 3))
+            for theta, mat in zip(thetas, mats):
+                self.assertTrue(
+                    np.array_equal(mat, hapgood_matrix(theta, axis)))
+
+    def test_geo_to_rhenp_batched(self):
+        _, _, geo_lon, geo_cart = make_geo_inputs(50)
+        geo_coords = SimpleNamespace(data=geo_cart)
+        for backward in (False, True):
+            expected = geo_to_rhenp(geo_lon, geo_coords, backward=backward)
+            result = geo_to_rhenp_batched(geo_lon, geo_coords,
+                                          backward=backward)
+            np.testing.assert_allclose(result, expected, rtol=0,
+                                       atol=1e-12)
+        # Plain arrays are accepted as well as Coords-like objects
+        np.testing.assert_allclose(geo_to_rhenp_batched(geo_lon, geo_cart),
+                                   geo_to_rhenp(geo_lon, geo_coords),
+                                   rtol=0, atol=1e-12)
+
+    def test_rhenp_to_vdh_mats_batched(self):
+        time, geo_lat, geo_lon, _ = make_geo_inputs(50)
+        expected = rhenp_to_vdh_mats(time, geo_lat, geo_lon)
+        result = rhenp_to_vdh_mats_batched(time, geo_lat, geo_lon)
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+    def test_rhenp_to_vdh_batched(self):
+        time, geo_lat, geo_lon, rhenp = make_geo_inputs(50)
+        expected = rhenp_to_vdh(time, geo_lat, geo_lon, rhenp)
+        result = rhenp_to_vdh_batched(time, geo_lat, geo_lon, rhenp)
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+    def test_rhenp_to_vdh_batched_precomputed_mats(self):
+        time, geo_lat, geo_lon, rhenp = make_geo_inputs(10)
+        mats = rhenp_to_vdh_mats_batched(time, geo_lat, geo_lon)
+        result = rhenp_to_vdh_batched(time, geo_lat, geo_lon, rhenp,
+                                      mats=mats)
+        self.assertTrue(np.array_equal(
+            result, rhenp_to_vdh_batched(time, geo_lat, geo_lon, rhenp)))
+
+
+class TestDipoleArray(unittest.TestCase):
+    def setUp(self):
+        clear_dipole_cache()
+
+    def test_exact_matches_scalar(self):
+        times = pd.date_range('2019-12-30', '2021-01-02 06:00', freq='7H')
+        dip_lat, dip_lon = dipole_12_mag_lat_lon_array(times)
+        expected = np.array([dipole_12_mag_lat_lon(t) for t in times])
+        np.testing.assert_allclose(dip_lat, expected[:, 0], rtol=0,
+                                   atol=1e-12)
+        np.testing.assert_allclose(dip_lon, expected[:, 1], rtol=0,
+                                   atol=1e-12)
+
+    def test_accepts_datetime64_and_datetime_lists(self):
+        times = pd.date_range('2022-08-01', periods=5, freq='5H')
+        from_index = dipole_12_mag_lat_lon_array(times)
+        from_dt64 = dipole_12_mag_lat_lon_array(times.values)
+        from_list = dipole_12_mag_lat_lon_array(list(times.to_pydatetime()))
+        for result in (from_dt64, from_list):
+            np.testing.assert_array_equal(result[0], from_index[0])
+            np.testing.assert_array_equal(result[1], from_index[1])
+
+    def test_year_fraction_array_matches_scalar(self):
+        times = pd.date_range('2020-01-01', '2021-12-31 23:59', freq='1111min')
+        expected = np.array([year_fraction(t) for t in times])
+        np.testing.assert_allclose(year_fraction_array(times), expected,
+                                   rtol=0, atol=1e-12)
+
+    def test_daily_resolution_memoizes_one_pole_per_day(self):
+        times = pd.date_range('2022-08-01', '2022-08-30 23:59', freq='1min')
+        dip_lat, dip_lon = dipole_12_mag_lat_lon_array(times, resolution='D')
+        self.assertEqual(len(dip_lat), len(times))
+        info = _cached_dipole_12_mag_lat_lon.cache_info()
+        self.assertEqual(info.currsize, 30)
+
+        # Each sample gets the pole at the start of its day
+        day_starts = times.floor('D')
+        expected = np.array([dipole_12_mag_lat_lon(t)
+                             for t in day_starts[::1440]])
+        np.testing.assert_allclose(dip_lat[::1440], expected[:, 0],
+                                   rtol=0, atol=1e-12)
+        np.testing.assert_allclose(dip_lon[::1440], expected[:, 1],
+                                   rtol=0, atol=1e-12)
+
+        # Second call is served from the cache
+        dipole_12_mag_lat_lon_array(times, resolution='D')
+        self.assertEqual(
+            _cached_dipole_12_mag_lat_lon.cache_info().hits, 30)
+
+
+class TestNativeGseToGeo(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.time = pd.date_range('2017-03-01', '2024-06-01', periods=25)
+        self.b_gse = rng.normal([10., -20., 90.], 40., (25, 3))
+
+    def test_rotation_matrices_are_orthonormal(self):
+        mats = gse_to_geo_matrices(self.time)
+        identity = np.matmul(mats, np.swapaxes(mats, 1, 2))
+        np.testing.assert_allclose(identity, np.broadcast_to(
+            np.eye(3), identity.shape), atol=1e-12)
+        np.testing.assert_allclose(np.linalg.det(mats), 1.0, atol=1e-12)
+
+    def test_native_agrees_with_spacepy(self):
+        sp_geo, sp_lat, _ = gse_to_geo(self.b_gse, self.time)
+        geo, lat, long = gse_to_geo(self.b_gse, self.time, backend='native')
+        cos_angle = np.sum(sp_geo.data * geo, axis=1) / (
+                np.linalg.norm(geo, axis=1) ** 2)
+        angle = np.degrees(np.arccos(np.clip(cos_angle, -1, 1)))
+        self.assertLess(angle.max(), 0.05)
+        self.assertLess(np.abs(sp_lat - lat).max(), 0.05)
+
+    def test_lat_lon_derived_from_cartesian(self):
+        geo, lat, long = gse_to_geo_native(self.b_gse, self.time)
+        r = np.linalg.norm(geo, axis=1)
+        rebuilt = np.column_stack((
+            r * np.cos(np.radians(lat)) * np.cos(np.radians(long)),
+            r * np.cos(np.radians(lat)) * np.sin(np.radians(long)),
+            r * np.sin(np.radians(lat))))
+        np.testing.assert_allclose(rebuilt, geo, atol=1e-9)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            gse_to_geo(self.b_gse, self.time, backend='irbem')
+
+
+class TestCoarseRotation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.time = pd.date_range('2022-08-01 00:00:00.3', periods=36000,
+                                  freq='100ms')
+        self.b_gse = rng.normal([10., -20., 90.], 40., (len(self.time), 3))
+
+    def test_quaternion_round_trip(self):
+        # Includes rotations near 180 deg to exercise every Shepperd branch
+        times = pd.date_range('2020-01-01', periods=40, freq='37min')
+        mats = np.concatenate((gse_to_geo_matrices(times),
+                               hapgood_matrices(np.full(3, 179.9), 0),
+                               hapgood_matrices(np.full(3, 179.9), 1),
+                               hapgood_matrices(np.full(3, 179.9), 2)))
+        rebuilt = _quaternions_to_rotation_matrices(
+            _rotation_matrices_to_quaternions(mats))
+        np.testing.assert_allclose(rebuilt, mats, atol=1e-12)
+
+    def test_knot_times_cover_samples(self):
+        knots = _knot_times(self.time.values, 60)
+        self.assertEqual(knots[0], np.datetime64('2022-08-01T00:00:00'))
+        self.assertGreaterEqual(knots[-1], self.time.values[-1])
+        self.assertTrue(np.all(np.diff(knots) == np.timedelta64(60, 's')))
+        # A single sample still gets a pair of knots
+        self.assertEqual(len(_knot_times(self.time.values[:1], 60)), 2)
+        with self.assertRaises(ValueError):
+            _knot_times(self.time.values, 0)
+
+    def test_interpolation_exact_at_knots(self):
+        knots = _knot_times(self.time.values, 600)
+        mats = gse_to_geo_matrices(knots)
+        np.testing.assert_allclose(
+            interpolate_rotation_matrices(knots, mats, knots), mats,
+            atol=1e-12)
+
+    def test_coarse_matches_exact(self):
+        geo, lat, long = gse_to_geo(self.b_gse, self.time, backend='native')
+        c_geo, c_lat, c_long, max_err = gse_to_geo_coarse(
+            self.b_gse, self.time, knot_cadence=np.timedelta64(1, 'm'),
+            return_error=True)
+        self.assertLess(max_err, 1e-4)
+        angle = rotation_angle_between(
+            gse_to_geo_matrices(self.time[::101]),
+            interpolate_rotation_matrices(
+                _knot_times(self.time.values, 60),
+                gse_to_geo_matrices(_knot_times(self.time.values, 60)),
+                self.time.values[::101]))
+        self.assertLessEqual(angle.max(), max_err * 1.01)
+        np.testing.assert_allclose(c_geo, geo, atol=1e-3)
+        np.testing.assert_allclose(c_lat, lat, atol=1e-4)
+
+    def test_gse_to_vdh_knot_cadence(self):
+        exact = gse_to_vdh(self.b_gse[:2000], self.time[:2000],
+                           backend='native')
+        coarse = gse_to_vdh(self.b_gse[:2000], self.time[:2000],
+                            backend='native', knot_cadence=60)
+        np.testing.assert_allclose(coarse, exact, atol=1e-3)
+
+
+class TestInclinationFromGse(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.time = pd.date_range('2022-08-01', periods=500, freq='3min')
+        self.b_gse = rng.normal([10., -20., 90.], 60., (len(self.time), 3))
+
+    def test_matches_full_vdh(self):
+        for backend in ('native', 'spacepy'):
+            vdh = gse_to_vdh(self.b_gse, self.time, backend=backend)
+            expected = calculate_magnetic_inclination_angle_VDH(
+                vdh[:, 0], vdh[:, 1], vdh[:, 2])
+            theta = inclination_from_gse(self.b_gse, self.time,
+                                         chunk_size=97, backend=backend)
+            np.testing.assert_allclose(theta, expected, rtol=0, atol=1e-12)
+
+    def test_chunk_size_does_not_change_result(self):
+        full = inclination_from_gse(self.b_gse, self.time, backend='native')
+        for chunk_size in (1, 64, len(self.time) + 1):
+            np.testing.assert_allclose(
+                inclination_from_gse(self.b_gse, self.time,
+                                     chunk_size=chunk_size,
+                                     backend='native'),
+                full, rtol=0, atol=1e-14)
+        with self.assertRaises(ValueError):
+            inclination_from_gse(self.b_gse, self.time, chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
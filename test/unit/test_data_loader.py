@@ -1,6 +1,12 @@
 import unittest
 import sys
+import os
+import pickle
+import datetime
+import tempfile
 import numpy as np
+import pandas as pd
+import netCDF4 as nc
 
 sys.path.insert(0, '../../src')  #noqa
 from data_loader import *
@@ -69,5 +75,188 @@ class TestDataLoaderFunctions(unittest.TestCase):
         expected_result = pd.to_datetime('2003-03-03 21:46:40')
         self.assertEqual(time_asdtm[0], expected_result)
 
+def write_model_pickle(path, day, n_points=24):
+    time = pd.date_range(day, periods=n_points, freq='1H')
+    values = np.arange(n_points * 3, dtype=float).reshape(n_points, 3)
+    with open(path, 'wb') as file:
+        pickle.dump({'time_min': list(time.to_pydatetime()),
+                     'sat_gse': values, 'ts04_gse': values + 1,
+                     'ts04-sat': values - 1}, file)
+
+
+class TestLoadAndTrimArrays(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for day in ('2022-08-03', '2022-08-04', '2022-08-05'):
+            write_model_pickle(os.path.join(
+                self.tmp.name, f'sosmag_modout_OMNI{day}.pickle'), day)
+        # Out of range files are never opened, so a corrupt one is harmless
+        with open(os.path.join(self.tmp.name,
+                               'sosmag_modout_OMNI2019-01-01.pickle'),
+                  'wb') as file:
+            file.write(b'not a pickle')
+
+    def test_date_from_filename(self):
+        self.assertEqual(
+            date_from_filename('sosmag_modout_OMNI2022-08-04.pickle'),
+            datetime.date(2022, 8, 4))
+        self.assertIsNone(date_from_filename('modout.pickle'))
+        self.assertIsNone(date_from_filename('x2022-13-45.pickle'))
+
+    def test_select_pickle_files(self):
+        files = select_pickle_files(self.tmp.name,
+                                    datetime.datetime(2022, 8, 4),
+                                    datetime.datetime(2022, 8, 4, 12))
+        self.assertEqual([os.path.basename(f) for f in files],
+                         ['sosmag_modout_OMNI2022-08-04.pickle'])
+        self.assertEqual(len(select_pickle_files(
+            self.tmp.name, '2022-08-04', '2022-08-04', pad_days=1)), 3)
+
+    def test_matches_load_and_trim_data(self):
+        start = datetime.datetime(2022, 8, 4, 6)
+        end = datetime.datetime(2022, 8, 5, 3)
+        for workers in (1, 2):
+            time, data, model, subtr = load_and_trim_arrays(
+                self.tmp.name, start, end, workers=workers)
+            self.assertEqual(time.dtype, np.dtype('datetime64[ns]'))
+            self.assertEqual(len(time), 22)
+            self.assertEqual(time[0], np.datetime64(start))
+            self.assertEqual(time[-1], np.datetime64(end))
+            self.assertTrue(np.all(np.diff(time) > np.timedelta64(0)))
+            self.assertTrue(data.flags['C_CONTIGUOUS'])
+            np.testing.assert_array_equal(model, data + 1)
+            np.testing.assert_array_equal(subtr, data - 1)
+
+    def test_empty_range(self):
+        time, data, model, subtr = load_and_trim_arrays(
+            self.tmp.name, '2021-01-01', '2021-01-02')
+        self.assertEqual(len(time), 0)
+        self.assertEqual(data.shape, (0, 3))
+
+
+class TestMergeSortedSeries(unittest.TestCase):
+    def setUp(self):
+        # Two daily files sharing the midnight sample, given out of order
+        self.day1 = pd.date_range('2022-08-04', '2022-08-05', freq='6H').values
+        self.day2 = pd.date_range('2022-08-05', '2022-08-06', freq='6H').values
+        self.parts = [(self.day2, np.full(5, 2.0)),
+                      (self.day1, np.full(5, 1.0))]
+
+    def test_concatenates_in_time_order(self):
+        time, values = merge_sorted_series(self.parts)
+        self.assertEqual(len(time), 10)
+        self.assertTrue(np.all(np.diff(time) >= np.timedelta64(0)))
+        np.testing.assert_array_equal(values, [1] * 5 + [2] * 5)
+
+    def test_drop_duplicates_keeps_earlier_part(self):
+        for parts in (self.parts, self.parts[::-1]):
+            time, values = merge_sorted_series(parts, drop_duplicates=True)
+            self.assertEqual(len(time), 9)
+            self.assertTrue(np.all(np.diff(time) > np.timedelta64(0)))
+            # The midnight sample comes from the file that starts first
+            self.assertEqual(values[4], 1.0)
+
+    def test_overlapping_and_unsorted_parts(self):
+        rng = np.random.default_rng(1)
+        time = pd.date_range('2022-08-01', periods=300, freq='1min').values
+        shuffled = rng.permutation(300)
+        parts = [(time[shuffled[:150]], shuffled[:150]),
+                 (np.sort(time[shuffled[150:]]), np.sort(shuffled[150:]))]
+        merged_time, merged_index = merge_sorted_series(parts)
+        np.testing.assert_array_equal(merged_time, time)
+        np.testing.assert_array_equal(merged_index, np.arange(300))
+
+    def test_empty(self):
+        self.assertIsNone(merge_sorted_series([]))
+        empty = (np.array([], dtype='datetime64[ns]'), np.empty((0, 3)))
+        self.assertIsNone(merge_sorted_series([empty]))
+
+
+def write_goes_nc(path, n_points=4 * 1440):
+    time = pd.date_range('2022-08-01', periods=n_points, freq='1min')
+    b_gse = np.arange(n_points * 3, dtype='f4').reshape(n_points, 3)
+    b_gse[10, 1] = -9999.0
+    with nc.Dataset(path, 'w') as dataset:
+        dataset.createDimension('time', n_points)
+        dataset.createDimension('component', 3)
+        time_var = dataset.createVariable('time', 'f8', ('time',))
+        time_var.units = 'seconds since 2000-01-01 12:00:00'
+        time_var[:] = (time - pd.Timestamp('2000-01-01 12:00')) / \
+            pd.Timedelta(1, 's')
+        var = dataset.createVariable('b_gse', 'f4', ('time', 'component'),
+                                     fill_value=-9999.0, chunksizes=(1440, 3))
+        var[:] = b_gse
+    return time, b_gse
+
+
+class TestReadGoesWindow(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'goes.nc')
+        self.time, self.b_gse = write_goes_nc(self.path)
+
+    def test_window(self):
+        time, data = read_goes_window(self.path, '2022-08-02 06:00',
+                                      '2022-08-02 07:30')
+        expected = (self.time >= '2022-08-02 06:00') & \
+                   (self.time <= '2022-08-02 07:30')
+        np.testing.assert_array_equal(time, self.time[expected].values)
+        self.assertEqual(data['b_gse'].shape, (91, 3))
+        self.assertNotIsInstance(data['b_gse'], np.ma.MaskedArray)
+        np.testing.assert_array_equal(data['b_gse'], self.b_gse[expected])
+
+    def test_whole_file_matches_process_goes_dataset(self):
+        with nc.Dataset(self.path) as dataset:
+            time, data = read_goes_window(dataset)
+            expected = process_goes_dataset(dataset['b_gse'])
+            # The caller's masking setting is left alone
+            self.assertTrue(dataset['b_gse'].mask)
+            np.testing.assert_array_equal(
+                time, goes_epoch_to_datetime(dataset['time'][:]).values)
+        self.assertTrue(np.isnan(data['b_gse'][10, 1]))
+        np.testing.assert_array_equal(data['b_gse'], expected)
+
+    def test_raw_keeps_fill_values(self):
+        _, data = read_goes_window(self.path, end='2022-08-01 00:10',
+                                   raw=True)
+        self.assertEqual(len(data['b_gse']), 11)
+        self.assertEqual(data['b_gse'][10, 1], -9999.0)
+
+    def test_other_variables_keep_negative_values(self):
+        with nc.Dataset(self.path, 'a') as dataset:
+            position = dataset.createVariable(
+                'gse_position', 'f8', ('time', 'component'),
+                fill_value=-1e+31)
+            values = np.full((len(self.time), 3), -42164.0)
+            values[5] = -1e+31
+            position[:] = values
+            speed = dataset.createVariable('speed', 'f4', ('time',))
+            speed.valid_range = np.array([0.0, 1000.0], dtype='f4')
+            speed[:] = np.where(np.arange(len(self.time)) == 7, -5.0, 400.0)
+        _, data = read_goes_window(self.path, end='2022-08-01 00:10',
+                                   variables=('b_gse', 'gse_position',
+                                              'speed'))
+        self.assertTrue(np.isnan(data['b_gse'][10, 1]))
+        self.assertTrue(np.isnan(data['gse_position'][5]).all())
+        positions = np.delete(data['gse_position'], 5, axis=0)
+        np.testing.assert_array_equal(positions, -42164.0)
+        self.assertTrue(np.isnan(data['speed'][7]))
+        self.assertEqual(np.isnan(data['speed']).sum(), 1)
+
+    def test_empty_window(self):
+        time, data = read_goes_window(self.path, '2023-01-01', '2023-01-02')
+        self.assertEqual(len(time), 0)
+        self.assertEqual(data['b_gse'].shape, (0, 3))
+
+    def test_time_window_indices(self):
+        values = np.array([0., 1., 1., 2., 5.])
+        self.assertEqual(time_window_indices(values, 1, 2), (1, 4))
+        self.assertEqual(time_window_indices(values, 3, 4), (4, 4))
+        self.assertEqual(time_window_indices(values), (0, 5))
+        self.assertEqual(time_window_indices(values, 5, 1), (4, 4))
+
+
 if __name__ == '__main__':
     unittest.main()
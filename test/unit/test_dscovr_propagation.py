@@ -0,0 +1,32 @@
+import unittest
+import os
+import sys
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                       'src'))
+
+
+class TestImports(unittest.TestCase):
+    def run_python(self, code, cwd):
+        return subprocess.run([sys.executable, '-c', code], cwd=cwd,
+                              capture_output=True, text=True)
+
+    def test_import_from_own_directory(self):
+        # python dscovr_propagation.py / data_comparison.py run from
+        # src/DSCOVR_prop, where src is not on the path
+        result = self.run_python(
+            'import dscovr_propagation, data_comparison',
+            os.path.join(SRC_DIR, 'DSCOVR_prop'))
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_import_as_package(self):
+        # As magpause_loc imports it, from src
+        result = self.run_python(
+            'from DSCOVR_prop.dscovr_propagation import propagate_parameters',
+            SRC_DIR)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
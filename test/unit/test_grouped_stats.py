@@ -0,0 +1,77 @@
+import unittest
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from grouped_stats import *
+
+
+class TestGroupedStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        # 40 days of 1-minute data across a month boundary, with a gap
+        time = pd.date_range('2022-07-20 00:00:30', periods=40 * 1440,
+                             freq='1min')
+        keep = np.ones(len(time), dtype=bool)
+        keep[5000:9000] = False
+        self.time = time[keep]
+        self.values = rng.normal(0, 10, (len(self.time), 3))
+        self.values[rng.integers(0, len(self.time), 500), 1] = np.nan
+        self.mask = rng.random(len(self.time)) < 0.2
+
+    def test_matches_pandas_resample(self):
+        result = grouped_stats(self.time, self.values, mask=self.mask,
+                               quantiles=(0.1, 0.5))
+        frame = pd.DataFrame(self.values, index=self.time).mask(
+            np.repeat(self.mask[:, None], 3, axis=1))
+        for freq in DEFAULT_FREQS:
+            resampled = frame.resample(freq)
+            expected = {'count': resampled.count(), 'mean': resampled.mean(),
+                        'std': resampled.std(), 'min': resampled.min(),
+                        'max': resampled.max(),
+                        'q0.1': resampled.quantile(0.1),
+                        'q0.5': resampled.median()}
+            self.assertEqual(len(result[freq]['time']), len(expected['std']))
+            for key, values in expected.items():
+                np.testing.assert_allclose(result[freq][key], values.values,
+                                           rtol=1e-10, atol=1e-10,
+                                           err_msg=f'{freq} {key}')
+        np.testing.assert_array_equal(result['D']['time'],
+                                      frame.resample('D').std().index.values)
+        np.testing.assert_array_equal(
+            result['M']['time'],
+            np.array(['2022-07', '2022-08'], dtype='datetime64[M]').astype(
+                'datetime64[ns]'))
+        # Empty bins in the gap
+        self.assertEqual(result['H']['count'][85:149, 0].max(), 0)
+
+    def test_one_dimensional_unsorted(self):
+        order = np.random.default_rng(3).permutation(len(self.time))
+        result = grouped_stats(self.time[order], self.values[order, 0],
+                               freqs=('6H', 'D'), quantiles=(0.5,))
+        expected = pd.Series(self.values[:, 0], index=self.time).resample(
+            '6H')
+        self.assertEqual(result['6H']['std'].ndim, 1)
+        np.testing.assert_allclose(result['6H']['std'], expected.std(),
+                                   rtol=1e-10)
+        np.testing.assert_allclose(result['6H']['q0.5'], expected.median(),
+                                   rtol=1e-10)
+        frame = to_frame(result['D'])
+        self.assertEqual(list(frame.columns), ['count', 'mean', 'std', 'min',
+                                               'max', 'q0.5'])
+
+    def test_empty_and_invalid_input(self):
+        result = grouped_stats([], [], quantiles=(0.5,))
+        self.assertEqual(len(result['H']['time']), 0)
+        self.assertEqual(result['M']['q0.5'].shape, (0,))
+        with self.assertRaises(ValueError):
+            grouped_stats(self.time, self.values, freqs=('W',))
+        with self.assertRaises(ValueError):
+            grouped_stats(self.time, self.values[:10])
+        with self.assertRaises(ValueError):
+            grouped_stats(self.time, self.values, quantiles=(1.5,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from kp_data_processing import *
+
+
+def make_kp(kp_values, start='2019-04-01'):
+    return pd.DataFrame({'Kp': kp_values,
+                         'Time': pd.date_range(start, periods=len(kp_values),
+                                               freq='3H')})
+
+
+class TestKpMask(unittest.TestCase):
+    def test_matches_createkpMask_on_minute_grid(self):
+        rng = np.random.default_rng(4)
+        dfkp = make_kp(rng.uniform(0, 5, 24))
+        times = pd.date_range('2019-04-01', periods=3 * 1440, freq='1min')
+        expected = createkpMask(dfkp, list(times.to_pydatetime()))
+        result = create_kp_mask_array(dfkp, times)
+        self.assertIsInstance(result, np.ndarray)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_kp_timestamp_missing_from_grid(self):
+        # Data starts at 01:30, after the first Kp timestamp; the rest of
+        # that window is still masked (createkpMask would skip it)
+        dfkp = make_kp([4.0, 1.0, 5.0])
+        times = pd.date_range('2019-04-01 01:30', '2019-04-01 08:59',
+                              freq='1min')
+        mask = create_kp_mask_array(dfkp, times)
+        self.assertTrue(mask[times < '2019-04-01 03:00'].all())
+        self.assertFalse(mask[(times >= '2019-04-01 03:00') &
+                              (times < '2019-04-01 06:00')].any())
+        self.assertTrue(mask[times >= '2019-04-01 06:00'].all())
+        self.assertFalse(any(createkpMask(dfkp, list(times)[:60])))
+
+    def test_window_and_unsorted_times(self):
+        dfkp = make_kp([4.0, 1.0])
+        times = pd.date_range('2019-04-01', periods=360, freq='1min')
+        mask = create_kp_mask_array(dfkp, times, window='1H')
+        self.assertEqual(mask.sum(), 60)
+        self.assertTrue(mask[:60].all())
+
+        shuffled = np.random.default_rng(0).permutation(times.values)
+        np.testing.assert_array_equal(
+            create_kp_mask_array(dfkp, shuffled, window='1H'),
+            shuffled < np.datetime64('2019-04-01T01:00'))
+
+
+class TestStddev(unittest.TestCase):
+    def test_matches_resample_std(self):
+        times = list(pd.date_range('2022-08-01', periods=3 * 1440,
+                                   freq='1min').to_pydatetime())
+        subtr = list(np.random.default_rng(5).normal(0, 4, len(times)))
+        kp_mask = [i % 7 == 0 for i in range(len(times))]
+        series = pd.DataFrame({'datetime': times, 'subtraction': subtr})
+        series = series.set_index('datetime')['subtraction']
+        for function, freq in ((calc_hourly_stddev, 'H'),
+                               (calc_daily_stddev, 'D')):
+            pd.testing.assert_series_equal(
+                function(times, subtr, kp_mask),
+                series.mask(kp_mask).resample(freq).std())
+            pd.testing.assert_series_equal(function(times, subtr),
+                                           series.resample(freq).std())
+
+
+if __name__ == '__main__':
+    unittest.main()
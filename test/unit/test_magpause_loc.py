@@ -0,0 +1,194 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+import netCDF4 as nc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from magpause_loc import *
+
+
+class TestAlignDrivers(unittest.TestCase):
+    def test_drivers_on_satellite_time_axis(self):
+        # Hourly-cadence OMNI-like driver, satellite samples every 20 minutes
+        sw_data = {'Epoch': pd.date_range('2024-05-10', periods=4,
+                                          freq='H').values,
+                   'BZ_GSM': np.array([-4.0, -2.0, np.nan, 2.0]),
+                   'flow_speed': np.array([400.0, 500.0, 600.0, 700.0]),
+                   'proton_density': np.array([5.0, 10.0, 15.0, 20.0])}
+        sw_dyn_p = calculate_solar_wind_dynamic_pressure(sw_data)
+        datetime_values = [datetime(2024, 5, 10) + timedelta(minutes=20 * i)
+                           for i in range(10)]
+
+        sw_bz, sw_pdyn = align_drivers(sw_data, sw_dyn_p, datetime_values,
+                                       max_gap='1H')
+        self.assertEqual(sw_bz.shape, (len(datetime_values),))
+        np.testing.assert_allclose(sw_bz[:4], [-4.0, -10 / 3, -8 / 3, -2.0])
+        # The NaN Bz leaves a two hour gap, too long to bridge
+        self.assertTrue(np.all(np.isnan(sw_bz[4:9])))
+        self.assertEqual(sw_bz[9], 2.0)
+        np.testing.assert_allclose(sw_pdyn[::3], sw_dyn_p)
+
+        sw_bz, _ = align_drivers(sw_data, sw_dyn_p, datetime_values,
+                                 'previous', max_gap=None)
+        np.testing.assert_array_equal(sw_bz[3:], [-2.0] * 6 + [2.0])
+
+        shue_r0, _ = run_shue(sw_bz, sw_pdyn)
+        flags = calculate_flags(shue_r0, np.zeros(10), np.zeros(10),
+                                np.ones((10, 3)))
+        self.assertEqual(len(flags['flag_r0']), len(datetime_values))
+
+
+def write_goes_files(directory, satellite, start, n_samples, seed):
+    """ Minimal 1-minute magnetometer and MPS-LO files of one satellite. """
+    rng = np.random.default_rng(seed)
+    j2000 = (start - datetime(2000, 1, 1, 12)).total_seconds() + \
+        60.0 * np.arange(n_samples)
+    magn_file = os.path.join(directory, f'magn_{satellite}.nc')
+    with nc.Dataset(magn_file, 'w') as dataset:
+        dataset.createDimension('time', n_samples)
+        dataset.createDimension('vector', 3)
+        time = dataset.createVariable('time', 'f8', ('time',))
+        time.units = TIME_UNITS
+        time[:] = j2000
+        for name in ('b_gsm', 'b_epn', 'orbit_llr_geo'):
+            variable = dataset.createVariable(name, 'f4', ('time', 'vector'),
+                                              fill_value=1e+20)
+            variable[:] = rng.normal(0, 50, (n_samples, 3))
+    mpsl_file = os.path.join(directory, f'mpsl_{satellite}.nc')
+    with nc.Dataset(mpsl_file, 'w') as dataset:
+        dataset.createDimension('time', n_samples)
+        time = dataset.createVariable('time', 'f8', ('time',))
+        time.units = TIME_UNITS
+        time[:] = j2000
+        dataset.createDimension('energy_range', 2)
+        dataset.createDimension('moment', 4)
+        for name in ('EleMoments', 'IonMoments'):
+            variable = dataset.createVariable(
+                name, 'f4', ('time', 'energy_range', 'moment'),
+                fill_value=-1e+31)
+            moments = rng.uniform(0.1, 10, (n_samples, 2, 4))
+            moments[::7, 0, 1] = -1e+31
+            variable[:] = moments
+    return {f'{satellite}_magn_file': magn_file,
+            f'{satellite}_mpsl_file': mpsl_file}
+
+
+def omni_values(start_datetime, end_datetime):
+    epoch = pd.date_range(start_datetime, end_datetime, freq='1min').values
+    phase = np.arange(len(epoch)) / 100
+    return {'Epoch': epoch, 'BZ_GSM': 5 * np.sin(phase),
+            'flow_speed': 400 + 50 * np.cos(phase),
+            'proton_density': 5 + np.sin(phase) ** 2}
+
+
+class TestLoadInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = {}
+        for seed, satellite in enumerate(('g16', 'g18')):
+            self.config.update(write_goes_files(
+                self.tmp_dir.name, satellite,
+                datetime(2024, 5, 10, seed), 300, seed))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_pool_matches_sequential(self):
+        outputs = {}
+        with mock.patch('magpause_loc.get_omni_values',
+                        side_effect=omni_values) as get_omni:
+            for workers in (1, 2):
+                config = dict(self.config, workers=workers)
+                outputs[workers] = load_inputs(config, 'config.JSON')
+            # Both paths fetch the overlap of the satellites' time ranges
+            self.assertEqual(get_omni.call_args_list[0],
+                             get_omni.call_args_list[1])
+            self.assertEqual(get_omni.call_args_list[0][0],
+                             (datetime(2024, 5, 10, 1),
+                              datetime(2024, 5, 10, 4, 59)))
+
+        results, sw_data, sw_data_via = outputs[1]
+        pooled, pooled_sw_data, pooled_via = outputs[2]
+        self.assertEqual(list(results), ['g16', 'g18'])
+        self.assertEqual(list(pooled), ['g16', 'g18'])
+        self.assertEqual(pooled_via, sw_data_via)
+        np.testing.assert_array_equal(pooled_sw_data['Epoch'],
+                                      sw_data['Epoch'])
+        for key, res in results.items():
+            self.assertEqual(sorted(pooled[key]), sorted(res))
+            for name, values in res.items():
+                np.testing.assert_array_equal(pooled[key][name], values)
+        self.assertEqual(results['g18']['start_datetime'],
+                         datetime(2024, 5, 10, 1))
+
+    def test_pool_error_propagates(self):
+        config = dict(self.config, workers=2)
+        with mock.patch('magpause_loc.get_omni_values',
+                        side_effect=LookupError('offline')):
+            with self.assertRaises(LookupError):
+                load_inputs(config, 'config.JSON')
+
+    def test_no_satellites(self):
+        self.assertEqual(load_inputs({}, 'config.JSON'), ({}, None, None))
+
+
+class TestReadNcData(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = write_goes_files(self.tmp_dir.name, 'g18',
+                                       datetime(2024, 5, 10), 600, 7)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hyperslabs(self):
+        mpsl_data = read_nc_data(self.config['g18_mpsl_file'])
+        self.assertEqual(sorted(mpsl_data),
+                         ['EleMoments', 'IonMoments', 'time'])
+        self.assertEqual(mpsl_data['IonMoments'].shape, (600, 1, 3))
+        with nc.Dataset(self.config['g18_mpsl_file']) as dataset:
+            full = dataset['IonMoments'][:]
+        np.testing.assert_array_equal(mpsl_data['IonMoments'],
+                                      full[:, 0:1, 0:3])
+        np.testing.assert_array_equal(
+            extract_moment_data(mpsl_data['IonMoments']),
+            extract_moment_data(full))
+
+        magn_data = read_nc_data(self.config['g18_magn_file'],
+                                 FLAG_READ_SPEC)
+        self.assertEqual(sorted(magn_data), ['b_epn', 'time'])
+        magn_data = read_nc_data(self.config['g18_magn_file'],
+                                 {'b_gsm': np.s_[:, 2]})
+        self.assertEqual(magn_data['b_gsm'].shape, (600,))
+
+    def test_time_window(self):
+        full = process_satellite(self.config, 'g18')
+        self.assertEqual(len(full['datetime_values']), 600)
+        self.assertEqual(full['ion_ratios'].shape, (600,))
+        self.assertTrue(np.isnan(full['ion_ratios'][0]))
+
+        start, end = '2024-05-10 02:00', datetime(2024, 5, 10, 3, 0, 30)
+        window = process_satellite(self.config, 'g18', FLAG_READ_SPEC,
+                                   start, end)
+        self.assertNotIn('b_gsm', window)
+        self.assertEqual(window['datetime_values'],
+                         full['datetime_values'][120:181])
+        for name in ('b_epn', 'ion_ratios', 'electron_ratios'):
+            np.testing.assert_array_equal(window[name], full[name][120:181])
+        self.assertEqual(read_time_range(self.config['g18_magn_file'],
+                                         start, end),
+                         (datetime(2024, 5, 10, 2), datetime(2024, 5, 10, 3)))
+
+        self.assertEqual(process_satellite(self.config, 'g18',
+                                           start='2024-06-01'), {})
+        self.assertIsNone(read_time_range(self.config['g18_magn_file'],
+                                          start='2024-06-01'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from model_store import *
+import data_loader
+
+
+def write_model_pickle(path, start, n_points, freq='1H'):
+    time = pd.date_range(start, periods=n_points, freq=freq)
+    values = np.arange(n_points * 3, dtype=float).reshape(n_points, 3)
+    values += time.day.values[:, None] * 1000
+    with open(path, 'wb') as file:
+        pickle.dump({'time_min': list(time.to_pydatetime()),
+                     'sat_gse': values, 'ts89_gse': values + 1,
+                     'ts89-sat': values - 1}, file)
+
+
+class TestModelStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.pickle_dir = os.path.join(self.tmp.name, 'pickles')
+        self.store_dir = os.path.join(self.tmp.name, 'store')
+        os.makedirs(self.pickle_dir)
+        # Two days either side of a month boundary
+        for day in ('2022-07-30', '2022-07-31', '2022-08-01', '2022-08-02'):
+            write_model_pickle(os.path.join(
+                self.pickle_dir, f'sosmag_modout_OMNI{day}.pickle'), day, 24)
+        self.metadata = convert_pickle_archive(self.pickle_dir,
+                                               self.store_dir, workers=1)
+
+    def test_monthly_partitions(self):
+        self.assertTrue(is_store(self.store_dir))
+        self.assertFalse(is_store(self.pickle_dir))
+        self.assertEqual(sorted(self.metadata['partitions']),
+                         ['2022-07', '2022-08'])
+        self.assertEqual(self.metadata['partitions']['2022-07']['rows'], 48)
+        self.assertEqual(read_metadata(self.store_dir), self.metadata)
+
+    def test_read_range_matches_pickles(self):
+        start, end = '2022-07-31 20:00', '2022-08-01 05:00'
+        rows = read_range(self.store_dir, start, end)
+        expected = data_loader.load_and_trim_arrays(self.pickle_dir, start,
+                                                    end, workers=1)
+        np.testing.assert_array_equal(rows['time'], expected[0])
+        for i, column in enumerate(COLUMNS, start=1):
+            np.testing.assert_array_equal(rows[column], expected[i])
+        self.assertEqual(len(rows['time']), 10)
+
+    def test_single_partition_is_memory_mapped(self):
+        rows = read_range(self.store_dir, '2022-08-01 03:00',
+                          '2022-08-01 04:00', columns=('subtr',))
+        self.assertEqual(sorted(rows), ['subtr', 'time'])
+        self.assertIsInstance(rows['subtr'], np.memmap)
+        self.assertEqual(rows['subtr'].shape, (2, 3))
+        with self.assertRaises(KeyError):
+            read_range(self.store_dir, '2022-08-01', '2022-08-02',
+                       columns=('ts04',))
+
+    def test_empty_range(self):
+        rows = read_range(self.store_dir, '2023-01-01', '2023-01-02')
+        self.assertEqual(len(rows['time']), 0)
+        self.assertEqual(rows['model'].shape, (0, 3))
+
+    def test_write_replaces_covered_months_only(self):
+        time = pd.date_range('2022-08-15', periods=5, freq='1min').values
+        write_store(self.store_dir, time[::-1],
+                    {column: np.zeros((5, 3)) for column in COLUMNS},
+                    replace=True)
+        metadata = read_metadata(self.store_dir)
+        self.assertEqual(metadata['partitions']['2022-08']['rows'], 5)
+        self.assertEqual(metadata['partitions']['2022-07']['rows'], 48)
+        rows = read_range(self.store_dir, '2022-08-01', '2022-08-31')
+        np.testing.assert_array_equal(rows['time'], time)
+
+    def test_write_day_by_day_merges(self):
+        store_dir = os.path.join(self.tmp.name, 'daily_store')
+        days = {}
+        for day, value in (('2022-09-02', 2.0), ('2022-09-01', 1.0)):
+            time = pd.date_range(day, periods=24, freq='1H').values
+            days[day] = time
+            write_store(store_dir, time, {column: np.full((24, 3), value)
+                                          for column in COLUMNS})
+        metadata = read_metadata(store_dir)
+        self.assertEqual(metadata['partitions']['2022-09'],
+                         {'rows': 48, 'start': '2022-09-01T00:00:00.000000000',
+                          'end': '2022-09-02T23:00:00.000000000'})
+        rows = read_range(store_dir, '2022-09-01', '2022-09-30')
+        np.testing.assert_array_equal(
+            rows['time'], np.concatenate([days['2022-09-01'],
+                                          days['2022-09-02']]))
+        np.testing.assert_array_equal(rows['subtr'][:, 0],
+                                      [1.0] * 24 + [2.0] * 24)
+
+        # Rewriting part of a day replaces just that span
+        time = pd.date_range('2022-09-01 06:00', periods=3, freq='1H').values
+        write_store(store_dir, time, {column: np.full((3, 3), 9.0)
+                                      for column in COLUMNS})
+        rows = read_range(store_dir, '2022-09-01', '2022-09-30')
+        self.assertEqual(len(rows['time']), 48)
+        np.testing.assert_array_equal(rows['model'][:, 0],
+                                      [1.0] * 6 + [9.0] * 3 + [1.0] * 15 +
+                                      [2.0] * 24)
+
+    def test_loaders_read_store_directly(self):
+        start = pd.to_datetime('2022-07-31 22:00')
+        end = pd.to_datetime('2022-08-01 01:00')
+        time, data, model, subtr = data_loader.load_and_trim_data(
+            self.store_dir, start, end)
+        self.assertEqual(time, list(pd.date_range(start, end, freq='1H')))
+        np.testing.assert_array_equal(np.array(model), np.array(data) + 1)
+
+        time, data, model, subtr = data_loader.load_and_trim_arrays(
+            self.store_dir, start, end)
+        self.assertEqual(len(time), 4)
+        self.assertNotIsInstance(data, np.memmap)
+        np.testing.assert_array_equal(subtr, data - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
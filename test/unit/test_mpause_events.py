@@ -0,0 +1,151 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from mpause_events import *
+
+
+def random_flags(n_samples, seed):
+    """ Flag arrays with runs of a few to a few hundred samples. """
+    rng = np.random.default_rng(seed)
+    flags = {}
+    for name in FLAG_BITS:
+        lengths = rng.integers(1, 300, size=n_samples)
+        values = np.repeat(np.arange(len(lengths)) % 2, lengths)[:n_samples]
+        flags[name] = values if rng.random() < 0.5 else 1 - values
+    return flags
+
+
+def loop_events(satellite, times, flags, max_gap):
+    """ Reference run-length encoding, one sample at a time. """
+    masks = flag_mask(flags)
+    ns = pd.DatetimeIndex(times).asi8
+    events = []
+    for i, mask in enumerate(masks):
+        if i and mask == masks[i - 1] and ns[i] - ns[i - 1] <= max_gap:
+            events[-1][2] = ns[i]
+            events[-1][3] += 1
+        else:
+            events.append([satellite, ns[i], ns[i], 1, mask])
+    return [tuple(event) for event in events if event[4]]
+
+
+def as_tuples(events):
+    return list(zip(events['satellite'], events['start'].view(np.int64),
+                    events['end'].view(np.int64), events['n_samples'],
+                    events['flags']))
+
+
+class TestEventExtraction(unittest.TestCase):
+    def setUp(self):
+        # Three days of 1-minute samples with a 10 minute data gap
+        times = pd.date_range('2023-03-01', periods=3 * 1440, freq='1min')
+        self.times = times.delete(np.arange(2000, 2010))
+        self.flags = random_flags(len(self.times), seed=4)
+
+    def test_streaming_matches_one_pass(self):
+        max_gap = pd.Timedelta('2min').value
+        expected = sorted(loop_events('g18', self.times, self.flags,
+                                      max_gap))
+        one_pass = extract_events([('g18', self.times, self.flags)])
+        self.assertEqual(sorted(as_tuples(one_pass)), expected)
+
+        # Day chunks (datetime lists, as process_satellite) and odd splits,
+        # interleaved with a second satellite
+        for bounds in ([0, 1440, 2870, len(self.times)],
+                       [0, 1, 2, 777, 778, 3000, len(self.times)]):
+            chunks = []
+            for first, last in zip(bounds[:-1], bounds[1:]):
+                chunk_flags = {name: values[first:last]
+                               for name, values in self.flags.items()}
+                chunks.append(('g18', list(self.times[first:last]
+                                           .to_pydatetime()), chunk_flags))
+                chunks.append(('g16', self.times[first:last], chunk_flags))
+            events = extract_events(chunks)
+            result = sorted(event for event in as_tuples(events)
+                            if event[0] == 'g18')
+            self.assertEqual(result, expected)
+            self.assertEqual(len(events['start']), 2 * len(expected))
+
+    def test_gaps_and_order(self):
+        flags = {name: np.ones(len(self.times), dtype=int)
+                 for name in FLAG_BITS}
+        events = extract_events([('g16', self.times, flags)])
+        np.testing.assert_array_equal(events['n_samples'],
+                                      [2000, len(self.times) - 2000])
+        np.testing.assert_array_equal(events['flags'], [15, 15])
+        events = extract_events([('g16', self.times, flags)], max_gap=None)
+        self.assertEqual(len(events['start']), 1)
+        self.assertEqual(flag_names(events['flags'][0]), list(FLAG_BITS))
+
+        state = new_stream_state()
+        update_events(state, 'g16', self.times[100:200],
+                      {name: values[100:200] for name, values in
+                       flags.items()})
+        with self.assertRaises(ValueError):
+            update_events(state, 'g16', self.times[:100],
+                          {name: values[:100] for name, values in
+                           flags.items()})
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'events.npz')
+        times = pd.date_range('2023-01-01', periods=20000, freq='1min')
+        chunks = [(satellite, times, random_flags(len(times), seed))
+                  for seed, satellite in enumerate(('g18', 'g16', 'g17'))]
+        self.events = extract_events(chunks)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_query_matches_filter(self):
+        write_catalog(self.path, self.events)
+        catalog = load_catalog(self.path)
+        self.assertEqual(list(catalog['satellites']), ['g16', 'g17', 'g18'])
+        frame = to_frame(self.events)
+        frame['n_flags'] = n_flags(frame['flags'])
+
+        start, end = pd.Timestamp('2023-01-04 03:17'), pd.Timestamp(
+            '2023-01-09 12:00')
+        for satellite, min_flags in (('g18', 3), ('g16', 1), (None, 2)):
+            result = query_events(catalog, satellite, start, end, min_flags)
+            expected = frame[(frame['start'] <= end) &
+                             (frame['end'] >= start) &
+                             (frame['n_flags'] >= min_flags)]
+            if satellite is not None:
+                expected = expected[expected['satellite'] == satellite]
+            expected = expected.sort_values(['satellite', 'start'])
+            np.testing.assert_array_equal(result['start'],
+                                          expected['start'].values)
+            np.testing.assert_array_equal(result['satellite'],
+                                          expected['satellite'].values)
+            self.assertTrue(np.all(result['n_flags'] >= min_flags))
+            self.assertGreater(len(result['start']), 0)
+
+        result = query_events(catalog, 'g17', flags=['flag_r0', 'flag_ions'])
+        self.assertTrue(np.all(result['flags'] & 9 == 9))
+        self.assertEqual(len(result['start']),
+                         np.sum((self.events['satellite'] == 'g17') &
+                                (self.events['flags'] & 9 == 9)))
+        empty = query_events(catalog, 'g19', start, end)
+        self.assertEqual(len(empty['start']), 0)
+
+    def test_empty_catalog_and_cli(self):
+        write_catalog(self.path, concat_events([]))
+        self.assertEqual(len(query_events(load_catalog(self.path))['start']),
+                         0)
+        write_catalog(self.path, self.events)
+        events = main(['query', self.path, '--satellite', 'g18',
+                       '--start', '2023-01-02', '--end', '2023-01-03',
+                       '--min-flags', '4'])
+        self.assertTrue(np.all(events['flags'] == 15))
+
+
+if __name__ == '__main__':
+    unittest.main()
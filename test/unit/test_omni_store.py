@@ -0,0 +1,159 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from omni_store import *
+
+
+class LocalCdasWs:
+    """ Stand-in for cdasws.CdasWs serving synthetic 1-minute OMNI data:
+    each variable is a function of the minute, with fill values. """
+
+    def __init__(self, stop=None):
+        self.requests = []
+        # Current end of the archive; later minutes are not served
+        self.stop = stop
+
+    def get_data(self, dataset, variables, start, end, **kwargs):
+        self.requests.append((dataset, tuple(variables), start, end))
+        end = pd.Timestamp(end).tz_localize(None)
+        if self.stop is not None:
+            end = min(end, pd.Timestamp(self.stop))
+        epoch = pd.date_range(pd.Timestamp(start).tz_localize(None), end,
+                              freq='1min')
+        minutes = (epoch - pd.Timestamp('2024-01-01')) // pd.Timedelta(
+            1, 'min')
+        data = {'Epoch': epoch.to_pydatetime()}
+        for i, variable in enumerate(variables):
+            values = np.asarray(minutes, dtype=float) * 0.01 + i
+            values[minutes % 97 == 0] = FILL_VALUES.get(variable, 9999.99)
+            data[variable] = values
+        return {'http': {'status_code': 200}}, data
+
+
+def expected_values(start, end, offset=0):
+    """ LocalCdasWs values and fill mask of a range. """
+    minutes = (pd.date_range(start, end, freq='1min') -
+               pd.Timestamp('2024-01-01')) // pd.Timedelta(1, 'min')
+    return np.asarray(minutes, dtype=float) * 0.01 + offset, \
+        np.asarray(minutes % 97 == 0)
+
+
+class TestOmniStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store_dir = self.tmp.name
+        self.cdas = LocalCdasWs()
+        self.variables = ['BZ_GSM', 'flow_speed']
+
+    def get(self, start, end, **kwargs):
+        return get_data(self.variables, start, end, store_dir=self.store_dir,
+                        cdas=self.cdas, offline=False, **kwargs)
+
+    def test_fetches_only_missing_spans(self):
+        data = self.get('2024-05-10 10:00', '2024-05-10 12:00')
+        self.assertEqual(len(self.cdas.requests), 1)
+        self.assertEqual(len(data['Epoch']), 121)
+        data = self.get('2024-05-10 11:00', '2024-05-10 11:30')
+        self.assertEqual(len(self.cdas.requests), 1)
+
+        data = self.get('2024-05-10 09:00', '2024-05-10 13:00')
+        self.assertEqual([request[2:] for request in self.cdas.requests[1:]],
+                         [('2024-05-10T09:00:00Z', '2024-05-10T09:59:00Z'),
+                          ('2024-05-10T12:01:00Z', '2024-05-10T13:00:00Z')])
+        self.assertEqual(coverage('BZ_GSM', self.store_dir),
+                         [(np.datetime64('2024-05-10T09:00'),
+                           np.datetime64('2024-05-10T13:00'))])
+        np.testing.assert_array_equal(
+            data['Epoch'], pd.date_range('2024-05-10 09:00',
+                                         '2024-05-10 13:00', freq='1min'))
+        raw, fill = expected_values('2024-05-10 09:00', '2024-05-10 13:00',
+                                    1)
+        self.assertTrue(fill.any())
+        np.testing.assert_allclose(data['flow_speed'][~fill], raw[~fill])
+        np.testing.assert_array_equal(
+            data['flow_speed'][fill], FILL_VALUES['flow_speed'])
+
+    def test_month_boundary_and_new_variable(self):
+        self.get('2024-05-31 23:00', '2024-06-01 01:00')
+        self.assertEqual(len(self.cdas.requests), 2)
+        self.assertTrue(os.path.exists(os.path.join(
+            self.store_dir, DATASET, '2024-06.nc')))
+        # A variable not fetched before only fetches that range again, one
+        # request per month
+        data = get_data(['SYM_H'], '2024-05-31 23:30', '2024-06-01 00:30',
+                        store_dir=self.store_dir, cdas=self.cdas,
+                        offline=False, fill_nan=True)
+        self.assertEqual(self.cdas.requests[-1][1], ('SYM_H',))
+        raw, fill = expected_values('2024-05-31 23:30', '2024-06-01 00:30')
+        np.testing.assert_array_equal(np.isnan(data['SYM_H']), fill)
+        np.testing.assert_allclose(data['SYM_H'][~fill], raw[~fill])
+
+        self.assertEqual(len(self.cdas.requests), 4)
+
+        raw, fill = expected_values('2024-05-31 23:00', '2024-06-01 01:00')
+        data = self.get('2024-05-31 23:00', '2024-06-01 01:00',
+                        fill_nan=True)
+        self.assertEqual(len(self.cdas.requests), 4)
+        np.testing.assert_array_equal(np.isnan(data['BZ_GSM']), fill)
+        np.testing.assert_allclose(data['BZ_GSM'][~fill], raw[~fill])
+
+    def test_offline(self):
+        self.get('2024-05-10 10:00', '2024-05-10 12:00')
+        with mock.patch.dict(os.environ, {'OMNI_OFFLINE': '1'}):
+            data = get_data(self.variables, '2024-05-10 10:30',
+                            '2024-05-10 11:00', store_dir=self.store_dir,
+                            cdas=self.cdas)
+            self.assertEqual(len(data['BZ_GSM']), 31)
+            with self.assertRaises(LookupError):
+                get_data(self.variables, '2024-05-10 11:00',
+                         '2024-05-10 12:30', store_dir=self.store_dir,
+                         cdas=self.cdas)
+        self.assertEqual(len(self.cdas.requests), 1)
+
+    def test_no_data_leaves_gap_open(self):
+        empty = mock.Mock()
+        empty.get_data.return_value = ({'http': {'status_code': 404}}, None)
+        data = get_data(self.variables, '2024-05-10 10:00',
+                        '2024-05-10 10:09', store_dir=self.store_dir,
+                        cdas=empty, offline=False)
+        self.assertTrue(np.isnan(data['BZ_GSM']).all())
+        self.assertEqual(len(missing_spans(self.variables, '2024-05-10 10:00',
+                                           '2024-05-10 10:09',
+                                           self.store_dir)), 1)
+
+    def test_partially_served_piece(self):
+        # The archive ends on 05-10: the later minutes must stay uncovered
+        self.cdas.stop = '2024-05-10 23:59'
+        data = self.get('2024-05-09 00:00', '2024-05-12 23:59')
+        self.assertEqual(len(data['Epoch']), 4 * 1440)
+        self.assertTrue(np.isnan(data['BZ_GSM'][2 * 1440:]).all())
+        self.assertEqual(coverage('BZ_GSM', self.store_dir),
+                         [(np.datetime64('2024-05-09T00:00'),
+                           np.datetime64('2024-05-10T23:59'))])
+
+        # Once the archive has grown, only the uncovered part is fetched
+        self.cdas.stop = None
+        data = self.get('2024-05-09 00:00', '2024-05-12 23:59')
+        self.assertEqual(self.cdas.requests[-1][2:],
+                         ('2024-05-11T00:00:00Z', '2024-05-12T23:59:00Z'))
+        self.assertEqual(len(self.cdas.requests), 2)
+        raw, fill = expected_values('2024-05-09 00:00', '2024-05-12 23:59')
+        np.testing.assert_allclose(data['BZ_GSM'][~fill], raw[~fill])
+
+        # Nothing served inside the piece: no coverage at all
+        self.cdas.stop = '2024-05-12 23:59'
+        self.get('2024-05-20 00:00', '2024-05-20 00:09')
+        self.assertEqual(len(missing_spans(self.variables, '2024-05-20 00:00',
+                                           '2024-05-20 00:09',
+                                           self.store_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
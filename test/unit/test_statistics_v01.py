@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import contextlib
+import numpy as np
+
+sys.path.insert(0, '../../src')  # noqa
+from statistics_v01 import *
+from test_streaming_stats import write_model_pickle
+
+
+class TestStatistics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dirs = []
+        for sc, seed in (('g17', 1), ('gk2a', 2)):
+            directory = os.path.join(self.tmp.name, sc)
+            os.makedirs(directory)
+            for i, day in enumerate(('2019-05-14', '2019-05-15')):
+                write_model_pickle(os.path.join(
+                    directory, f'{sc}_modout_OMNI{day}.pickle'), day, 144,
+                    seed * 10 + i)
+            self.dirs.append(directory)
+
+    def run_main(self, *options):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            summaries = main([*self.dirs, '--start-date', '2019-05-14',
+                              '--end-date', '2019-05-15', '--workers', '1',
+                              *options])
+        return summaries, output.getvalue()
+
+    def test_matches_list_statistics(self):
+        summaries, report = self.run_main()
+        series = [load_series(directory, '2019-05-14', '2019-05-15 23:59',
+                              workers=1) for directory in self.dirs]
+        for name, key_1, key_2, sc in (('model_vs_obs_1', 'model', 'data', 0),
+                                       ('subtr_vs_obs_2', 'subtr', 'data', 1)):
+            total = [[utils.calculate_total_magnetic_field(*point)
+                      for point in series[sc][key]] for key in (key_1, key_2)]
+            mean_diff, std_diff = utils.mean_and_std_dev(*total)
+            self.assertAlmostEqual(summaries[name]['mean_diff'][0], mean_diff)
+            self.assertAlmostEqual(summaries[name]['std_diff'][0], std_diff)
+        self.assertEqual(summaries['model_vs_model']['count'][0], 288)
+        self.assertIn('G17 |B| (GSE) obsv vs T89 model', report)
+
+    def test_checkpoint_mode_matches(self):
+        summaries, _ = self.run_main()
+        checkpoint = os.path.join(self.tmp.name, 'stats.json')
+        streamed, _ = self.run_main('--checkpoint', checkpoint)
+        self.assertTrue(os.path.exists(checkpoint))
+        for name, summary in summaries.items():
+            np.testing.assert_allclose(streamed[name]['std_diff'],
+                                       summary['std_diff'], rtol=1e-12)
+
+    def test_empty_range(self):
+        # Nothing compared is an empty report, a reversed range an error
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_report({})
+        self.assertEqual(output.getvalue(), '')
+        checkpoint = os.path.join(self.tmp.name, 'stats.json')
+        with contextlib.redirect_stderr(io.StringIO()), \
+                self.assertRaises(SystemExit):
+            self.run_main('--start-date', '2019-05-16', '--checkpoint',
+                          checkpoint)
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+if __name__ == '__main__':
+    unittest.main()
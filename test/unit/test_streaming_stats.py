@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../../src')  # noqa
+from streaming_stats import *
+import utils
+import data_loader
+
+
+def write_model_pickle(path, start, n_points, seed):
+    rng = np.random.default_rng(seed)
+    time = pd.date_range(start, periods=n_points, freq='10min')
+    values = rng.normal(50, 10, (n_points, 3))
+    model = values + rng.normal(2, 1, (n_points, 3))
+    with open(path, 'wb') as file:
+        pickle.dump({'time_min': list(time.to_pydatetime()),
+                     'sat_gse': values, 'ts89_gse': model,
+                     'ts89-sat': values - model}, file)
+
+
+class TestPairStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.normal(3, 2, (5000, 3))
+        self.y = 0.5 * self.x + rng.normal(1, 1, (5000, 3))
+        self.x[7, 1] = np.nan
+        self.y[9, 2] = np.nan
+
+    def test_batches_match_one_pass(self):
+        stats = new_pair_stats(3)
+        for x, y in zip(np.array_split(self.x, 13),
+                        np.array_split(self.y, 13)):
+            stats = update_pair_stats(stats, x, y)
+        stats = update_pair_stats(stats, np.empty((0, 3)), np.empty((0, 3)))
+        summary = summarize(stats)
+        for component in range(3):
+            valid = ~np.isnan(self.x[:, component] + self.y[:, component])
+            x = self.x[valid, component]
+            y = self.y[valid, component]
+            mean_diff, std_diff = utils.mean_and_std_dev(list(x), list(y))
+            self.assertEqual(summary['count'][component], valid.sum())
+            self.assertAlmostEqual(summary['mean_diff'][component], mean_diff)
+            self.assertAlmostEqual(summary['std_diff'][component], std_diff)
+            self.assertAlmostEqual(summary['slope'][component],
+                                   np.polyfit(x, y, 1)[0])
+            self.assertAlmostEqual(summary['correlation'][component],
+                                   np.corrcoef(x, y)[0, 1])
+            self.assertAlmostEqual(summarize(stats, ddof=1)['covariance'][
+                component], np.cov(x, y)[0, 1])
+
+    def test_merge_is_order_independent(self):
+        a = pair_moments(self.x[:1000, 0], self.y[:1000, 0])
+        b = pair_moments(self.x[1000:, 0], self.y[1000:, 0])
+        for field, value in merge_pair_stats(a, b).items():
+            np.testing.assert_allclose(value, merge_pair_stats(b, a)[field])
+        empty = summarize(new_pair_stats())
+        self.assertEqual(empty['count'][0], 0)
+        self.assertTrue(np.isnan(empty['std_diff'][0]))
+        with self.assertRaises(ValueError):
+            pair_moments(self.x, self.y[:, 0])
+
+
+class TestCompareSpacecraft(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dirs = []
+        for sc, seed in (('g17', 1), ('gk2a', 2)):
+            directory = os.path.join(self.tmp.name, sc)
+            os.makedirs(directory)
+            for i, day in enumerate(('2022-08-01', '2022-08-02',
+                                     '2022-08-03')):
+                write_model_pickle(os.path.join(
+                    directory, f'{sc}_modout_OMNI{day}.pickle'), day, 144,
+                    seed * 10 + i)
+            self.dirs.append(directory)
+        self.checkpoint = os.path.join(self.tmp.name, 'stats.json')
+
+    def test_matches_whole_series(self):
+        state = compare_spacecraft(*self.dirs, '2022-08-01', '2022-08-03')
+        self.assertEqual(state['completed_through'], '2022-08-03')
+        _, data_1, model_1, subtr_1 = data_loader.load_and_trim_arrays(
+            self.dirs[0], '2022-08-01', '2022-08-03 23:59', workers=1)
+        _, data_2, model_2, subtr_2 = data_loader.load_and_trim_arrays(
+            self.dirs[1], '2022-08-01', '2022-08-03 23:59', workers=1)
+        expected = {
+            'model_vs_obs_1': (model_1, data_1),
+            'model_vs_model': (model_1, model_2)}
+        for name, (x, y) in expected.items():
+            mean_diff, std_diff = utils.mean_and_std_dev(
+                list(np.linalg.norm(x, axis=1)),
+                list(np.linalg.norm(y, axis=1)))
+            summary = summarize(state['stats'][name])
+            self.assertAlmostEqual(summary['mean_diff'][0], mean_diff)
+            self.assertAlmostEqual(summary['std_diff'][0], std_diff)
+        components = summarize(state['stats']['subtr_components'])
+        np.testing.assert_allclose(components['mean_diff'],
+                                   np.mean(subtr_1 - subtr_2, axis=0))
+
+    def test_resume_from_checkpoint(self):
+        whole = compare_spacecraft(*self.dirs, '2022-08-01', '2022-08-03')
+        compare_spacecraft(*self.dirs, '2022-08-01', '2022-08-02',
+                           checkpoint=self.checkpoint)
+        self.assertEqual(load_checkpoint(self.checkpoint)[
+            'completed_through'], '2022-08-02')
+        resumed = compare_spacecraft(*self.dirs, '2022-08-01', '2022-08-03',
+                                     checkpoint=self.checkpoint)
+        for name, stats in whole['stats'].items():
+            for field, values in stats.items():
+                np.testing.assert_allclose(resumed['stats'][name][field],
+                                           values, rtol=1e-12)
+        with self.assertRaises(ValueError):
+            compare_spacecraft(*self.dirs[::-1], '2022-08-01', '2022-08-03',
+                               checkpoint=self.checkpoint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,8 +8,8 @@ src_dir = os.path.abspath(os.path.join(current_dir, '..', '..', 'src'))
 # Add the src directory to sys.path
 sys.path.append(src_dir)
 
-# Now you can import timestamp_utils
-import timestamp_utils
+# Now you can import timestamp_utils as tsu
+import timestamp_utils as tsu
 import datetime
 import numpy as np
 
@@ -38,7 +38,7 @@ def test_j2000_1s_timestamps():
     year, month, day, n_reports = 2000, 1, 1, 60
     result = tsu.j2000_1s_timestamps(year, month, day, n_reports)
     assert isinstance(result, np.ndarray)
-    assert result.shape == (24, n_reports)
+    assert result.shape == (86400 // n_reports, n_reports)
 
 
 def test_j2000_p1s_timestamps():
@@ -46,7 +46,7 @@ def test_j2000_p1s_timestamps():
     result = tsu.j2000_p1s_timestamps(year, month, day, n_reports,
                                       samples_per_report)
     assert isinstance(result, np.ndarray)
-    assert result.shape == (24, n_reports, samples_per_report)
+    assert result.shape == (86400 // n_reports, n_reports, samples_per_report)
 
 
 def test_create_j2000_timestamps():
@@ -107,6 +107,70 @@ def test_j2000_to_iso8601():
     assert isinstance(result, str)
 
 
+def test_j2000_to_datetime64_values():
+    result = tsu.j2000_to_datetime64(np.array([0.0, 1e8, 86400.1, np.nan]))
+    assert result.dtype == np.dtype('datetime64[ns]')
+    assert result[0] == np.datetime64('2000-01-01T12:00:00')
+    assert result[1] == np.datetime64('2003-03-03T21:46:40')
+    assert result[2] == np.datetime64('2000-01-02T12:00:00.100')
+    assert np.isnat(result[3])
+    np.testing.assert_allclose(tsu.datetime64_to_j2000(result[:3]),
+                               [0.0, 1e8, 86400.1], rtol=0, atol=1e-6)
+
+
+def test_j2000_to_posix_matches_datetime():
+    seconds = np.array([0.0, 1e6, 7.3e8 + 0.25])
+    expected = [datetime.datetime(2000, 1, 1, 12) +
+                datetime.timedelta(seconds=s) for s in seconds]
+    assert list(tsu.j2000_to_posix(seconds)) == expected
+
+
+def test_unix_ms_and_posix():
+    unix_ms = np.array([0, 1659571200123])
+    result = tsu.unix_ms_to_datetime64(unix_ms)
+    assert result[1] == np.datetime64('2022-08-04T00:00:00.123')
+    assert tsu.posix_to_datetime64(tsu.SECONDS_POSIX_J2000) == \
+        np.datetime64('2000-01-01T12:00:00')
+    assert np.isclose(tsu.datetime64_to_posix(result[1]), 1659571200.123,
+                      rtol=0, atol=1e-6)
+
+
+def test_cf_to_datetime64():
+    values = np.ma.masked_array([1, 2], mask=[False, True])
+    result = tsu.cf_to_datetime64(values, 'minutes since 2000-01-01 00:00:00')
+    assert result[0] == np.datetime64('2000-01-01T00:01')
+    assert np.isnat(result[1])
+    try:
+        tsu.cf_to_datetime64(values, 'fortnights since 2000-01-01')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('unsupported units must raise')
+
+
+def test_iso8601_round_trip():
+    strings = ['2010-04-05T09:30:00.5Z', '2010-04-05T09:30:00+01:00']
+    result = tsu.iso8601_to_datetime64(strings)
+    assert list(tsu.datetime64_to_iso8601(result, unit='ms')) == \
+        ['2010-04-05T09:30:00.500', '2010-04-05T08:30:00.000']
+
+
+def test_day_of_year_round_trip():
+    days = np.arange('1999-12-25', '2101-01-05', dtype='datetime64[D]')
+    doy = tsu.day_of_year(days)
+    years = days.astype('datetime64[Y]').astype(int) + 1970
+    np.testing.assert_array_equal(tsu.doy_to_datetime64(years, doy), days)
+    assert tsu.doy_to_dom(2100, 60) == (3, 1)
+    assert tsu.dom_to_doy(2024, 12, 31) == 366
+
+
+def test_day_timestamps_10hz():
+    result = tsu.day_timestamps(2022, 8, 4, 0.1)
+    assert len(result) == 864000
+    assert result[0] == tsu.posix_to_j2000(2022, 8, 4, 0, 0, 0)
+    np.testing.assert_allclose(np.diff(result), 0.1, atol=1e-6)
+
+
 # Run all tests
 if __name__ == "__main__":
     test_timestamp_constants()
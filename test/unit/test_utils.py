@@ -1,6 +1,9 @@
 import unittest
 from datetime import datetime
 import sys
+import warnings
+import numpy as np
+import pandas as pd
 
 sys.path.insert(0, '../../src')  # noqa
 from utils import *
@@ -72,6 +75,187 @@ class TestUtils(unittest.TestCase):
         with self.assertRaises(ValueError):
             mean_and_std_dev(data_1, data_2)
 
+    def test_calc_hourly_stddev_matches_resample(self):
+        times = list(pd.date_range('2022-08-01 00:30', periods=600,
+                                   freq='1min').to_pydatetime())
+        subtr = list(np.sin(np.arange(600) / 7.0))
+        kp_mask = [i > 400 for i in range(600)]
+        expected = pd.DataFrame({'datetime': times, 'subtraction': subtr})
+        expected = expected.set_index('datetime')['subtraction'].mask(
+            kp_mask).resample('H').std()
+        pd.testing.assert_series_equal(
+            calc_hourly_stddev(times, subtr, kp_mask), expected)
+
+
+class TestFindDataErrors(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.data = rng.normal(0, 1, 3000)
+        self.data[rng.integers(0, 3000, 60)] += rng.normal(0, 25, 60)
+        self.data[100:104] = np.round(self.data[100:104])  # ties
+        self.data[2000] = np.nan
+
+    def test_methods_match_loop(self):
+        for window in (1, 3, 5, 15):
+            expected = find_data_errors(self.data, window, 4, method='loop')
+            self.assertGreater(len(expected), 0) if window > 1 else None
+            for method in ('vectorized', 'streaming', 'auto'):
+                self.assertEqual(find_data_errors(self.data, window, 4,
+                                                  method=method), expected)
+
+    def test_short_and_empty_series(self):
+        for data in (np.array([1.0]), np.array([1.0, 50.0, 1.0]),
+                     np.arange(6) ** 3):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                expected = find_data_errors(data, 5, 1, method='loop')
+            for method in ('vectorized', 'streaming'):
+                self.assertEqual(find_data_errors(data, 5, 1, method=method),
+                                 expected)
+        self.assertEqual(find_data_errors(np.array([]), 5), [])
+
+    def test_two_dimensional(self):
+        b_field = np.column_stack((self.data, np.roll(self.data, 7),
+                                   np.zeros(len(self.data))))
+        mask = find_data_errors(b_field, 5, 4, return_mask=True)
+        self.assertEqual(mask.shape, b_field.shape)
+        self.assertFalse(mask[:, 2].any())
+        np.testing.assert_array_equal(
+            np.flatnonzero(mask[:, 0]),
+            find_data_errors(self.data, 5, 4, method='loop'))
+        self.assertEqual(find_data_errors(b_field, 5, 4),
+                         np.flatnonzero(mask.any(axis=1)).tolist())
+
+    def test_rolling_mad_outliers_streams(self):
+        pad_value = np.nanmedian(self.data[:1000])
+        streamed = list(rolling_mad_outliers(iter(self.data[:1000]), 5, 4,
+                                             pad_value=pad_value))
+        expected = find_data_errors(self.data[:1000], 5, 4, method='loop')
+        self.assertEqual(streamed, expected)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            find_data_errors(self.data, 4)
+        with self.assertRaises(ValueError):
+            find_data_errors(self.data, 5, method='heap')
+        with self.assertRaises(ValueError):
+            list(rolling_mad_outliers(self.data, 0))
+
+
+class TestAlignDatasets(unittest.TestCase):
+    def setUp(self):
+        self.time_1 = pd.date_range('2022-08-04', periods=6, freq='1s')
+        # GOES-style jitter of a fraction of a second, one sample missing
+        offsets = pd.to_timedelta([0, 0.2, -0.3, 0.6, 0, 0.45], unit='s')
+        self.time_2 = (self.time_1 + offsets).delete(4)
+
+    def test_exact_matches_dict_lookup(self):
+        data_1 = np.arange(6.0)
+        data_2 = np.arange(15.0).reshape(5, 3)
+        aligned_1, aligned_2 = align_datasets(
+            list(self.time_1.to_pydatetime()),
+            list(self.time_2.to_pydatetime()), list(data_1), list(data_2))
+        np.testing.assert_array_equal(aligned_1, [0.0])
+        np.testing.assert_array_equal(aligned_2, [[0.0, 1.0, 2.0]])
+        empty_1, empty_2 = align_datasets([], [], [], [])
+        self.assertEqual((len(empty_1), len(empty_2)), (0, 0))
+
+    def test_modes(self):
+        expected = {'exact': ([0], [0]),
+                    'nearest': ([0, 1, 2, 4, 5], [0, 1, 2, 3, 4]),
+                    'backward': ([0, 2, 4], [0, 2, 3]),
+                    'forward': ([0, 1, 5], [0, 1, 4])}
+        for mode, (index_1, index_2) in expected.items():
+            result = match_times(self.time_1, self.time_2, mode, '500ms')
+            np.testing.assert_array_equal(result[0], index_1, err_msg=mode)
+            np.testing.assert_array_equal(result[1], index_2, err_msg=mode)
+        # No tolerance: every reference time has a nearest sample
+        index_1, index_2 = match_times(self.time_1, self.time_2, 'nearest')
+        np.testing.assert_array_equal(index_2, [0, 1, 2, 3, 3, 4])
+        with self.assertRaises(ValueError):
+            match_times(self.time_1, self.time_2, 'linear')
+
+    def test_numeric_unsorted_and_missing_times(self):
+        reference = np.array([10.0, 20.0, np.nan, 30.0])
+        other = np.array([30.1, np.nan, 9.8, 20.4])
+        index_1, index_2 = match_times(reference, other, 'nearest', 0.25)
+        np.testing.assert_array_equal(index_1, [0, 3])
+        np.testing.assert_array_equal(index_2, [2, 0])
+        with self.assertRaises(TypeError):
+            match_times(reference, self.time_1)
+
+    def test_many_spacecraft(self):
+        times = {'g16': self.time_1, 'g17': self.time_2,
+                 'g18': self.time_1[::2]}
+        indices = align_indices(times, 'nearest', pd.Timedelta('500ms'))
+        self.assertEqual(list(indices), ['g16', 'g17', 'g18'])
+        np.testing.assert_array_equal(indices['g16'], [0, 2, 4])
+        np.testing.assert_array_equal(indices['g17'], [0, 2, 3])
+        np.testing.assert_array_equal(indices['g18'], [0, 1, 2])
+        as_list = align_indices(list(times.values()), 'nearest', 0.5,
+                                reference=2)
+        for index, expected in zip(as_list, indices.values()):
+            np.testing.assert_array_equal(index, expected)
+
+
+class TestResampleToTimes(unittest.TestCase):
+    def setUp(self):
+        # 1-minute driver with a NaN and a 10 minute data gap
+        self.times = pd.date_range('2024-05-10', periods=6, freq='1min')
+        self.times = self.times.append(pd.DatetimeIndex(['2024-05-10 00:15']))
+        self.values = np.array([0.0, 1.0, np.nan, 3.0, 4.0, 5.0, 15.0])
+        self.target = pd.date_range('2024-05-09 23:59:30', periods=10,
+                                    freq='2min')
+
+    def test_methods(self):
+        expected = {
+            'linear': [np.nan, 1.5, 3.5, np.nan, np.nan, np.nan, np.nan,
+                       np.nan, np.nan, np.nan],
+            'previous': [np.nan, 1.0, 3.0, 5.0, 5.0, np.nan, np.nan, np.nan,
+                         15.0, 15.0],
+            'nearest': [0.0, 1.0, 3.0, 5.0, 5.0, np.nan, 15.0, 15.0, 15.0,
+                        15.0]}
+        for method, values in expected.items():
+            result = resample_to_times(self.times, self.values, self.target,
+                                       method, max_gap='4min')
+            np.testing.assert_array_equal(result, values, err_msg=method)
+        # Without a gap limit the linear interpolation bridges the gap
+        result = resample_to_times(self.times, self.values, self.target)
+        np.testing.assert_allclose(result[3:5], [5.5, 7.5])
+        self.assertTrue(np.isnan(result[0]) and np.isnan(result[-1]))
+        with self.assertRaises(ValueError):
+            resample_to_times(self.times, self.values, self.target, 'cubic')
+
+    def test_matches_np_interp(self):
+        rng = np.random.default_rng(3)
+        times = np.sort(rng.choice(10000, 500, replace=False)).astype(float)
+        values = rng.normal(size=(500, 2))
+        values[rng.random((500, 2)) < 0.1] = np.nan
+        target = np.linspace(-10, 10010, 2000)
+        order = rng.permutation(500)
+        result = resample_to_times(times[order], values[order], target)
+        for column in range(2):
+            valid = ~np.isnan(values[:, column])
+            expected = np.interp(target, times[valid], values[valid, column],
+                                 left=np.nan, right=np.nan)
+            np.testing.assert_allclose(result[:, column], expected)
+        # Exact hits are the sample values themselves
+        np.testing.assert_array_equal(
+            resample_to_times(times, values[:, 0], times, 'linear', 1e-9),
+            values[:, 0])
+        with self.assertRaises(TypeError):
+            resample_to_times(times, values, self.target)
+
+    def test_no_source_samples(self):
+        result = resample_to_times([], np.array([]), self.target,
+                                   method='linear', max_gap='5min')
+        self.assertEqual(result.shape, (10,))
+        self.assertTrue(np.all(np.isnan(result)))
+        result = resample_to_times([], np.empty((0, 2)), self.target,
+                                   method='nearest', max_gap='5min')
+        self.assertEqual(result.shape, (10, 2))
+        self.assertTrue(np.all(np.isnan(result)))
+
 
 if __name__ == '__main__':
     unittest.main()
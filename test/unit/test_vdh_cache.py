@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from unittest import mock
+import numpy as np
+
+sys.path.insert(0, '../../src')  # noqa
+import vdh_cache
+from vdh_cache import *
+
+
+class TestVdhCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.source = os.path.join(self.tmp_dir, 'g17_d20220801.nc')
+        with open(self.source, 'wb') as file:
+            file.write(b'x' * 100)
+        self.options = {'transform_backend': 'native', 'knot_cadence': None}
+        self.arrays = {'inclination': np.linspace(0, 1, 1440),
+                       'b_vdh': np.arange(4320.).reshape(1440, 3)}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_store_and_load(self):
+        self.assertIsNone(load(self.source, self.options, self.cache_dir))
+        store(self.source, self.arrays, self.options, self.cache_dir)
+        cached = load(self.source, self.options, self.cache_dir)
+        self.assertEqual(sorted(cached), ['b_vdh', 'inclination'])
+        for name, array in self.arrays.items():
+            np.testing.assert_array_equal(cached[name], array)
+
+    def test_key_changes(self):
+        key = cache_key(self.source, self.options)
+        self.assertEqual(key, cache_key([self.source], self.options))
+        self.assertNotEqual(key, cache_key(
+            self.source, dict(self.options, transform_backend='spacepy')))
+
+        # Touching or rewriting the input invalidates the entry
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(key, cache_key(self.source, self.options))
+
+        # So does a new transform version
+        key = cache_key(self.source, self.options)
+        original = vdh_cache.TRANSFORM_VERSION
+        try:
+            vdh_cache.TRANSFORM_VERSION = original + 1
+            self.assertNotEqual(key, cache_key(self.source, self.options))
+        finally:
+            vdh_cache.TRANSFORM_VERSION = original
+
+    def test_lru_eviction(self):
+        sources = []
+        for i in range(4):
+            path = os.path.join(self.tmp_dir, f'day{i}.nc')
+            with open(path, 'wb') as file:
+                file.write(bytes([i]))
+            sources.append(path)
+            store(path, self.arrays, self.options, self.cache_dir)
+            entry = list_entries(self.cache_dir)[0]['path']
+            os.utime(entry, (1000 + i, 1000 + i))
+        entry_bytes = list_entries(self.cache_dir)[0]['bytes']
+
+        # day0 is used again, so day1 becomes the least recently used
+        self.assertIsNotNone(load(sources[0], self.options, self.cache_dir))
+        self.assertEqual(evict(self.cache_dir, 3 * entry_bytes), 1)
+        self.assertIsNone(load(sources[1], self.options, self.cache_dir))
+        for i in (0, 2, 3):
+            self.assertIsNotNone(load(sources[i], self.options,
+                                      self.cache_dir))
+
+        # store() keeps the cache within max_bytes
+        store(self.source, self.arrays, self.options, self.cache_dir,
+              max_bytes=2 * entry_bytes + 100)
+        self.assertEqual(cache_info(self.cache_dir)['entries'], 2)
+        self.assertIsNotNone(load(self.source, self.options, self.cache_dir))
+
+    def test_entry_removed_while_listing(self):
+        # Another process evicts an entry between listdir and stat
+        store(self.source, self.arrays, self.options, self.cache_dir)
+        names = os.listdir(self.cache_dir) + [f'gone{ENTRY_SUFFIX}']
+        with mock.patch('vdh_cache.os.listdir', return_value=names):
+            entries = list_entries(self.cache_dir)
+            self.assertEqual(len(entries), 1)
+            self.assertEqual(evict(self.cache_dir, 0), 1)
+        self.assertEqual(list_entries(self.cache_dir), [])
+
+    def test_load_without_refresh(self):
+        # The entry is evicted after reading it, or the cache is read-only
+        store(self.source, self.arrays, self.options, self.cache_dir)
+        for error in (FileNotFoundError, PermissionError):
+            with mock.patch('vdh_cache.os.utime', side_effect=error):
+                cached = load(self.source, self.options, self.cache_dir)
+            np.testing.assert_array_equal(cached['inclination'],
+                                          self.arrays['inclination'])
+
+    def test_clear_and_cli(self):
+        store(self.source, self.arrays, self.options, self.cache_dir)
+        self.assertEqual(list_entries(self.cache_dir)[0]['sources'],
+                         [os.path.abspath(self.source)])
+        main(['info', '--cache-dir', self.cache_dir])
+        main(['list', '--cache-dir', self.cache_dir])
+        main(['clear', '--cache-dir', self.cache_dir])
+        self.assertEqual(cache_info(self.cache_dir)['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
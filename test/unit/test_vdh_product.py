@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import numpy as np
+import pandas as pd
+import netCDF4 as nc
+
+sys.path.insert(0, '../../src')  # noqa
+from vdh_product import *
+
+
+class TestVdhProduct(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'vdh.nc')
+        rng = np.random.default_rng(2)
+        self.time = pd.date_range('2022-08-01', periods=3000, freq='1min')
+        self.data = {}
+        for key in ('g17', 'gk2a'):
+            b_gse = rng.normal(50, 20, (3000, 3))
+            b_gse[10] = np.nan
+            self.data[key] = {'b_gse': b_gse,
+                              'b_vdh': rng.normal(50, 20, (3000, 3)),
+                              'inclination': rng.uniform(0, 1.5, 3000)}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        write_vdh_netcdf(self.path, self.time, self.data)
+        time, data = read_vdh_netcdf(self.path)
+        np.testing.assert_array_equal(time, self.time.values)
+        self.assertEqual(list(data), ['g17', 'gk2a'])
+        for key, expected in self.data.items():
+            for name in ('b_gse', 'b_vdh'):
+                np.testing.assert_allclose(data[key][name], expected[name],
+                                           rtol=1e-6, equal_nan=True)
+            np.testing.assert_allclose(data[key]['inclination'],
+                                       np.degrees(expected['inclination']),
+                                       rtol=1e-6)
+        self.assertTrue(np.isnan(data['g17']['b_gse'][10]).all())
+
+    def test_compressed_and_chunked(self):
+        write_vdh_netcdf(self.path, self.time, self.data, time_chunk=720)
+        with nc.Dataset(self.path) as dataset:
+            self.assertEqual(dataset['time'].units, TIME_UNITS)
+            var = dataset['g17_b_vdh']
+            self.assertEqual(var.chunking(), [720, 3])
+            self.assertTrue(var.filters()['zlib'])
+
+
+if __name__ == '__main__':
+    unittest.main()